@@ -0,0 +1,220 @@
+# aggregate.py
+"""Per-model and per-case summary tables from the long-format results store.
+
+Writes eval_results_by_model.csv and eval_results_by_case.csv (the tables in
+the README) into the store directory, computed with vectorised NumPy over
+results_store records. The published copies at the repository root are only
+replaced by passing `--out-dir .` explicitly.
+Track labels: J = plain JSON, JSO = JSON with response_format, T = TOON,
+TLR = TOON with local repair (EVAL_LOCAL_REPAIR=1 runs only), TSO = TOON with
+a grammar constraint (EVAL_TOON_GRAMMAR=1 runs only), TTP = TOON with the
+schema-tailored prompt (EVAL_TOON_TAILORED=1 runs only).
+Columns per track:
+
+  1S / F   one-shot / final accuracy
+  T        tokens (prompt + completion; per run for models, per unit for cases)
+  QW       seconds waiting for scheduler admission (per run / per unit)
+  TTFT     time to first token (streamed runs only, EVAL_STREAM=1)
+  GEN      generation seconds, summed over repair attempts (per run / per unit)
+  TPS      decode throughput, completion tokens per second
+
+Latency columns are empty when no recorded attempt measured them.
+
+`--compare` instead writes eval_repair_feedback.csv, one row per store and
+track, to compare repair strategies run into separate stores (e.g. results/
+and results_diff/ from EVAL_REPAIR_DIFF=1): final and repaired accuracy (the
+share of one-shot failures a repair fixed), mean attempts per unit, and
+attempts and tokens per success (totals over all units / units that ended
+matching gold).
+
+Usage:
+    python aggregate.py                           # tables from results/, written to results/
+    python aggregate.py --import-csv eval_runs.csv  # first load a wide per-run CSV into the store
+    python aggregate.py --compare results results_diff
+"""
+import argparse
+import csv
+import time
+from pathlib import Path
+from typing import List, Sequence, Tuple
+
+import numpy as np
+
+from results_store import ResultsStore, UnitTable, import_runs_csv
+
+TRACKS = {"J": "json_plain", "JSO": "json", "T": "toon", "TLR": "toon_local", "TSO": "toon_so", "TTP": "toon_tailored"}
+LATENCY = ("QW", "TTFT", "GEN", "TPS")
+
+Table = Tuple[List[str], List[list]]
+
+
+def _mean(values: np.ndarray, mask: np.ndarray, axis) -> np.ndarray:
+    """Mean of `values` where `mask` (and the value) is set; NaN for empty groups."""
+    mask = mask & ~np.isnan(values)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.where(mask, values, 0.0).sum(axis=axis) / np.where(mask.sum(axis=axis) > 0, mask.sum(axis=axis), np.nan)
+
+
+def _per_run(values: np.ndarray, present: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Sum over cases for each (model, run, track); mask of runs that have a value."""
+    has = present & ~np.isnan(values)
+    return np.where(has, values, 0.0).sum(axis=2), has.any(axis=2)
+
+
+def by_model(units: UnitTable, track_codes: Sequence[int]) -> np.ndarray:
+    """(models, tracks, 7) array: 1S, F, T, QW, TTFT, GEN, TPS."""
+    p = units.present
+    out = np.full((units.shape[0], len(track_codes), 7), np.nan)
+    for j, t in enumerate(track_codes):
+        pt = p[..., t]
+        out[:, j, 0] = _mean(units.one_shot[..., t].astype(float), pt, axis=(1, 2))
+        out[:, j, 1] = _mean(units.final[..., t].astype(float), pt, axis=(1, 2))
+        for col, values in ((2, units.tokens), (3, units.queue_s), (5, units.gen_s)):
+            sums, has = _per_run(values[..., t:t + 1], pt[..., None])
+            out[:, j, col] = _mean(sums[..., 0], has[..., 0], axis=1)
+        out[:, j, 4] = _mean(units.ttft_s[..., t], pt, axis=(1, 2))
+        out[:, j, 6] = _mean(units.tokens_per_s[..., t], pt, axis=(1, 2))
+    return out
+
+
+def by_case(units: UnitTable, track_codes: Sequence[int]) -> np.ndarray:
+    """(cases, tracks, 7) array: 1S, F, T, QW, TTFT, GEN, TPS (all means over units)."""
+    p = units.present
+    fields = (units.one_shot.astype(float), units.final.astype(float), units.tokens,
+              units.queue_s, units.ttft_s, units.gen_s, units.tokens_per_s)
+    out = np.full((units.shape[2], len(track_codes), 7), np.nan)
+    for j, t in enumerate(track_codes):
+        for k, values in enumerate(fields):
+            out[:, j, k] = _mean(values[..., t], p[..., t], axis=(0, 1))
+    return out
+
+
+def _cell(x: float):
+    return "" if np.isnan(x) else float(x)
+
+
+def model_table(store: ResultsStore, units: UnitTable) -> Table:
+    labels = [label for label, fmt in TRACKS.items() if fmt in store.dims["track"]]
+    codes = [store.dims["track"].index(TRACKS[label]) for label in labels]
+    agg = by_model(units, codes)
+    header = ["model"] + [f"{l}{m}" for l in labels for m in ("1S", "F", "T")] + [f"{l}{m}" for l in labels for m in LATENCY]
+    rows = []
+    for m in sorted(range(agg.shape[0]), key=lambda i: store.dims["model"][i]):
+        if not units.present[m].any():
+            continue
+        core = [_cell(agg[m, j, k]) for j in range(len(labels)) for k in (0, 1, 2)]
+        lat = [_cell(agg[m, j, k]) for j in range(len(labels)) for k in (3, 4, 5, 6)]
+        rows.append([store.dims["model"][m]] + core + lat)
+    return header, rows
+
+
+def case_table(store: ResultsStore, units: UnitTable) -> Table:
+    labels = [label for label, fmt in TRACKS.items() if fmt in store.dims["track"]]
+    codes = [store.dims["track"].index(TRACKS[label]) for label in labels]
+    agg = by_case(units, codes)
+    header = (["case"] + [f"{l}T" for l in labels] + [f"{l}{m}" for l in labels for m in ("1S", "F")]
+              + [f"{l}{m}" for l in labels for m in LATENCY])
+    rows = []
+    for c in range(agg.shape[0]):
+        if not units.present[:, :, c].any():
+            continue
+        row = [store.dims["case"][c]]
+        row += [_cell(agg[c, j, 2]) for j in range(len(labels))]
+        row += [_cell(agg[c, j, k]) for j in range(len(labels)) for k in (0, 1)]
+        row += [_cell(agg[c, j, k]) for j in range(len(labels)) for k in (3, 4, 5, 6)]
+        rows.append(row)
+    return header, rows
+
+
+def repair_table(stores: Sequence[Tuple[str, ResultsStore, UnitTable]]) -> Table:
+    header = ["store", "track", "units", "1S", "F", "repaired", "attempts", "attempts_per_success",
+              "tokens_per_success"]
+    rows = []
+    for name, store, units in stores:
+        for label, fmt in TRACKS.items():
+            if fmt not in store.dims["track"]:
+                continue
+            t = store.dims["track"].index(fmt)
+            present = units.present[..., t]
+            n = int(present.sum())
+            if not n:
+                continue
+            ok = units.final[..., t] & present
+            missed = present & ~units.one_shot[..., t]
+            attempts = units.attempts[..., t][present]
+            successes = int(ok.sum())
+            with np.errstate(invalid="ignore", divide="ignore"):
+                rows.append([name, label, n, float(units.one_shot[..., t][present].mean()), float(ok.sum() / n),
+                             _cell(np.float64((ok & missed).sum()) / missed.sum()), float(attempts.mean()),
+                             _cell(np.float64(attempts.sum()) / successes),
+                             _cell(np.float64(units.tokens[..., t][present].sum()) / successes)])
+    return header, rows
+
+
+def print_repair_table(table: Table) -> None:
+    header, rows = table
+    print(f"  {'store':<24} {'track':<5} {'units':>6} {'1S':>6} {'F':>6} {'repaired':>8} "
+          f"{'att/unit':>8} {'att/succ':>8} {'tok/succ':>9}")
+    for r in rows:
+        cells = ["n/a" if v == "" else f"{v:.2f}" for v in r[3:8]]
+        tok = "n/a" if r[8] == "" else f"{r[8]:.0f}"
+        print(f"  {r[0][-24:]:<24} {r[1]:<5} {r[2]:>6} {cells[0]:>6} {cells[1]:>6} {cells[2]:>8} "
+              f"{cells[3]:>8} {cells[4]:>8} {tok:>9}")
+
+
+def write_table(path: Path, table: Table) -> None:
+    header, rows = table
+    with path.open("w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(header)
+        writer.writerows(rows)
+
+
+def main(argv=None) -> None:
+    ap = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    ap.add_argument("--store", default="results", help="results store directory")
+    ap.add_argument("--import-csv", default=None, help="wide eval_runs.csv to append to the store first")
+    ap.add_argument("--out-dir", default=None,
+                    help="where to write the summary CSVs (default: the store directory; "
+                         "the current directory with --compare)")
+    ap.add_argument("--compare", nargs="+", default=None, metavar="STORE",
+                    help="write eval_repair_feedback.csv comparing these stores instead")
+    args = ap.parse_args(argv)
+
+    if args.compare:
+        stores = []
+        for path in args.compare:
+            store = ResultsStore(Path(path))
+            rec = store.load()
+            if not len(rec):
+                raise SystemExit(f"No records in {path}")
+            stores.append((path, store, UnitTable(rec)))
+        table = repair_table(stores)
+        out = Path(args.out_dir or ".") / "eval_repair_feedback.csv"
+        write_table(out, table)
+        print_repair_table(table)
+        print(f"Wrote {out}")
+        return
+
+    store = ResultsStore(Path(args.store))
+    if args.import_csv:
+        n = import_runs_csv(store, Path(args.import_csv))
+        store.close()
+        print(f"Imported {n} attempt records from {args.import_csv}")
+    t0 = time.perf_counter()
+    rec = store.load()
+    if not len(rec):
+        raise SystemExit(f"No records in {args.store}; run eval.py or pass --import-csv eval_runs.csv")
+    units = UnitTable(rec)
+    tables = model_table(store, units), case_table(store, units)
+    elapsed = time.perf_counter() - t0
+    out = Path(args.out_dir or args.store)
+    out.mkdir(parents=True, exist_ok=True)
+    write_table(out / "eval_results_by_model.csv", tables[0])
+    write_table(out / "eval_results_by_case.csv", tables[1])
+    print(f"Aggregated {len(rec)} attempts in {elapsed * 1000:.1f} ms -> "
+          f"{out / 'eval_results_by_model.csv'}, {out / 'eval_results_by_case.csv'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,341 @@
+# analysis.py
+"""Uncertainty for the benchmark numbers in eval_runs.csv.
+
+- Bootstrap 95% CIs (vectorised NumPy resampling) for one-shot accuracy,
+  final accuracy and tokens, per model × track and per case × track.
+- Paired tests between the tracks J (plain JSON), JSO (response_format JSON),
+  T (TOON) and the opt-in TOON variants TLR (local repair,
+  EVAL_LOCAL_REPAIR=1), TSO (grammar-constrained, EVAL_TOON_GRAMMAR=1) and
+  TTP (schema-tailored prompt, EVAL_TOON_TAILORED=1) on the same (model,
+  run, case) units: exact McNemar for the accuracies, a sign-flip
+  permutation test for tokens, plus a bootstrap CI of the mean difference.
+  Per model, per case and overall. Resampling and sign flips act on whole
+  runs (CSV rows), so the cases of one run stay together.
+- Byte-identical runs: runs of a model whose every outcome and token count
+  equals an earlier run. At temperature 0 these are replays, not independent
+  samples, so by default each distinct run is counted once (--keep-identical
+  to use every row).
+
+Writes eval_stats_ci.csv, eval_stats_paired.csv and eval_identical_runs.csv.
+
+Usage:
+    python analysis.py [eval_runs.csv] [--resamples 10000] [--seed 0] [--keep-identical]
+"""
+import argparse
+import math
+import time
+from itertools import combinations
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+import numpy as np
+import pandas as pd
+
+TRACKS = {"J": "json_plain", "JSO": "json", "T": "toon", "TLR": "toon_local", "TSO": "toon_so", "TTP": "toon_tailored"}
+OUTCOMES = ("one_shot", "final", "attempts", "prompt_tokens", "completion_tokens")
+MAX_CHUNK = 4_000_000  # resample draws generated per chunk (bounds memory for large groups)
+MAX_DISTINCT = 32  # groups with at most this many distinct run values are drawn per value
+
+
+# =========================================
+# Loading
+# =========================================
+def cases_in(df: pd.DataFrame) -> List[str]:
+    return [c[: -len("_json_one_shot")] for c in df.columns if c.endswith("_json_one_shot")]
+
+
+def tracks_in(df: pd.DataFrame, cases: List[str]) -> Dict[str, str]:
+    """The TRACKS with columns in `df` (TLR / TSO only exist in opt-in runs)."""
+    return {label: fmt for label, fmt in TRACKS.items() if all(f"{case}_{fmt}_one_shot" in df.columns for case in cases)}
+
+
+def identical_runs(df: pd.DataFrame, cases: List[str]) -> pd.DataFrame:
+    """model, run, identical_to: each run whose outcomes repeat an earlier run of the same model."""
+    keys = [f"{case}_{fmt}_{o}" for case in cases for fmt in TRACKS.values() for o in OUTCOMES
+            if f"{case}_{fmt}_{o}" in df.columns]
+    first = df.groupby(["model"] + keys, sort=False, dropna=False)["run"].transform("first")
+    dup = df.duplicated(subset=["model"] + keys, keep="first")
+    return pd.DataFrame({"model": df["model"][dup], "run": df["run"][dup], "identical_to": first[dup]})
+
+
+class Outcomes:
+    """Arrays of shape (rows, cases, tracks), rows grouped by model (`rows_of(m)` is a slice)."""
+
+    def __init__(self, df: pd.DataFrame, cases: List[str]):
+        self.cases = cases
+        self.tracks = tracks_in(df, cases)
+        models, model_idx = np.unique(df["model"].to_numpy(), return_inverse=True)
+        df = df.iloc[np.argsort(model_idx, kind="stable")]
+        self.models = models
+        self.bounds = np.searchsorted(np.sort(model_idx), np.arange(len(models) + 1))
+
+        def grid(suffix: str, dtype) -> np.ndarray:
+            return np.stack([
+                np.stack([pd.to_numeric(df[f"{case}_{fmt}_{suffix}"].replace({"True": 1, "False": 0}),
+                                        errors="coerce").to_numpy(dtype=dtype) for fmt in self.tracks.values()], axis=-1)
+                for case in cases
+            ], axis=1)
+
+        self.one_shot = grid("one_shot", float)
+        self.final = grid("final", float)
+        self.tokens = grid("prompt_tokens", float) + grid("completion_tokens", float)
+
+    def rows_of(self, m: int) -> slice:
+        return slice(self.bounds[m], self.bounds[m + 1])
+
+
+# =========================================
+# Vectorised resampling
+# =========================================
+def clusters(group: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Per-run (row) sums and non-NaN counts of a (runs,) or (runs, cases) array; empty runs dropped."""
+    g = group.reshape(len(group), -1)
+    seen = ~np.isnan(g)
+    counts = seen.sum(axis=1)
+    keep = counts > 0
+    return np.where(seen, g, 0.0).sum(axis=1)[keep], counts[keep].astype(np.float64)
+
+
+def row_quantiles(draws: np.ndarray, q: List[float]) -> np.ndarray:
+    """(rows, len(q)) linear-interpolated quantiles of each row (np.quantile's default method).
+
+    A full row sort beats np.quantile's partition here (a few thousand rows of
+    `resamples` draws each).
+    """
+    ordered = np.sort(draws, axis=1)
+    pos = np.asarray(q) * (draws.shape[1] - 1)
+    lo = np.floor(pos).astype(int)
+    hi = np.minimum(lo + 1, draws.shape[1] - 1)
+    return ordered[:, lo] + (ordered[:, hi] - ordered[:, lo]) * (pos - lo)
+
+
+class Resampler:
+    """Vectorised bootstrap / sign-flip draws for many groups at once.
+
+    The resampled unit is a run (a CSV row): a statistic over several cases
+    of a run is the ratio sum(values) / count(values) of the resampled runs,
+    and sign flips act on whole runs, so runs are never split.
+
+    A group whose runs take few distinct values (0/1 flags, case counts) is
+    drawn as multinomial counts over those values (for sign flips: the m runs
+    sharing a magnitude a sum to a * (2 * Binomial(m, 1/2) - m)), the same
+    distribution as resampling runs at O(resamples × distinct values). The
+    remaining groups are bucketed by run count n and share one resample-count
+    matrix W (resamples × n) and one ±1 sign matrix, drawn in memory-bounded
+    chunks, so a whole bucket is one BLAS product W @ V over the stacked
+    groups. Each CI is still a valid bootstrap; CIs of groups sharing draws
+    are just correlated.
+    """
+
+    def __init__(self, resamples: int, rng: np.random.Generator):
+        self.resamples = resamples
+        self.rng = rng
+
+    def _chunks(self, n: int):
+        per_chunk = max(1, MAX_CHUNK // n)
+        for start in range(0, self.resamples, per_chunk):
+            yield slice(start, min(self.resamples, start + per_chunk))
+
+    def _weights(self, rows: int, n: int) -> np.ndarray:
+        """(rows, n) bootstrap counts: n runs drawn with replacement per row."""
+        idx = self.rng.integers(0, n, size=(rows, n)) + (np.arange(rows) * n)[:, None]
+        return np.bincount(idx.ravel(), minlength=rows * n).reshape(rows, n).astype(np.float64)
+
+    def _large(self, n: int) -> bool:
+        """Too many runs for one cached resample matrix."""
+        return n * self.resamples > MAX_CHUNK
+
+    @staticmethod
+    def _few_values(values: np.ndarray):
+        """(distinct values, counts) if there are few enough to draw over, else None."""
+        uniq, counts = np.unique(values, return_counts=True)
+        return (uniq, counts) if len(uniq) <= MAX_DISTINCT and len(uniq) * 4 <= len(values) else None
+
+    def _buckets(self, sizes: List[int], members: List[int]):
+        """(n, member slice) batches: groups of n runs, at most MAX_CHUNK resampled values per batch."""
+        by_size: Dict[int, List[int]] = {}
+        for g in members:
+            by_size.setdefault(sizes[g], []).append(g)
+        per_batch = max(1, MAX_CHUNK // self.resamples)
+        for n, same in by_size.items():
+            for start in range(0, len(same), per_batch):
+                yield n, same[start:start + per_batch]
+
+    def cis(self, groups: List[np.ndarray], level: float = 0.95) -> np.ndarray:
+        """(groups, 3) array of mean, lo, hi percentile bootstrap CIs; NaNs ignored."""
+        parts = [clusters(g) for g in groups]
+        out = np.full((len(groups), 3), np.nan)
+        q = [(1 - level) / 2, (1 + level) / 2]
+        shared = []
+        for g, (sums, counts) in enumerate(parts):
+            if not len(sums):
+                continue
+            out[g, 0] = sums.sum() / counts.sum()
+            few = self._few_values(sums) if self._large(len(sums)) and np.all(counts == counts[0]) else None
+            if few is None:
+                shared.append(g)
+                continue
+            uniq, freq = few
+            n = len(sums)
+            means = self.rng.multinomial(n, freq / n, size=self.resamples) @ uniq / counts.sum()
+            out[g, 1:] = row_quantiles(means[None, :], q)[0]
+        weights: Dict[int, np.ndarray] = {}  # one full W per small bucket, shared by its batches
+        for n, members in self._buckets([len(s) for s, _ in parts], shared):
+            sums = np.stack([parts[g][0] for g in members], axis=1)  # (n, groups)
+            counts = np.stack([parts[g][1] for g in members], axis=1)
+            if not self._large(n):
+                if n not in weights:
+                    weights[n] = self._weights(self.resamples, n)
+                w = weights[n]
+                means = (w @ sums) / (w @ counts)
+            else:
+                means = np.empty((self.resamples, len(members)))
+                for rows in self._chunks(n):
+                    w = self._weights(rows.stop - rows.start, n)
+                    means[rows] = (w @ sums) / (w @ counts)
+            out[members, 1:] = row_quantiles(means.T, q)
+        return out
+
+    def sign_flip_ps(self, groups: List[np.ndarray]) -> np.ndarray:
+        """Two-sided permutation p-values for mean(diffs) == 0 (random sign flips of runs), per group."""
+        sums = [clusters(g)[0] for g in groups]
+        observed = np.array([abs(s.sum()) - 1e-9 for s in sums])
+        hits = np.zeros(len(groups), dtype=np.int64)
+        shared = []
+        for g, s in enumerate(sums):
+            few = self._few_values(np.abs(s)) if self._large(len(s)) else None
+            if few is None:
+                shared.append(g)
+                continue
+            mags, freq = few
+            flips = self.rng.binomial(freq, 0.5, size=(self.resamples, len(freq)))
+            hits[g] = np.sum(np.abs((2 * flips - freq) @ mags) >= observed[g])
+        for n, members in self._buckets([len(s) for s in sums], shared):
+            if n == 0:
+                continue
+            stacked = np.stack([sums[g] for g in members], axis=1)
+            for rows in self._chunks(n):
+                signs = self.rng.integers(0, 2, size=(rows.stop - rows.start, n)) * 2.0 - 1.0
+                hits[members] += np.sum(np.abs(signs @ stacked) >= observed[members], axis=0)
+        p = (hits + 1) / (self.resamples + 1)
+        return np.where([len(s) > 0 for s in sums], p, 1.0)
+
+
+def mcnemar_exact(a: np.ndarray, b: np.ndarray) -> float:
+    """Two-sided exact McNemar p-value for paired 0/1 outcomes (binomial test on discordant pairs)."""
+    n01 = int(np.sum((a == 0) & (b == 1)))
+    n10 = int(np.sum((a == 1) & (b == 0)))
+    n = n01 + n10
+    if n == 0:
+        return 1.0
+    k = np.arange(min(n01, n10) + 1)
+    log_pmf = (math.lgamma(n + 1) - np.array([math.lgamma(i + 1) + math.lgamma(n - i + 1) for i in k])
+               - n * math.log(2))
+    return float(min(1.0, 2 * np.exp(log_pmf).sum()))
+
+
+# =========================================
+# Tables
+# =========================================
+def ci_groups(o: Outcomes):
+    """Rows and value groups of the per model × track and per case × track CIs."""
+    rows, groups = [], []
+    labels = list(o.tracks)
+    for m, model in enumerate(o.models):
+        sel = o.rows_of(m)
+        for j, label in enumerate(labels):
+            per_run = {
+                "one_shot": o.one_shot[sel, :, j].mean(axis=1),
+                "final": o.final[sel, :, j].mean(axis=1),
+                "tokens": o.tokens[sel, :, j].sum(axis=1),  # per run, as in the README tables
+            }
+            for metric, values in per_run.items():
+                rows.append(dict(level="model", group=model, track=label, metric=metric, n=sel.stop - sel.start))
+                groups.append(values)
+    for c, case in enumerate(o.cases):
+        for j, label in enumerate(labels):
+            per_unit = {"one_shot": o.one_shot[:, c, j], "final": o.final[:, c, j], "tokens": o.tokens[:, c, j]}
+            for metric, values in per_unit.items():
+                rows.append(dict(level="case", group=case, track=label, metric=metric, n=len(values)))
+                groups.append(values)
+    return rows, groups
+
+
+def paired_groups(level: str, group: str, sel: slice, case_sel: slice, o: Outcomes):
+    """Rows (with means and McNemar p-values) and (runs, cases) diffs for every track pair and metric."""
+    rows, diffs = [], []
+    labels = list(o.tracks)
+    for a, b in combinations(range(len(labels)), 2):
+        for metric, arr in (("one_shot", o.one_shot), ("final", o.final), ("tokens", o.tokens)):
+            diff = arr[sel, case_sel, a] - arr[sel, case_sel, b]  # NaN unless both tracks ran
+            paired = ~np.isnan(diff)
+            va, vb = arr[sel, case_sel, a][paired], arr[sel, case_sel, b][paired]
+            row = dict(level=level, group=group, metric=metric, a=labels[a], b=labels[b],
+                       mean_a=float(va.mean()) if len(va) else float("nan"),
+                       mean_b=float(vb.mean()) if len(vb) else float("nan"),
+                       diff=float((va - vb).mean()) if len(va) else float("nan"),
+                       p_value=float("nan"), test="sign-flip permutation", n_pairs=int(len(va)))
+            if metric != "tokens":
+                row.update(p_value=mcnemar_exact(va, vb), test="exact McNemar")
+            rows.append(row)
+            diffs.append(diff)
+    return rows, diffs
+
+
+def stats_tables(o: Outcomes, rs: Resampler) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """(CI table, paired-test table); all bootstrap CIs are drawn in one batch."""
+    ci_rows, groups = ci_groups(o)
+    all_rows = slice(None)
+    parts = [paired_groups("overall", "all", all_rows, slice(None), o)]
+    parts += [paired_groups("model", model, o.rows_of(m), slice(None), o) for m, model in enumerate(o.models)]
+    parts += [paired_groups("case", case, all_rows, slice(c, c + 1), o) for c, case in enumerate(o.cases)]
+    diffs = [d for _, ds in parts for d in ds]
+    cis = rs.cis(groups + diffs)
+
+    ci = pd.DataFrame(ci_rows)
+    ci[["mean", "ci_lo", "ci_hi"]] = cis[: len(groups)]
+    ci = ci[["level", "group", "track", "metric", "mean", "ci_lo", "ci_hi", "n"]]
+
+    paired = pd.DataFrame([row for rows, _ in parts for row in rows])
+    paired[["diff_ci_lo", "diff_ci_hi"]] = cis[len(groups):, 1:]
+    permuted = (paired["metric"] == "tokens").to_numpy()
+    paired.loc[permuted, "p_value"] = rs.sign_flip_ps([d for d, p in zip(diffs, permuted) if p])
+    paired = paired[["level", "group", "metric", "a", "b", "mean_a", "mean_b", "diff",
+                     "diff_ci_lo", "diff_ci_hi", "p_value", "test", "n_pairs"]]
+    return ci, paired
+
+
+def main(argv=None) -> None:
+    ap = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    ap.add_argument("csv", nargs="?", default="eval_runs.csv")
+    ap.add_argument("--resamples", type=int, default=10_000)
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--keep-identical", action="store_true", help="count byte-identical runs as independent samples")
+    ap.add_argument("--out-dir", default=".")
+    args = ap.parse_args(argv)
+
+    t0 = time.perf_counter()
+    df = pd.read_csv(args.csv)
+    cases = cases_in(df)
+    dups = identical_runs(df, cases)
+    used = df if args.keep_identical else df.drop(index=dups.index)
+    o = Outcomes(used, cases)
+    rs = Resampler(args.resamples, np.random.default_rng(args.seed))
+    ci, paired = stats_tables(o, rs)
+
+    out = Path(args.out_dir)
+    ci.to_csv(out / "eval_stats_ci.csv", index=False)
+    paired.to_csv(out / "eval_stats_paired.csv", index=False)
+    dups.to_csv(out / "eval_identical_runs.csv", index=False)
+    print(f"{len(df)} runs, {len(dups)} byte-identical to an earlier run of the same model "
+          f"({'kept' if args.keep_identical else 'dropped'}); {len(used)} used")
+    overall = paired[(paired.level == "overall")]
+    for r in overall.itertuples():
+        print(f"  {r.metric:<8} {r.a:>3} vs {r.b:<3} diff={r.diff:+.3f} "
+              f"[{r.diff_ci_lo:+.3f}, {r.diff_ci_hi:+.3f}] p={r.p_value:.3g} ({r.test})")
+    print(f"Wrote eval_stats_ci.csv, eval_stats_paired.csv, eval_identical_runs.csv "
+          f"in {time.perf_counter() - t0:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
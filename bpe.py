@@ -0,0 +1,441 @@
+# bpe.py
+"""Offline byte-pair-encoding token counters loaded from local vocab files.
+
+Two file formats are read:
+
+  *.tiktoken        OpenAI rank files ("<base64 token> <rank>" per line); the
+                    pre-tokenizer regex is picked from the file name
+                    (cl100k_base, o200k_base, r50k_base / p50k_base / gpt2)
+  tokenizer.json    Hugging Face BPE tokenizers (Llama 3, Qwen, DeepSeek,
+                    gpt-oss, Gemma ...): ByteLevel, Split, Digits and
+                    Metaspace pre-tokenizers, byte fallback
+
+If `tiktoken` / `tokenizers` are installed they do the encoding (exact and
+fast); otherwise a pure-Python BPE does, with \\p{...} classes in the split
+regexes expanded to explicit code-point ranges for the stdlib `re`. Counts
+cover the text only: no chat-template or special tokens.
+"""
+import base64
+import heapq
+import json
+import re
+import sys
+import unicodedata
+from functools import lru_cache
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Sequence, Tuple, Union
+
+try:  # optional, exact and much faster
+    import tiktoken
+except ImportError:
+    tiktoken = None
+try:
+    import tokenizers as hf_tokenizers
+except ImportError:
+    hf_tokenizers = None
+
+# Pre-tokenizer regexes of the tiktoken encodings
+GPT2_PATTERN = r"""'(?:[sdmt]|ll|ve|re)| ?\p{L}+| ?\p{N}+| ?[^\s\p{L}\p{N}]+|\s+(?!\S)|\s+"""
+CL100K_PATTERN = r"""'(?i:[sdmt]|ll|ve|re)|[^\r\n\p{L}\p{N}]?+\p{L}+|\p{N}{1,3}| ?[^\s\p{L}\p{N}]++[\r\n]*|\s*[\r\n]|\s+(?!\S)|\s+"""
+O200K_PATTERN = "|".join([
+    r"""[^\r\n\p{L}\p{N}]?[\p{Lu}\p{Lt}\p{Lm}\p{Lo}\p{M}]*[\p{Ll}\p{Lm}\p{Lo}\p{M}]+(?i:'s|'t|'re|'ve|'m|'ll|'d)?""",
+    r"""[^\r\n\p{L}\p{N}]?[\p{Lu}\p{Lt}\p{Lm}\p{Lo}\p{M}]+[\p{Ll}\p{Lm}\p{Lo}\p{M}]*(?i:'s|'t|'re|'ve|'m|'ll|'d)?""",
+    r"""\p{N}{1,3}""",
+    r""" ?[^\s\p{L}\p{N}]+[\r\n/]*""",
+    r"""\s*[\r\n]+""",
+    r"""\s+(?!\S)""",
+    r"""\s+""",
+])
+TIKTOKEN_PATTERNS = {
+    "o200k": O200K_PATTERN,
+    "cl100k": CL100K_PATTERN,
+    "p50k": GPT2_PATTERN,
+    "r50k": GPT2_PATTERN,
+    "gpt2": GPT2_PATTERN,
+}
+
+Symbol = Union[bytes, str]
+
+
+class TokenizerError(ValueError):
+    pass
+
+
+# =========================================
+# \p{...} support for the stdlib re module
+# =========================================
+@lru_cache(maxsize=1)
+def _category_ranges() -> Dict[str, str]:
+    """Unicode general category ("Lu", "L", ...) -> character-class body of its code-point ranges."""
+    spans: Dict[str, List[Tuple[int, int]]] = {}
+    prev_cat, start = None, 0
+    for cp in range(sys.maxunicode + 2):
+        cat = unicodedata.category(chr(cp)) if cp <= sys.maxunicode else None
+        if cat != prev_cat:
+            if prev_cat is not None:
+                spans.setdefault(prev_cat, []).append((start, cp - 1))
+            prev_cat, start = cat, cp
+    majors: Dict[str, List[Tuple[int, int]]] = {}
+    for cat, ranges in spans.items():
+        majors.setdefault(cat[0], []).extend(ranges)
+
+    def body(ranges: List[Tuple[int, int]]) -> str:
+        return "".join(re.escape(chr(a)) if a == b else f"{re.escape(chr(a))}-{re.escape(chr(b))}"
+                       for a, b in sorted(ranges))
+
+    out = {cat: body(r) for cat, r in spans.items()}
+    out.update({major: body(r) for major, r in majors.items()})
+    return out
+
+
+_PROP = re.compile(r"\\([pP])\{(\w+)\}")
+
+
+def to_stdlib_regex(pattern: str) -> str:
+    """Expand \\p{X} / \\P{X} (Unicode categories) into explicit ranges the `re` module accepts."""
+    if not _PROP.search(pattern):
+        return pattern
+    ranges = _category_ranges()
+    out, in_class, i = [], False, 0
+    while i < len(pattern):
+        ch = pattern[i]
+        if ch == "\\":
+            m = _PROP.match(pattern, i)
+            if m:
+                kind, cat = m.groups()
+                if cat not in ranges:
+                    raise TokenizerError(f"Unsupported Unicode property \\{kind}{{{cat}}}")
+                if in_class and kind == "P":
+                    raise TokenizerError("\\P{...} inside a character class is not supported without `regex`")
+                if in_class:
+                    out.append(ranges[cat])
+                else:
+                    out.append(f"[{'^' if kind == 'P' else ''}{ranges[cat]}]")
+                i = m.end()
+                continue
+            out.append(pattern[i:i + 2])
+            i += 2
+            continue
+        if ch == "[" and not in_class:
+            in_class = True
+            out.append(ch)
+            i += 1
+            if pattern[i:i + 1] == "^":
+                out.append("^")
+                i += 1
+            if pattern[i:i + 1] == "]":  # literal ] first in a class
+                out.append("\\]")
+                i += 1
+            continue
+        if ch == "]" and in_class:
+            in_class = False
+        out.append(ch)
+        i += 1
+    return "".join(out)
+
+
+@lru_cache(maxsize=None)
+def compile_split(pattern: str) -> "re.Pattern[str]":
+    return re.compile(to_stdlib_regex(pattern))
+
+
+# =========================================
+# Core BPE
+# =========================================
+def bpe_merge(symbols: List[Symbol], rank: Callable[[Symbol, Symbol], Optional[int]]) -> List[Symbol]:
+    """Repeatedly merge the adjacent pair with the lowest rank (leftmost on ties; None = not mergeable)."""
+    if len(symbols) <= 32:
+        while len(symbols) > 1:
+            best, best_rank = -1, None
+            for i in range(len(symbols) - 1):
+                r = rank(symbols[i], symbols[i + 1])
+                if r is not None and (best_rank is None or r < best_rank):
+                    best, best_rank = i, r
+            if best < 0:
+                break
+            symbols[best:best + 2] = [symbols[best] + symbols[best + 1]]
+        return symbols
+    # Long pieces (e.g. unsplit SentencePiece text): heap of candidate pairs over a linked list
+    n = len(symbols)
+    nxt = list(range(1, n + 1))
+    prv = list(range(-1, n - 1))
+    heap = []
+
+    def push(i: int) -> None:
+        j = nxt[i]
+        if i >= 0 and j < n:
+            r = rank(symbols[i], symbols[j])
+            if r is not None:
+                heapq.heappush(heap, (r, i, symbols[i], symbols[j]))
+
+    for i in range(n - 1):
+        push(i)
+    while heap:
+        _, i, a, b = heapq.heappop(heap)
+        j = nxt[i]
+        if symbols[i] is None or j >= n or symbols[i] != a or symbols[j] != b:
+            continue  # stale: one side was merged away since this pair was pushed
+        symbols[i] = a + b
+        symbols[j] = None
+        nxt[i] = nxt[j]
+        if nxt[j] < n:
+            prv[nxt[j]] = i
+        push(prv[i])
+        push(i)
+    return [s for s in symbols if s is not None]
+
+
+@lru_cache(maxsize=1)
+def byte_to_unicode() -> Dict[int, str]:
+    """GPT-2 ByteLevel alphabet: printable bytes map to themselves, the rest to U+0100...."""
+    keep = list(range(ord("!"), ord("~") + 1)) + list(range(ord("¡"), ord("¬") + 1)) + list(range(ord("®"), ord("ÿ") + 1))
+    mapping, extra = {}, 0
+    for b in range(256):
+        if b in keep:
+            mapping[b] = chr(b)
+        else:
+            mapping[b] = chr(256 + extra)
+            extra += 1
+    return mapping
+
+
+class Tokenizer:
+    """A named token counter; `encode` returns token ids (text only, no special tokens)."""
+
+    def __init__(self, name: str, path: Path):
+        self.name = name
+        self.path = path
+
+    def encode(self, text: str) -> List[int]:
+        raise NotImplementedError
+
+    def count(self, text: str) -> int:
+        return len(self.encode(text))
+
+
+class TiktokenFile(Tokenizer):
+    """OpenAI rank file: token bytes -> rank; merge order is the rank of the merged bytes."""
+
+    def __init__(self, path: Path, pattern: Optional[str] = None):
+        super().__init__(path.stem, path)
+        family = next((k for k in TIKTOKEN_PATTERNS if k in path.stem.lower()), "cl100k")
+        self.pattern = pattern or TIKTOKEN_PATTERNS[family]
+        self.ranks: Dict[bytes, int] = {}
+        for line in path.read_text(encoding="utf-8").splitlines():
+            if line.strip():
+                token, rank = line.split()
+                self.ranks[base64.b64decode(token)] = int(rank)
+        self._native = None
+        if tiktoken is not None:
+            self._native = tiktoken.Encoding(self.name, pat_str=self.pattern, mergeable_ranks=self.ranks,
+                                             special_tokens={})
+        else:
+            self._split = compile_split(self.pattern)
+
+    def _rank(self, a: bytes, b: bytes) -> Optional[int]:
+        return self.ranks.get(a + b)
+
+    @lru_cache(maxsize=65536)
+    def _piece(self, piece: bytes) -> Tuple[int, ...]:
+        if piece in self.ranks:
+            return (self.ranks[piece],)
+        parts = bpe_merge([bytes([b]) for b in piece], self._rank)
+        return tuple(self.ranks[p] for p in parts)
+
+    def encode(self, text: str) -> List[int]:
+        if self._native is not None:
+            return self._native.encode_ordinary(text)
+        ids: List[int] = []
+        for m in self._split.finditer(text):
+            ids.extend(self._piece(m.group().encode("utf-8")))
+        return ids
+
+
+class HFTokenizerFile(Tokenizer):
+    """Hugging Face tokenizer.json with a BPE model."""
+
+    def __init__(self, path: Path):
+        name = path.parent.name if path.name == "tokenizer.json" else path.stem
+        super().__init__(name, path)
+        self._native = None
+        if hf_tokenizers is not None:
+            self._native = hf_tokenizers.Tokenizer.from_file(str(path))
+            return
+        spec = json.loads(path.read_text(encoding="utf-8"))
+        model = spec.get("model") or {}
+        if model.get("type") != "BPE":
+            raise TokenizerError(f"{path}: only BPE tokenizers are supported (got {model.get('type')!r})")
+        self.vocab: Dict[str, int] = model["vocab"]
+        merges = [tuple(m.split(" ", 1)) if isinstance(m, str) else tuple(m) for m in model.get("merges", [])]
+        self.merge_ranks: Dict[Tuple[str, str], int] = {pair: i for i, pair in enumerate(merges)}
+        self.byte_fallback = bool(model.get("byte_fallback"))
+        self.unk = model.get("unk_token")
+        self.byte_level = False
+        self.normalize = self._normalizer(spec.get("normalizer"))
+        self.steps = self._pre_tokenizer(spec.get("pre_tokenizer"))
+        self.added = {t["content"]: t["id"] for t in spec.get("added_tokens", []) if not t.get("special")}
+
+    # ---- spec parsing ----
+    def _normalizer(self, spec: Optional[dict]) -> Callable[[str], str]:
+        if not spec:
+            return lambda s: s
+        kind = spec["type"]
+        if kind == "Sequence":
+            funcs = [self._normalizer(s) for s in spec["normalizers"]]
+
+            def run(s: str) -> str:
+                for f in funcs:
+                    s = f(s)
+                return s
+            return run
+        if kind == "Replace":
+            pat = spec["pattern"]
+            if "String" in pat:
+                return lambda s, a=pat["String"], b=spec["content"]: s.replace(a, b)
+            rx = compile_split(pat["Regex"])
+            return lambda s: rx.sub(spec["content"], s)
+        if kind == "Prepend":
+            return lambda s: spec["prepend"] + s if s else s
+        if kind in ("NFC", "NFD", "NFKC", "NFKD"):
+            return lambda s: unicodedata.normalize(kind, s)
+        raise TokenizerError(f"{self.path}: unsupported normalizer {kind!r}")
+
+    def _pre_tokenizer(self, spec: Optional[dict]) -> List[Callable[[str], List[str]]]:
+        if not spec:
+            return []
+        kind = spec["type"]
+        if kind == "Sequence":
+            return [step for s in spec["pretokenizers"] for step in self._pre_tokenizer(s)]
+        if kind == "ByteLevel":
+            self.byte_level = True
+            if spec.get("add_prefix_space"):
+                prefix = [lambda s: [s if s.startswith(" ") else " " + s]]
+            else:
+                prefix = []
+            if spec.get("use_regex", True):
+                return prefix + [self._splitter(GPT2_PATTERN, "Isolated")]
+            return prefix
+        if kind == "Split":
+            if spec.get("invert"):
+                raise TokenizerError(f"{self.path}: inverted Split pre-tokenizers are not supported")
+            pat = spec["pattern"]
+            pattern = pat["Regex"] if "Regex" in pat else re.escape(pat["String"])
+            return [self._splitter(pattern, spec.get("behavior", "Isolated"))]
+        if kind == "Digits":
+            return [self._splitter(r"\d" if spec.get("individual_digits") else r"\d+", "Isolated")]
+        if kind == "Metaspace":
+            repl = spec.get("replacement", "▁")
+            prepend = spec.get("prepend_scheme", "always" if spec.get("add_prefix_space", True) else "never")
+
+            def metaspace(s: str) -> List[str]:
+                s = s.replace(" ", repl)
+                if prepend != "never" and not s.startswith(repl):
+                    s = repl + s
+                if spec.get("split", True):
+                    return [p for p in re.split(f"(?={re.escape(repl)})", s) if p]
+                return [s]
+            return [metaspace]
+        raise TokenizerError(f"{self.path}: unsupported pre_tokenizer {kind!r}")
+
+    @staticmethod
+    def _splitter(pattern: str, behavior: str) -> Callable[[str], List[str]]:
+        rx = compile_split(pattern)
+
+        def split(s: str) -> List[str]:
+            out: List[str] = []
+            pos, last_hit = 0, False
+            for m in rx.finditer(s):
+                gap, hit = s[pos:m.start()], m.group()
+                if not hit:
+                    continue
+                if gap:
+                    out.append(gap)
+                    last_hit = False
+                if behavior == "MergedWithNext":
+                    pos = m.start()  # the match starts the next piece
+                    continue
+                pos = m.end()
+                if behavior == "Removed":
+                    continue
+                if out and ((behavior == "MergedWithPrevious" and not last_hit) or (behavior == "Contiguous" and last_hit)):
+                    out[-1] += hit
+                else:
+                    out.append(hit)
+                last_hit = True
+            if pos < len(s):
+                out.append(s[pos:])
+            return out
+
+        if behavior not in ("Isolated", "Removed", "MergedWithPrevious", "MergedWithNext", "Contiguous"):
+            raise TokenizerError(f"unsupported Split behavior {behavior!r}")
+        return split
+
+    # ---- encoding ----
+    def _rank(self, a: str, b: str) -> Optional[int]:
+        return self.merge_ranks.get((a, b))
+
+    @lru_cache(maxsize=65536)
+    def _piece(self, piece: str) -> Tuple[int, ...]:
+        if self.byte_level:
+            mapping = byte_to_unicode()
+            piece = "".join(mapping[b] for b in piece.encode("utf-8"))
+        if piece in self.vocab:
+            return (self.vocab[piece],)
+        ids: List[int] = []
+        for sym in bpe_merge(list(piece), self._rank):
+            if sym in self.vocab:
+                ids.append(self.vocab[sym])
+            elif self.byte_fallback:
+                ids.extend(self.vocab.get(f"<0x{b:02X}>", 0) for b in sym.encode("utf-8"))
+            elif self.unk is not None:
+                ids.append(self.vocab.get(self.unk, 0))
+            else:
+                raise TokenizerError(f"{self.name}: no token for {sym!r}")
+        return tuple(ids)
+
+    def _pieces(self, text: str) -> List[str]:
+        pieces = [self.normalize(text)]
+        for step in self.steps:
+            pieces = [p for piece in pieces for p in step(piece)]
+        return pieces
+
+    def encode(self, text: str) -> List[int]:
+        if self._native is not None:
+            return self._native.encode(text, add_special_tokens=False).ids
+        ids: List[int] = []
+        chunks = [text]
+        if self.added:  # added (non-special) tokens are matched before normalisation
+            rx = re.compile("(" + "|".join(re.escape(t) for t in sorted(self.added, key=len, reverse=True)) + ")")
+            chunks = rx.split(text)
+        for k, chunk in enumerate(chunks):
+            if k % 2 and self.added:
+                ids.append(self.added[chunk])
+            elif chunk:
+                for piece in self._pieces(chunk):
+                    ids.extend(self._piece(piece))
+        return ids
+
+
+# =========================================
+# Discovery
+# =========================================
+def load_tokenizer(path: Path) -> Tokenizer:
+    path = Path(path)
+    if path.is_dir():
+        path = path / "tokenizer.json"
+    if path.suffix == ".tiktoken":
+        return TiktokenFile(path)
+    if path.suffix == ".json":
+        return HFTokenizerFile(path)
+    raise TokenizerError(f"{path}: expected a *.tiktoken or tokenizer.json file")
+
+
+def find_tokenizers(paths: Sequence[Path]) -> List[Tokenizer]:
+    """Tokenizers for the given files / directories (searched recursively for *.tiktoken and tokenizer.json)."""
+    found: List[Path] = []
+    for p in map(Path, paths):
+        if p.is_dir() and not (p / "tokenizer.json").exists():
+            found += sorted(p.rglob("*.tiktoken")) + sorted(p.rglob("tokenizer.json"))
+        else:
+            found.append(p)
+    return [load_tokenizer(p) for p in found]
@@ -0,0 +1,368 @@
+# canonical.py
+"""Schema-driven canonical form of benchmark objects, with a digest for comparison.
+
+A Canonicalizer is compiled once per Pydantic model. It walks an object
+(already validated against that model) and returns a new tree:
+
+- object keys in schema field order (unknown keys, if any, sorted after them);
+- every list of objects sorted by its items' identity field: the first
+  required int / str field named `id`, `*_id`, `code`, `sku`, `key` or
+  `number`, else the first required int / str field (stable sort);
+- float fields as floats (`2` -> `2.0`, `-0.0` -> `0.0`), so the encoding of a
+  number depends on its value, not on how the model spelled it (14.5 and
+  14.50 give the same bytes). Lists of primitives keep their order.
+
+`canonicalize` also encodes that tree as compact JSON and hashes it
+(BLAKE2b-128). A gold object is hashed once; a candidate matches it when the
+digests are equal, and only a mismatch needs the structural diff. The input
+is never modified.
+
+`DirectDigest` skips the dict tree: it validates raw JSON text straight into
+models (Pydantic `validate_json`), sorts their lists in place by the same
+identity fields and hashes the models' own JSON dump (set fields only). Its
+digests are only comparable with each other, so gold is digested the same
+way, from `Canonical.data`. Equal direct digests imply equal canonical
+forms; the converse can fail (`-0.0`, an unknown key the dict path would
+keep), so a direct mismatch just means "compare on the dict path".
+
+Usage (timing and peak memory of both paths on synthetic payloads):
+    python canonical.py [--rows 10000 100000] [--repeat 3]
+"""
+import argparse
+import gc
+import hashlib
+import json
+import operator
+import time
+import tracemalloc
+import types
+from functools import lru_cache
+from typing import Annotated, Any, Callable, Dict, List, NamedTuple, Optional, Tuple, Type, Union, get_args, get_origin
+
+from pydantic import BaseModel, ConfigDict, Field, TypeAdapter, create_model
+
+IDENTITY_FIELDS = ("id", "code", "sku", "key", "number")
+DIGEST_SIZE = 16
+
+Converter = Optional[Callable[[Any], Any]]  # None: the value is already canonical
+
+
+class Canonical(NamedTuple):
+    value: Any   # canonical tree (compare / diff)
+    data: bytes  # compact canonical JSON of `value`
+    digest: str  # hex BLAKE2b of `data`
+
+
+def _unwrap(ann: Any) -> Any:
+    """`X` for Optional[X]; other annotations unchanged."""
+    if get_origin(ann) in (Union, types.UnionType):
+        args = [a for a in get_args(ann) if a is not type(None)]
+        if len(args) == 1:
+            return args[0]
+    return ann
+
+
+def _is_model(ann: Any) -> bool:
+    return isinstance(ann, type) and issubclass(ann, BaseModel)
+
+
+def identity_field(model: Type[BaseModel]) -> Optional[str]:
+    """The field a list of `model` items is sorted by (None: keep the order)."""
+    keys = [name for name, info in model.model_fields.items()
+            if info.is_required() and _unwrap(info.annotation) in (int, str)]
+    named = [k for k in keys if k in IDENTITY_FIELDS or k.endswith("_id")]
+    return (named or keys or [None])[0]
+
+
+def _float(value: Any) -> Any:
+    return float(value) + 0.0 if type(value) in (int, float) else value
+
+
+def _compile(ann: Any, active: Tuple[type, ...]) -> Converter:
+    inner = _unwrap(ann)
+    if inner is float:
+        return _float
+    if _is_model(inner):
+        return _compile_model(inner, active)
+    if get_origin(inner) in (list, List) and get_args(inner):
+        item = _unwrap(get_args(inner)[0])
+        convert = _compile(item, active)
+        key = identity_field(item) if _is_model(item) and item not in active else None
+        if convert is None and key is None:
+            return None
+        return _list_converter(convert, key)
+    return None
+
+
+def _list_converter(convert: Converter, key: Optional[str]) -> Callable[[Any], Any]:
+    by_key = operator.itemgetter(key) if key else None
+
+    def canon(items: Any) -> Any:
+        if not isinstance(items, list):
+            return items
+        out = [convert(x) for x in items] if convert else list(items)
+        if by_key is not None:
+            try:
+                out.sort(key=by_key)
+            except (KeyError, TypeError):  # not validated: leave the order alone
+                pass
+        return out
+    return canon
+
+
+def _compile_model(model: Type[BaseModel], active: Tuple[type, ...]) -> Callable[[Any], Any]:
+    if model in active:  # recursive model: use its cached Canonicalizer, looked up at call time
+        return lambda obj: for_model(model).value(obj)
+    active += (model,)
+    fields: List[Tuple[str, Converter]] = [(name, _compile(info.annotation, active))
+                                           for name, info in model.model_fields.items()]
+
+    def canon(obj: Any) -> Any:
+        if not isinstance(obj, dict):
+            return obj
+        out = {}
+        for name, convert in fields:
+            if name in obj:
+                value = obj[name]
+                out[name] = value if convert is None or value is None else convert(value)
+        if len(out) != len(obj):
+            out.update((k, obj[k]) for k in sorted(set(obj) - set(out), key=str))
+        return out
+    return canon
+
+
+class Canonicalizer:
+    """Canonical form and digest of objects of one Pydantic model."""
+
+    def __init__(self, model: Type[BaseModel]):
+        self.model = model
+        self.value = _compile_model(model, ())
+
+    def canonicalize(self, obj: Any) -> Canonical:
+        value = self.value(obj)
+        data = json.dumps(value, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        return Canonical(value, data, hashlib.blake2b(data, digest_size=DIGEST_SIZE).hexdigest())
+
+
+@lru_cache(maxsize=None)
+def for_model(model: Type[BaseModel]) -> Canonicalizer:
+    """The (cached) Canonicalizer of `model`."""
+    return Canonicalizer(model)
+
+
+def _compile_sort(ann: Any, active: Tuple[type, ...]) -> Optional[Callable[[Any], None]]:
+    """In-place counterpart of _compile for validated model instances (None: nothing to sort)."""
+    inner = _unwrap(ann)
+    if _is_model(inner):
+        return _compile_model_sort(inner, active)
+    if get_origin(inner) in (list, List) and get_args(inner):
+        item = _unwrap(get_args(inner)[0])
+        each = _compile_sort(item, active)
+        key = identity_field(item) if _is_model(item) and item not in active else None
+        if each is None and key is None:
+            return None
+        by_key = operator.attrgetter(key) if key else None
+
+        def sort(items: List[Any]) -> None:
+            if each is not None:
+                for x in items:
+                    if x is not None:
+                        each(x)
+            if by_key is not None:
+                items.sort(key=by_key)
+        return sort
+    return None
+
+
+def _compile_model_sort(model: Type[BaseModel], active: Tuple[type, ...]) -> Optional[Callable[[Any], None]]:
+    if model in active:  # recursive model: use its cached sorter, looked up at call time
+        return lambda obj: _sort_model(model, obj)
+    active += (model,)
+    fields = [(name, sort) for name, info in model.model_fields.items()
+              if (sort := _compile_sort(info.annotation, active)) is not None]
+    if not fields:
+        return None
+
+    def sort(obj: BaseModel) -> None:
+        for name, sort_field in fields:
+            value = getattr(obj, name)
+            if value is not None:
+                sort_field(value)
+    return sort
+
+
+@lru_cache(maxsize=None)
+def _model_sorter(model: Type[BaseModel]) -> Optional[Callable[[Any], None]]:
+    return _compile_model_sort(model, ())
+
+
+def _sort_model(model: Type[BaseModel], obj: Any) -> None:
+    sort = _model_sorter(model)
+    if sort is not None:
+        sort(obj)
+
+
+def _forbids_extra(model: Type[BaseModel], seen: Tuple[type, ...] = ()) -> bool:
+    """True if `model` and every model under it reject unknown keys."""
+    if model in seen:
+        return True
+    seen += (model,)
+    if model.model_config.get("extra") != "forbid":
+        return False
+    return all(_forbids_extra(m, seen) for m in _models_in(tuple(i.annotation for i in model.model_fields.values())))
+
+
+def _models_in(anns: Tuple[Any, ...]) -> List[type]:
+    out = []
+    for ann in anns:
+        if _is_model(ann):
+            out.append(ann)
+        else:
+            out += _models_in(get_args(ann))
+    return out
+
+
+class DirectDigest:
+    """Validate JSON text straight into `model` and digest it, without a dict tree.
+
+    A root that ignores unknown keys is rebuilt with extra='forbid' (a dropped
+    key could otherwise hide a difference); nested models must forbid them
+    already (TypeError). With `wrapper`, `{wrapper: <model>}` is accepted too.
+    """
+
+    def __init__(self, model: Type[BaseModel], wrapper: Optional[str] = None):
+        root = model
+        if model.model_config.get("extra") != "forbid":
+            root = create_model(f"{model.__name__}Direct",
+                                __config__=ConfigDict(extra="forbid", strict=model.model_config.get("strict")),
+                                **{name: (info.annotation, info) for name, info in model.model_fields.items()})
+        if not _forbids_extra(root):
+            raise TypeError(f"{model.__name__}: nested models must set extra='forbid' for direct validation")
+        self.root = root
+        self.wrapper = wrapper
+        self.sort = _model_sorter(model)
+        self.dump = TypeAdapter(root).dump_json
+        if wrapper is None:
+            self.adapter = TypeAdapter(root)
+        else:
+            wrapped = create_model(f"{model.__name__}Wrapped", __config__=ConfigDict(extra="forbid", strict=True),
+                                   **{wrapper: (root, ...)})
+            self.adapter = TypeAdapter(Annotated[Union[root, wrapped], Field(union_mode="left_to_right")])
+        self._gold: Dict[str, str] = {}
+
+    def validate(self, data: Union[str, bytes]) -> BaseModel:
+        """The root model instance (unwrapped); raises pydantic.ValidationError."""
+        obj = self.adapter.validate_json(data)
+        return obj if isinstance(obj, self.root) else getattr(obj, self.wrapper)
+
+    def validate_digest(self, data: Union[str, bytes]) -> Tuple[BaseModel, str]:
+        """Validate, sort lists in place, dump the set fields and hash, in one pass over the models.
+        `obj.model_dump(exclude_unset=True)` of the returned model canonicalises like the dict path."""
+        obj = self.validate(data)
+        if self.sort is not None:
+            self.sort(obj)
+        return obj, hashlib.blake2b(self.dump(obj, exclude_unset=True), digest_size=DIGEST_SIZE).hexdigest()
+
+    def gold_digest(self, gold: Canonical) -> str:
+        """Direct digest of a canonicalised gold (computed once per gold)."""
+        digest = self._gold.get(gold.digest)
+        if digest is None:
+            digest = self._gold[gold.digest] = self.validate_digest(gold.data)[1]
+        return digest
+
+
+@lru_cache(maxsize=None)
+def direct_for_model(model: Type[BaseModel], wrapper: Optional[str] = None) -> DirectDigest:
+    """The (cached) DirectDigest of `model`."""
+    return DirectDigest(model, wrapper)
+
+
+# =========================================
+# Benchmark: dict path vs direct path
+# =========================================
+class BenchRow(NamedTuple):
+    case: str
+    rows: int
+    fmt: str
+    outcome: str      # "match" (the direct path decides) or "diff" (it falls back to the dict path)
+    dict_s: float
+    direct_s: float
+    dict_mb: float    # peak traced allocation while scoring
+    direct_mb: float
+
+
+def _mutated(value: Any) -> Any:
+    """`value` with one string changed (the first one in the last list item), copied along that path.
+    Appending a character keeps it valid, so the output fails on the comparison, not on validation."""
+    if isinstance(value, dict):
+        for k in value:
+            changed = _mutated(value[k])
+            if changed is not value[k]:
+                return {**value, k: changed}
+    elif isinstance(value, list) and value:
+        changed = _mutated(value[-1])
+        if changed is not value[-1]:
+            return value[:-1] + [changed]
+    elif isinstance(value, str):
+        return value + "x"
+    return value
+
+
+def _measure(fn: Callable[[], Any], repeat: int) -> Tuple[float, float]:
+    """(best wall time over `repeat` runs, peak traced MB of one more run)."""
+    best = float("inf")
+    for _ in range(repeat):
+        gc.collect()  # start each run without the previous run's garbage
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    gc.collect()
+    tracemalloc.start()
+    try:
+        fn()
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return best, peak / 1e6
+
+
+def bench(case: str, rows: int, repeat: int = 3) -> List[BenchRow]:
+    import synthetic
+    import toon
+    from eval import CASES, score_output
+
+    c = CASES[case]
+    payload = json.loads("".join(synthetic.iter_json(synthetic.synthetic_payload(case, rows))))
+    gold = for_model(c.schema_model).canonicalize(payload)
+    out = []
+    for outcome, value in (("match", payload), ("diff", _mutated(payload))):
+        for fmt, text in (("json", json.dumps(value, ensure_ascii=False)), ("toon", f"```toon\n{toon.encode(value)}\n```")):
+            timed = {}
+            for direct in (False, True):
+                scored = score_output(fmt, text, None, c.validate, gold, c.key, direct=direct)  # also warms the caches
+                assert scored.ok == (outcome == "match"), (case, rows, fmt, outcome, scored.error)
+                timed[direct] = _measure(lambda: score_output(fmt, text, None, c.validate, gold, c.key, direct=direct),
+                                         repeat)
+            out.append(BenchRow(case, rows, fmt, outcome, timed[False][0], timed[True][0], timed[False][1], timed[True][1]))
+    return out
+
+
+def main(argv=None) -> None:
+    ap = argparse.ArgumentParser(description="Time and peak memory of dict-path vs direct scoring on synthetic payloads")
+    ap.add_argument("--rows", type=int, nargs="+", default=[10000, 100000])
+    ap.add_argument("--cases", nargs="+", default=["users", "order", "company", "invoice"])
+    ap.add_argument("--repeat", type=int, default=3, help="timed runs per path (best is kept)")
+    args = ap.parse_args(argv)
+
+    print(f"  {'case':<9} {'rows':>7} {'fmt':<5} {'outcome':<7} {'dict s':>8} {'direct s':>9} {'saved':>6} "
+          f"{'dict MB':>8} {'direct MB':>10} {'saved':>6}")
+    for case in args.cases:
+        for rows in args.rows:
+            for r in bench(case, rows, args.repeat):
+                print(f"  {r.case:<9} {r.rows:>7} {r.fmt:<5} {r.outcome:<7} {r.dict_s:>8.3f} {r.direct_s:>9.3f} "
+                      f"{1 - r.direct_s / r.dict_s:>6.0%} {r.dict_mb:>8.1f} {r.direct_mb:>10.1f} "
+                      f"{1 - r.direct_mb / r.dict_mb:>6.0%}")
+
+
+if __name__ == "__main__":
+    main()
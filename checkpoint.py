@@ -0,0 +1,101 @@
+# checkpoint.py
+"""Durable per-unit checkpoints for resumable sweeps.
+
+A unit is one (model, run, case, track) evaluation. Each finished unit is
+appended as a JSON line and fsync'ed, so a crash or API outage loses only
+the units that were in flight. On restart the file is replayed and finished
+units are served from it instead of being re-evaluated.
+"""
+import csv
+import json
+import os
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+UnitKey = Tuple[str, int, str, str]  # (model, run, case, track)
+
+class UnitCheckpoint:
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.done: Dict[UnitKey, Dict[str, Any]] = {}
+        if self.path.exists():
+            with self.path.open("r", encoding="utf-8") as f:
+                for line in f:
+                    line = line.strip()
+                    if not line:
+                        continue
+                    try:
+                        rec = json.loads(line)
+                    except json.JSONDecodeError:
+                        continue  # torn last line from a crash mid-write
+                    key = (rec.pop("model"), int(rec.pop("run")), rec.pop("case"), rec.pop("track"))
+                    self.done[key] = rec
+        self._f = None
+
+    def get(self, model: str, run: int, case: str, track: str) -> Optional[Dict[str, Any]]:
+        return self.done.get((model, run, case, track))
+
+    def _cut_torn_line(self) -> None:
+        """Drop a last line without its newline (a crash mid-write), so the next record
+        starts on a line of its own instead of being fused with the fragment."""
+        if not self.path.exists():
+            return
+        with self.path.open("r+b") as f:
+            end = f.seek(0, os.SEEK_END)
+            if not end:
+                return
+            f.seek(end - 1)
+            if f.read(1) == b"\n":
+                return
+            pos = end
+            while pos > 0:
+                step = min(pos, 1 << 16)
+                f.seek(pos - step)
+                nl = f.read(step).rfind(b"\n")
+                if nl >= 0:
+                    pos = pos - step + nl + 1
+                    break
+                pos -= step
+            f.truncate(pos)
+            f.flush()
+            os.fsync(f.fileno())
+
+    def record(self, model: str, run: int, case: str, track: str, result: Dict[str, Any]) -> None:
+        if self._f is None:
+            self._cut_torn_line()
+            self._f = self.path.open("a", encoding="utf-8")
+        rec = {"model": model, "run": run, "case": case, "track": track, **result}
+        self._f.write(json.dumps(rec, ensure_ascii=False) + "\n")
+        self._f.flush()
+        os.fsync(self._f.fileno())
+        self.done[(model, run, case, track)] = result
+
+    def close(self) -> None:
+        if self._f is not None:
+            self._f.close()
+            self._f = None
+
+
+def completed_runs(csv_path: Path) -> Set[Tuple[str, int]]:
+    """(model, run) pairs that already have a row in a sweep's per-run CSV."""
+    if not csv_path.exists():
+        return set()
+    with csv_path.open("r", newline="", encoding="utf-8") as f:
+        return {(row["model"], int(row["run"])) for row in csv.DictReader(f) if row.get("run")}
+
+
+def upgrade_csv_header(csv_path: Path, fieldnames: List[str]) -> None:
+    """Rewrite an existing CSV under a newer header; columns it lacks are left empty."""
+    if not csv_path.exists():
+        return
+    with csv_path.open("r", newline="", encoding="utf-8") as f:
+        reader = csv.DictReader(f)
+        if reader.fieldnames == fieldnames:
+            return
+        rows = list(reader)
+    tmp = csv_path.with_suffix(csv_path.suffix + ".tmp")
+    with tmp.open("w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=fieldnames, extrasaction="ignore")
+        writer.writeheader()
+        writer.writerows(rows)
+    os.replace(tmp, csv_path)
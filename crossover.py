@@ -0,0 +1,148 @@
+# crossover.py
+"""Row count at which TOON's total tokens drop below JSON's, from a size sweep.
+
+Reads the long-format eval_sweep.csv written by `EVAL_SWEEP_ROWS=... python
+eval.py` (one row per model, run, case, row count and track) and, per model
+and case (plus all models pooled as `*`):
+
+- fits total tokens (prompt + completion, repairs included) per unit as a
+  line in the row count, `fixed + per_row * rows`, for J, JSO and T;
+- solves where T's line crosses J's and JSO's: `T_vs_J_rows` is that row
+  count and `T_vs_J_cheaper_above` the track that is cheaper beyond it (row
+  count 0: that track is cheaper at every size; empty: fewer than two sizes
+  were swept);
+- reports the observed crossover as well: the smallest swept size from which
+  T's mean tokens stay below the other track's at every larger size.
+
+Writes eval_sweep_crossover.csv and eval_sweep_by_size.csv (mean tokens,
+one-shot / final accuracy and generation seconds per size and track).
+
+Usage:
+    python crossover.py [eval_sweep.csv] [--out-dir .]
+"""
+import argparse
+from pathlib import Path
+from typing import List, NamedTuple, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+TRACKS = {"J": "json_plain", "JSO": "json", "T": "toon", "TLR": "toon_local", "TSO": "toon_so", "TTP": "toon_tailored"}
+ALL_MODELS = "*"
+
+
+class Line(NamedTuple):
+    fixed: float    # tokens at zero rows (prompt scaffolding, format rules)
+    per_row: float  # tokens per extra row
+    sizes: int      # distinct row counts behind the fit
+
+
+def fit_line(rows: np.ndarray, tokens: np.ndarray) -> Line:
+    sizes = len(np.unique(rows))
+    if sizes < 2:
+        return Line(float(tokens.mean()), float("nan"), sizes)
+    per_row, fixed = np.polyfit(rows.astype(float), tokens.astype(float), 1)
+    return Line(float(fixed), float(per_row), sizes)
+
+
+def crossing(t: Line, other: Line) -> Tuple[float, str]:
+    """(row count where T's and `other`'s lines meet, track cheaper above it); NaN when not fitted."""
+    if np.isnan(t.per_row) or np.isnan(other.per_row):
+        return float("nan"), ""
+    saving = other.per_row - t.per_row  # T's saving per row
+    overhead = t.fixed - other.fixed    # T's extra tokens at zero rows
+    if np.isclose(t.per_row, other.per_row, rtol=1e-9, atol=1e-9):  # parallel lines never cross
+        return 0.0, "T" if overhead < 0 else "other"
+    rows = overhead / saving
+    winner = "T" if saving > 0 else "other"
+    return (rows, winner) if rows > 0 else (0.0, winner)
+
+
+def observed_crossing(sizes: np.ndarray, t_mean: np.ndarray, other_mean: np.ndarray) -> Optional[int]:
+    """Smallest swept size from which T's mean stays below the other track's at every larger size."""
+    below = t_mean < other_mean
+    if not below[-1]:
+        return None
+    start = len(below)
+    while start > 0 and below[start - 1]:
+        start -= 1
+    return int(sizes[start])
+
+
+def by_size(df: pd.DataFrame) -> pd.DataFrame:
+    """Per (model, case, rows): mean tokens, one-shot / final accuracy and gen seconds per track."""
+    g = df.groupby(["model", "case", "rows", "track"])
+    means = g.agg(tokens=("total_tokens", "mean"), one_shot=("one_shot", "mean"),
+                  final=("final", "mean"), gen_s=("gen_s", "mean"), n=("run", "size")).reset_index()
+    out = None
+    for label, track in TRACKS.items():
+        part = means[means.track == track].drop(columns="track").rename(columns={
+            "tokens": f"{label}_tokens", "one_shot": f"{label}_1S", "final": f"{label}_F",
+            "gen_s": f"{label}_gen_s", "n": f"{label}_n"})
+        out = part if out is None else out.merge(part, on=["model", "case", "rows"], how="outer")
+    return out.sort_values(["model", "case", "rows"]).reset_index(drop=True)
+
+
+def crossover_table(df: pd.DataFrame, sizes_table: pd.DataFrame) -> pd.DataFrame:
+    pooled = df.assign(model=ALL_MODELS)
+    pooled_sizes = by_size(pooled)
+    rows: List[dict] = []
+    for source, sizes_src in ((df, sizes_table), (pooled, pooled_sizes)):
+        for (model, case), grp in source.groupby(["model", "case"], sort=True):
+            lines = {}
+            row = {"model": model, "case": case, "sizes": grp["rows"].nunique()}
+            for label, track in TRACKS.items():
+                t = grp[grp.track == track]
+                if len(t):
+                    lines[label] = fit_line(t["rows"].to_numpy(), t["total_tokens"].to_numpy())
+                    row[f"{label}_fixed"] = round(lines[label].fixed, 1)
+                    row[f"{label}_per_row"] = round(lines[label].per_row, 3)
+            sized = sizes_src[(sizes_src.model == model) & (sizes_src.case == case)]
+            for other in ("J", "JSO"):
+                if "T" not in lines or other not in lines:
+                    continue
+                at, winner = crossing(lines["T"], lines[other])
+                row[f"T_vs_{other}_rows"] = "" if np.isnan(at) else round(at, 1)
+                row[f"T_vs_{other}_cheaper_above"] = {"T": "T", "other": other}.get(winner, "")
+                seen = observed_crossing(sized["rows"].to_numpy(), sized["T_tokens"].to_numpy(),
+                                         sized[f"{other}_tokens"].to_numpy())
+                row[f"T_vs_{other}_observed_rows"] = "" if seen is None else seen
+            rows.append(row)
+    return pd.DataFrame(rows)
+
+
+def _crossing_text(row: pd.Series, other: str) -> str:
+    at, winner = row.get(f"T_vs_{other}_rows", ""), row.get(f"T_vs_{other}_cheaper_above", "")
+    if at == "" or pd.isna(at):
+        return "n/a"
+    return f"{winner} always" if at == 0 else f"{winner} >{at:.0f} rows"
+
+
+def print_table(table: pd.DataFrame) -> None:
+    print(f"  {'model':<40} {'case':<8} {'T/row':>7} {'J/row':>7} {'JSO/row':>7}   {'T vs J':>16} {'T vs JSO':>16}")
+    for _, r in table.iterrows():
+        print(f"  {r.model[:40]:<40} {r.case:<8} {r.get('T_per_row', float('nan')):>7.1f} "
+              f"{r.get('J_per_row', float('nan')):>7.1f} {r.get('JSO_per_row', float('nan')):>7.1f}   "
+              f"{_crossing_text(r, 'J'):>16} {_crossing_text(r, 'JSO'):>16}")
+
+
+def main(argv=None) -> None:
+    ap = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    ap.add_argument("csv", nargs="?", default="eval_sweep.csv")
+    ap.add_argument("--out-dir", default=".")
+    args = ap.parse_args(argv)
+
+    df = pd.read_csv(args.csv)
+    if df.empty:
+        raise SystemExit(f"No sweep rows in {args.csv}; run EVAL_SWEEP_ROWS=10,100,1000 python eval.py")
+    sizes_table = by_size(df)
+    table = crossover_table(df, sizes_table)
+    out = Path(args.out_dir)
+    sizes_table.to_csv(out / "eval_sweep_by_size.csv", index=False)
+    table.to_csv(out / "eval_sweep_crossover.csv", index=False)
+    print_table(table)
+    print(f"Wrote {out / 'eval_sweep_crossover.csv'}, {out / 'eval_sweep_by_size.csv'}")
+
+
+if __name__ == "__main__":
+    main()
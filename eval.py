@@ -1,21 +1,39 @@
 # eval_simple.py
+import asyncio
+import contextvars
 import json
 import os
 import re
 import csv
 import subprocess
 import time
+from functools import cached_property, lru_cache
 from pathlib import Path
-from typing import Any, Dict, List, Tuple, Type
+from typing import Any, Awaitable, Callable, Dict, List, NamedTuple, Optional, Tuple, Type
 
-from pydantic import BaseModel, TypeAdapter
-from openai import OpenAI
+from pydantic import BaseModel, ConfigDict, TypeAdapter, create_model
+from openai import AsyncOpenAI
 from openai import APIError, InternalServerError, RateLimitError
-
-# --- Import Pydantic models from your generate.py ---
-from generate import (
+from openai.types.chat import ChatCompletion
+
+import canonical
+import crossover
+import json_diff
+import synthetic
+import toon
+import toon_grammar
+from ratelimit import RateLimitScheduler, backoff_delay
+from response_cache import CacheMiss, ResponseCache, cache_key
+from checkpoint import UnitCheckpoint, completed_runs, upgrade_csv_header
+from ledger import LEDGER_NAME, Ledger
+from results_store import ResultsStore
+from stream_check import JsonStreamChecker, ToonStreamChecker
+
+# --- Import Pydantic models (side-effect free; gold files come from `python generate.py`) ---
+from schemas import (
     UserRow, Order,
     Company, Invoice,
+    UsersPayload,
 )
 
 # =========================================
@@ -44,204 +62,417 @@ MODELS = [
 'google/gemma-2-2b-it',
 'google/gemma-2-9b-it-fast'
 ]
-RUNS_PER_MODEL = 10
-CSV_PATH = Path("eval_runs.csv")
+if os.environ.get("EVAL_MODELS"):
+    MODELS = [m.strip() for m in os.environ["EVAL_MODELS"].split(",") if m.strip()]
+RUNS_PER_MODEL = int(os.environ.get("EVAL_RUNS", "10"))
+# EVAL_REPAIR_DIFF=1 tells repair prompts which values differ from gold (JSON Pointer,
+# expected vs got; see json_diff.py). Its outputs get a "_diff" suffix so a run with and
+# one without can be compared: python aggregate.py --compare results results_diff
+REPAIR_DIFF = os.environ.get("EVAL_REPAIR_DIFF", "0") == "1"
+REPAIR_DIFF_LIMIT = int(os.environ.get("EVAL_REPAIR_DIFF_LIMIT", "20"))  # mismatch lines per prompt
+# EVAL_LOCAL_REPAIR=1 adds the T+local-repair track (see FORMATS); outputs get a "_local" suffix
+LOCAL_REPAIR = os.environ.get("EVAL_LOCAL_REPAIR", "0") == "1"
+# EVAL_TOON_GRAMMAR=1 adds the grammar-constrained TOON track (see FORMATS); outputs get a "_grammar" suffix
+TOON_GRAMMAR = os.environ.get("EVAL_TOON_GRAMMAR", "0") == "1"
+# EVAL_TOON_TAILORED=1 adds the schema-tailored TOON prompt track (see FORMATS); outputs get a "_tailored" suffix
+TOON_TAILORED = os.environ.get("EVAL_TOON_TAILORED", "0") == "1"
+# Prompt layout: "prefix" puts the static part of each user message (TOON rules + example,
+# the case's JSON Schema) first and sends it with repairs too, so provider prefix caches
+# can reuse it; "legacy" is the original order (JSON Schema after the task, bare
+# TOON repairs) and matches responses cached before the change. Legacy runs get a "_legacy"
+# suffix so a prefix-vs-legacy comparison never resumes from the other layout's units.
+PROMPT_LAYOUT = os.environ.get("EVAL_PROMPT_LAYOUT", "prefix")
+if PROMPT_LAYOUT not in ("prefix", "legacy"):
+    raise ValueError(f"EVAL_PROMPT_LAYOUT must be 'prefix' or 'legacy', got {PROMPT_LAYOUT!r}")
+_OUT = ("_diff" if REPAIR_DIFF else "") + ("_local" if LOCAL_REPAIR else "") + ("_grammar" if TOON_GRAMMAR else "") \
+    + ("_tailored" if TOON_TAILORED else "") + ("_legacy" if PROMPT_LAYOUT == "legacy" else "")
+# One fsync'ed JSON line per finished (model, run, case, track) unit; lets a sweep resume
+CHECKPOINT_PATH = Path(os.environ.get("EVAL_CHECKPOINT_PATH", f"eval_units{_OUT}.jsonl"))
+# Long-format store, one record per attempt (aggregate.py builds the summary tables from it)
+RESULTS_DIR = Path(os.environ.get("EVAL_RESULTS_DIR", f"results{_OUT}"))
+# Wide per-run CSV of this sweep. The tracked eval_runs.csv at the repo root holds the
+# published results and is never written, so a fresh checkout starts a new sweep.
+CSV_PATH = Path(os.environ.get("EVAL_RUNS_PATH", RESULTS_DIR / "eval_runs.csv"))
 
 # =========================================
 # LLM client
 # =========================================
+# Point LLM_BASE_URL at mock_server.py (e.g. http://127.0.0.1:8765/v1) to benchmark the harness offline.
+DEFAULT_BASE_URL = "https://api.studio.nebius.com/v1/"
+LLM_BASE_URL = os.environ.get("LLM_BASE_URL", DEFAULT_BASE_URL)
 LLM_API_KEY = os.environ.get("LLM_API_KEY")
-if not LLM_API_KEY:
-    raise RuntimeError("Missing LLM_API_KEY environment variable")
-
-client = OpenAI(
-    base_url="https://api.studio.nebius.com/v1/",
-    api_key=LLM_API_KEY,
+if not LLM_API_KEY and LLM_BASE_URL != DEFAULT_BASE_URL:
+    LLM_API_KEY = "local"
+
+# Importing this module (prompts, cases, validators) needs no key; running the sweep does (see __main__).
+client = AsyncOpenAI(
+    base_url=LLM_BASE_URL,
+    api_key=LLM_API_KEY or "unset",
+    max_retries=0,  # retries go through the scheduler (see retry_on_error)
 )
 
+# Request field that carries the TOON-SO grammar: a name ending in "regex" (vLLM's
+# guided_regex) gets toon_grammar's regex translation, anything else the GBNF text
+# (guided_grammar for vLLM's xgrammar backend, grammar for llama.cpp servers).
+TOON_GRAMMAR_PARAM = os.environ.get("EVAL_TOON_GRAMMAR_PARAM", "guided_grammar")
+MAX_TOKENS = 5000  # per call; larger cases (the size sweep) raise it through Case.max_tokens
+
 SYSTEM_PROMPT = (
     "You are a data-formatting model. "
     "Follow instructions exactly. When asked for JSON, you must return JSON that conforms to the provided JSON Schema. "
     "No extra text. When asked for TOON, return only a ```toon fenced block."
 )
 
+# =========================================
+# Scheduler: in-flight caps + per-model request/token buckets
+# =========================================
+# Independent (model, run, case, track) units run concurrently; each API call
+# holds one per-model and one global slot while in flight. RPM/TPM buckets are
+# optional up front and are otherwise learned from x-ratelimit-* headers.
+MAX_IN_FLIGHT = int(os.environ.get("EVAL_MAX_IN_FLIGHT", "32"))
+MAX_IN_FLIGHT_PER_MODEL = int(os.environ.get("EVAL_MAX_IN_FLIGHT_PER_MODEL", "4"))
+MODEL_IN_FLIGHT: Dict[str, int] = {}  # per-model overrides, e.g. {"google/gemma-2-2b-it": 8}
+RPM_PER_MODEL = float(os.environ.get("EVAL_RPM", "0")) or None
+TPM_PER_MODEL = float(os.environ.get("EVAL_TPM", "0")) or None
+STATS_EVERY_S = float(os.environ.get("EVAL_STATS_EVERY", "30"))
+
+scheduler = RateLimitScheduler(
+    max_in_flight=MAX_IN_FLIGHT,
+    max_in_flight_per_model=MAX_IN_FLIGHT_PER_MODEL,
+    per_model_in_flight=MODEL_IN_FLIGHT,
+    requests_per_minute=RPM_PER_MODEL,
+    tokens_per_minute=TPM_PER_MODEL,
+)
+
+def estimate_prompt_tokens(messages: List[Dict[str, str]]) -> float:
+    return sum(len(m["content"]) for m in messages) / 4.0
+
+def usage_counts(resp) -> Tuple[int, int]:
+    usage = getattr(resp, "usage", None)
+    p = getattr(usage, "prompt_tokens", 0) if usage else 0
+    c = getattr(usage, "completion_tokens", 0) if usage else 0
+    return p or 0, c or 0
+
+def cached_tokens(usage) -> int:
+    """Prompt tokens served from the provider's prefix cache (usage.prompt_tokens_details.cached_tokens)."""
+    details = getattr(usage, "prompt_tokens_details", None)
+    return getattr(details, "cached_tokens", 0) or 0
+
 # =========================================
 # Retry wrapper for API calls
 # =========================================
-def retry_on_error(func, max_retries=5, initial_delay=2.0):
-    """Retry a function with exponential backoff on API errors."""
+async def retry_on_error(model: str, func: Callable[[], Awaitable[Tuple[Any, Any]]], prompt_tokens_est: float,
+                         max_retries=5, initial_delay=2.0) -> Tuple[Any, float]:
+    """Run `func` (returns (parsed response, headers)) through the scheduler with jittered retries.
+
+    Returns (response, queue_wait_s), the wait summed over every admission.
+    A 429 pauses only this model (honouring Retry-After); the event loop keeps
+    serving other models meanwhile.
+    """
+    queue_wait = 0.0
     for attempt in range(max_retries):
         try:
-            return func()
-        except (InternalServerError, APIError, RateLimitError) as e:
+            async with scheduler.slot(model, prompt_tokens_est) as ticket:
+                queue_wait += ticket.queue_wait_s
+                resp, headers = await func()
+                ticket.settle(*usage_counts(resp))
+            scheduler.observe_headers(model, headers)
+            return resp, queue_wait
+        except RateLimitError as e:
+            if attempt == max_retries - 1:
+                print(f"Failed after {max_retries} attempts: {e}")
+                raise
+            delay = scheduler.on_rate_limited(model, e.response.headers, attempt, initial_delay)
+            print(f"Rate limited on {model} (attempt {attempt + 1}/{max_retries}); pausing model {delay:.1f}s")
+        except (InternalServerError, APIError) as e:
             if attempt == max_retries - 1:
                 print(f"Failed after {max_retries} attempts: {e}")
                 raise
-            
-            delay = initial_delay * (2 ** attempt)
+            delay = backoff_delay(attempt, initial_delay)
             print(f"API error (attempt {attempt + 1}/{max_retries}): {e}")
             print(f"Retrying in {delay:.1f} seconds...")
-            time.sleep(delay)
+            await asyncio.sleep(delay)
         except Exception as e:
             # Don't retry on other exceptions (validation errors, etc.)
             raise
 
+# =========================================
+# Response cache (deterministic temperature-0 calls)
+# =========================================
+# EVAL_CACHE: off | read (read-through) | write (write-through) | replay (no API calls)
+# Keys include the run index so each of the RUNS_PER_MODEL runs replays its own responses.
+response_cache = ResponseCache(
+    Path(os.environ.get("EVAL_CACHE_PATH", ".cache/responses.sqlite")),
+    mode=os.environ.get("EVAL_CACHE", "read"),
+    max_bytes=int(float(os.environ.get("EVAL_CACHE_MAX_MB", "512")) * 1024 * 1024),
+)
+CURRENT_RUN: contextvars.ContextVar[int] = contextvars.ContextVar("current_run", default=0)
+
+# =========================================
+# Streaming with early abort
+# =========================================
+# EVAL_STREAM=1 streams every call and cancels it at the first irrecoverable
+# error found by stream_check (e.g. [N] overflow, unknown key, prose outside
+# the JSON); the repair cycle then starts right away with that error.
+# Aborted calls report the provider's usage when sent, else one token per chunk.
+STREAM = os.environ.get("EVAL_STREAM", "0") == "1"
+
+async def consume_stream(stream, checker, model: str, messages: List[Dict[str, str]],
+                         started: float) -> Tuple[ChatCompletion, Optional[str], Optional[float]]:
+    """Read a completion stream, feeding `checker`; close the stream on its first error.
+
+    Returns (response, abort_reason, seconds from `started` to the first content chunk).
+    """
+    text = ""
+    ttft = None
+    chunks = 0
+    usage = None
+    finish = "stop"
+    aborted = None
+    async for chunk in stream:
+        if getattr(chunk, "usage", None):
+            usage = chunk.usage
+        if not chunk.choices:
+            continue
+        choice = chunk.choices[0]
+        if choice.finish_reason:
+            finish = choice.finish_reason
+        delta = choice.delta.content if choice.delta else None
+        if not delta:
+            continue
+        if ttft is None:
+            ttft = time.monotonic() - started
+        text += delta
+        chunks += 1
+        aborted = checker.feed(text)
+        if aborted:
+            await stream.close()
+            break
+    p = usage.prompt_tokens if usage else int(estimate_prompt_tokens(messages))
+    c = usage.completion_tokens if usage else chunks
+    resp = ChatCompletion.model_validate({
+        "id": "stream", "object": "chat.completion", "created": 0, "model": model,
+        "choices": [{"index": 0, "finish_reason": finish, "message": {"role": "assistant", "content": text}}],
+        "usage": {"prompt_tokens": p, "completion_tokens": c, "total_tokens": p + c,
+                  "prompt_tokens_details": {"cached_tokens": cached_tokens(usage)}},
+    })
+    return resp, aborted, ttft
+
+class CallLatency(NamedTuple):
+    queue_wait_s: float      # waiting for scheduler admission (in-flight caps, buckets, 429 pauses)
+    ttft_s: Optional[float]  # time to first token; streamed calls only
+    gen_s: float             # admission -> complete response
+
+async def chat_completion(model: str, messages: List[Dict[str, str]],
+                          stream_check: Optional[Callable[[], Any]] = None,
+                          **params) -> Tuple[ChatCompletion, Optional[str], CallLatency]:
+    """One chat completion through the cache and scheduler.
+
+    Returns (response, abort_reason, latency); abort_reason is set only when
+    streaming stopped early on an error reported by `stream_check()`. Cache
+    hits report the latency recorded with the original call.
+    """
+    streaming = STREAM and stream_check is not None
+    key = None
+    if response_cache.mode != "off" and params.get("temperature") == 0.0:
+        key_params = {**params, "stream": True} if streaming else params
+        key = cache_key(model, messages, key_params, namespace=f"run={CURRENT_RUN.get()}")
+        if response_cache.reads:
+            body = response_cache.get(key)
+            if body is not None:
+                data = json.loads(body)
+                aborted = data.pop("_stream_abort", None)
+                latency = CallLatency(**data.pop("_latency", {"queue_wait_s": 0.0, "ttft_s": None, "gen_s": 0.0}))
+                return ChatCompletion.model_validate(data), aborted, latency
+            if response_cache.mode == "replay":
+                raise CacheMiss(f"No cached response for {model} (key {key[:12]})")
+
+    aborted = ttft = None
+    gen = 0.0
+    async def _call():
+        nonlocal aborted, ttft, gen
+        started = time.monotonic()
+        if not streaming:
+            raw = await client.chat.completions.with_raw_response.create(model=model, messages=messages, **params)
+            resp = raw.parse()
+        else:
+            raw = await client.chat.completions.with_raw_response.create(
+                model=model, messages=messages, stream=True, stream_options={"include_usage": True}, **params,
+            )
+            resp, aborted, ttft = await consume_stream(raw.parse(), stream_check(), model, messages, started)
+        gen = time.monotonic() - started
+        return resp, raw.headers
+    resp, queue_wait = await retry_on_error(model, _call, estimate_prompt_tokens(messages))
+    latency = CallLatency(queue_wait, ttft, gen)
+    if aborted:
+        print(f"Aborted stream for {model}: {aborted}")
+    if key is not None and response_cache.writes:
+        data = resp.model_dump()
+        data["_latency"] = latency._asdict()
+        if aborted:
+            data["_stream_abort"] = aborted
+        response_cache.put(key, model, json.dumps(data))
+    return resp, aborted, latency
+
+@lru_cache(maxsize=None)
+def schema_text(schema_model: Type[BaseModel]) -> str:
+    """Pretty JSON Schema appended to JSON prompts (built once per model class)."""
+    return json.dumps(schema_model.model_json_schema(), indent=2)
+
+def json_task_prompt(prompt: str, schema_model: Type[BaseModel]) -> str:
+    """User message of the JSON tracks: the case (or repair) prompt and its JSON Schema, schema first
+    under the prefix layout."""
+    if PROMPT_LAYOUT == "legacy":
+        return f"{prompt}\n\nReturn valid JSON matching this schema:\n{schema_text(schema_model)}"
+    return f"Return valid JSON matching this schema:\n{schema_text(schema_model)}\n\nTASK:\n{prompt}"
+
+class LLMOutput(NamedTuple):
+    text: str
+    prompt_tokens: int
+    completion_tokens: int
+    aborted: Optional[str]  # early-abort reason when streaming, else None
+    latency: CallLatency
+    cached_tokens: int      # prompt tokens the provider served from its prefix cache
+
 # =========================================
 # Structured JSON call (json_schema)
 # =========================================
-def llm_call_json_structured(model: str, prompt: str, schema_model: Type[BaseModel]) -> Tuple[str, int, int]:
-    """Return (json_text, prompt_tokens, completion_tokens) with JSON object output."""
+async def llm_call_json_structured(model: str, prompt: str, schema_model: Type[BaseModel], canon_case: str,
+                                   max_tokens: int = MAX_TOKENS) -> LLMOutput:
+    """Return (json_text, prompt_tokens, completion_tokens, aborted, latency) with JSON object output."""
     print(f"Calling {model} json_structured")
     # Add schema to prompt for guidance
-    schema_prompt = f"{prompt}\n\nReturn valid JSON matching this schema:\n{json.dumps(schema_model.model_json_schema(), indent=2)}"
+    schema_prompt = json_task_prompt(prompt, schema_model)
     
-    def _call():
-        resp = client.chat.completions.create(
-            model=model,
-            max_tokens=5000,
-            temperature=0.0,
-            top_p=1.0,
-            extra_body={"top_k": 50},
-            response_format={
-                "type": "json_object",
-            },
-            messages=[
-                {"role": "system", "content": SYSTEM_PROMPT},
-                {"role": "user", "content": schema_prompt},
-            ],
-        )
-        
-        msg = resp.choices[0].message
-        
-        # Handle refusal
-        if msg.refusal:
-            raise ValueError(f"Model refused: {msg.refusal}")
-        
-        text = (msg.content or "").strip()
-        usage = getattr(resp, "usage", None)
-        p = getattr(usage, "prompt_tokens", 0) if usage else 0
-        c = getattr(usage, "completion_tokens", 0) if usage else 0
-        
-        return text, p, c
+    resp, aborted, latency = await chat_completion(
+        model,
+        [
+            {"role": "system", "content": SYSTEM_PROMPT},
+            {"role": "user", "content": schema_prompt},
+        ],
+        stream_check=lambda: JsonStreamChecker(schema_model, canon_case, allow_fence=False),
+        max_tokens=max_tokens,
+        temperature=0.0,
+        top_p=1.0,
+        extra_body={"top_k": 50},
+        response_format={
+            "type": "json_object",
+        },
+    )
+    
+    msg = resp.choices[0].message
+    
+    # Handle refusal
+    if msg.refusal:
+        raise ValueError(f"Model refused: {msg.refusal}")
+    
+    text = (msg.content or "").strip()
+    p, c = usage_counts(resp)
     
-    return retry_on_error(_call)
+    return LLMOutput(text, p, c, aborted, latency, cached_tokens(resp.usage))
 
 # =========================================
 # Plain JSON call (no response_format)
 # =========================================
-def llm_call_json_plain(model: str, prompt: str, schema_model: Type[BaseModel]) -> Tuple[str, int, int]:
-    """Return (json_text, prompt_tokens, completion_tokens) with plain text completion."""
+async def llm_call_json_plain(model: str, prompt: str, schema_model: Type[BaseModel], canon_case: str,
+                              max_tokens: int = MAX_TOKENS) -> LLMOutput:
+    """Return (json_text, prompt_tokens, completion_tokens, aborted, latency) with plain text completion."""
     print(f"Calling {model} json_plain")
     # Add schema to prompt for guidance
-    schema_prompt = f"{prompt}\n\nReturn valid JSON matching this schema:\n{json.dumps(schema_model.model_json_schema(), indent=2)}"
+    schema_prompt = json_task_prompt(prompt, schema_model)
     
-    def _call():
-        resp = client.chat.completions.create(
-            model=model,
-            max_tokens=5000,
-            temperature=0.0,
-            top_p=1.0,
-            extra_body={"top_k": 50},
-            messages=[
-                {"role": "system", "content": SYSTEM_PROMPT},
-                {"role": "user", "content": schema_prompt},
-            ],
-        )
-        
-        text = resp.choices[0].message.content or ""
-        # Remove think tags
-        text = re.sub(r"<think>.*?</think>", "", text, flags=re.DOTALL).strip()
-        # Remove markdown code fences if present
-        text = re.sub(r"```(?:json)?\s*(.*?)```", r"\1", text, flags=re.DOTALL).strip()
-        
-        usage = getattr(resp, "usage", None)
-        p = getattr(usage, "prompt_tokens", 0) if usage else 0
-        c = getattr(usage, "completion_tokens", 0) if usage else 0
-        
-        return text, p, c
+    resp, aborted, latency = await chat_completion(
+        model,
+        [
+            {"role": "system", "content": SYSTEM_PROMPT},
+            {"role": "user", "content": schema_prompt},
+        ],
+        stream_check=lambda: JsonStreamChecker(schema_model, canon_case),
+        max_tokens=max_tokens,
+        temperature=0.0,
+        top_p=1.0,
+        extra_body={"top_k": 50},
+    )
+    
+    text = resp.choices[0].message.content or ""
+    # Remove think tags
+    text = re.sub(r"<think>.*?</think>", "", text, flags=re.DOTALL).strip()
+    # Remove markdown code fences if present
+    text = re.sub(r"```(?:json)?\s*(.*?)```", r"\1", text, flags=re.DOTALL).strip()
     
-    return retry_on_error(_call)
+    p, c = usage_counts(resp)
+    
+    return LLMOutput(text, p, c, aborted, latency, cached_tokens(resp.usage))
 
 # =========================================
 # Plain call (for TOON generation)
 # =========================================
-def llm_call_plain(model: str, prompt: str) -> Tuple[str, int, int]:
-    print(f"Calling {model} plain")
-    
-    def _call():
-        resp = client.chat.completions.create(
-            model=model,
-            max_tokens=5000,
-            temperature=0.0,
-            top_p=1.0,
-            extra_body={"top_k": 50},
-            messages=[
-                {"role": "system", "content": SYSTEM_PROMPT},
-                {"role": "user", "content": prompt},
-            ],
-        )
-        text = resp.choices[0].message.content or ""
-        text = re.sub(r"<think>.*?</think>", "", text, flags=re.DOTALL).strip()
-        usage = getattr(resp, "usage", None)
-        p = getattr(usage, "prompt_tokens", 0) if usage else 0
-        c = getattr(usage, "completion_tokens", 0) if usage else 0
-        return text, p, c
+async def llm_call_plain(model: str, prompt: str, schema_model: Type[BaseModel], canon_case: str,
+                         max_tokens: int = MAX_TOKENS, guide: Optional[Dict[str, str]] = None) -> LLMOutput:
+    """`guide` adds request fields (a TOON-SO grammar) to the call."""
+    print(f"Calling {model} {'toon_grammar' if guide else 'plain'}")
     
-    return retry_on_error(_call)
+    resp, aborted, latency = await chat_completion(
+        model,
+        [
+            {"role": "system", "content": SYSTEM_PROMPT},
+            {"role": "user", "content": prompt},
+        ],
+        stream_check=lambda: ToonStreamChecker(schema_model, canon_case),
+        max_tokens=max_tokens,
+        temperature=0.0,
+        top_p=1.0,
+        extra_body={"top_k": 50, **(guide or {})},
+    )
+    text = resp.choices[0].message.content or ""
+    text = re.sub(r"<think>.*?</think>", "", text, flags=re.DOTALL).strip()
+    p, c = usage_counts(resp)
+    return LLMOutput(text, p, c, aborted, latency, cached_tokens(resp.usage))
+
+# =========================================
+# Grammar-constrained call (TOON-SO)
+# =========================================
+@lru_cache(maxsize=None)
+def toon_guide(schema_model: Type[BaseModel]) -> Dict[str, str]:
+    """The TOON grammar of `schema_model` as a request field (see TOON_GRAMMAR_PARAM)."""
+    grammar = toon_grammar.compile_model(schema_model)
+    if TOON_GRAMMAR_PARAM.endswith("regex"):
+        return {TOON_GRAMMAR_PARAM: toon_grammar.to_regex(grammar)}
+    return {TOON_GRAMMAR_PARAM: grammar}
+
+async def llm_call_toon_grammar(model: str, prompt: str, schema_model: Type[BaseModel], canon_case: str,
+                                max_tokens: int = MAX_TOKENS) -> LLMOutput:
+    return await llm_call_plain(model, prompt, schema_model, canon_case, max_tokens, guide=toon_guide(schema_model))
 
 # =========================================
 # Paths
 # =========================================
 GOLD = Path("gold")
-USERS_JSON   = GOLD / "users.gold.json"
-ORDER_JSON   = GOLD / "order.gold.json"
-COMPANY_JSON = GOLD / "company.gold.json"
-INVOICE_JSON = GOLD / "invoice.gold.json"
 
 # =========================================
 # Canonicalization (stable compare)
 # =========================================
-def sort_users_by_id(obj: Dict[str, Any]) -> Dict[str, Any]:
-    if "users" in obj and isinstance(obj["users"], list):
-        obj["users"] = sorted(obj["users"], key=lambda r: r.get("id"))
-    return obj
-
-def sort_order_items(obj: Dict[str, Any]) -> Dict[str, Any]:
-    if "items" in obj and isinstance(obj["items"], list):
-        obj["items"] = sorted(obj["items"], key=lambda r: r.get("sku"))
-    return obj
-
-def sort_company(obj: Dict[str, Any]) -> Dict[str, Any]:
-    if "departments" in obj and isinstance(obj["departments"], list):
-        obj["departments"] = sorted(obj["departments"], key=lambda d: d.get("code"))
-        for d in obj["departments"]:
-            if isinstance(d, dict) and "employees" in d and isinstance(d["employees"], list):
-                d["employees"] = sorted(d["employees"], key=lambda e: e.get("id"))
-    return obj
-
-def sort_invoice(obj: Dict[str, Any]) -> Dict[str, Any]:
-    if "items" in obj and isinstance(obj["items"], list):
-        obj["items"] = sorted(obj["items"], key=lambda r: r.get("sku"))
-    return obj
-
-def canonical_json(obj: Any, case: str) -> Any:
-    if case == "users":   return sort_users_by_id(obj)
-    if case == "order":   return sort_order_items(obj)
-    if case == "company": return sort_company(obj)
-    if case == "invoice": return sort_invoice(obj)
-    return obj
+# canonical.py compiles one canonicaliser per Pydantic model: key order, list sort keys
+# (each list of objects by its identity field: users by id, departments by code, ...) and
+# float normalisation all come from the schema. Gold is canonicalised and hashed once per
+# case; an output matches it when the digests are equal, and only a mismatch is diffed.
+def canonical_json(obj: Any, case: str) -> canonical.Canonical:
+    """Canonical form, bytes and digest of the (unwrapped) `obj` under CASES[case]'s model."""
+    return canonical.for_model(CASES[case].schema_model).canonicalize(obj)
 
 # =========================================
 # Pydantic validation (+ shape normalization)
 # =========================================
-class UsersPayload(BaseModel):
-    users: List[UserRow]
+# Adapters are built once at import and shared by every call
+USER_ROWS_ADAPTER = TypeAdapter(List[UserRow])
+ORDER_ADAPTER = TypeAdapter(Order)
+COMPANY_ADAPTER = TypeAdapter(Company)
+INVOICE_ADAPTER = TypeAdapter(Invoice)
 
 def validate_users_json(data: Any) -> List[UserRow]:
     if not isinstance(data, dict) or "users" not in data:
         raise ValueError("Expected object with key 'users'")
-    adapter = TypeAdapter(List[UserRow])
-    return adapter.validate_python(data["users"])
+    return USER_ROWS_ADAPTER.validate_python(data["users"])
 
 def normalize_by_key(data: Any, key: str) -> Any:
     if isinstance(data, dict) and key in data and isinstance(data[key], dict):
@@ -250,28 +481,27 @@ def normalize_by_key(data: Any, key: str) -> Any:
 
 def validate_order_json(data: Any) -> Order:
     data = normalize_by_key(data, "order")  # TOON may wrap
-    adapter = TypeAdapter(Order)
-    return adapter.validate_python(data)
+    return ORDER_ADAPTER.validate_python(data)
 
 def validate_company_json(data: Any) -> Company:
     data = normalize_by_key(data, "company")
-    adapter = TypeAdapter(Company)
-    return adapter.validate_python(data)
+    return COMPANY_ADAPTER.validate_python(data)
 
 def validate_invoice_json(data: Any) -> Invoice:
     data = normalize_by_key(data, "invoice")
-    adapter = TypeAdapter(Invoice)
-    return adapter.validate_python(data)
+    return INVOICE_ADAPTER.validate_python(data)
 
 # =========================================
-# TOON decode via official CLI
+# TOON decode (in-process; official CLI kept as an opt-in cross-check)
 # =========================================
+# "python" uses toon.decode; "cli" spawns `npx @toon-format/cli --decode` per call.
+TOON_DECODER = os.environ.get("TOON_DECODER", "python")
+
 def extract_toon_payload(toon_text: str) -> str:
     m = re.search(r"```toon\s*(.*?)```", toon_text, flags=re.DOTALL | re.IGNORECASE)
     return m.group(1).strip() if m else toon_text.strip()
 
-def decode_toon_to_json(toon_text: str) -> Any:
-    payload = extract_toon_payload(toon_text)
+def decode_toon_via_cli(payload: str) -> Any:
     proc = subprocess.run(
         ["npx", "@toon-format/cli", "--decode"],
         input=payload.encode("utf-8"),
@@ -280,6 +510,70 @@ def decode_toon_to_json(toon_text: str) -> Any:
     )
     return json.loads(proc.stdout.decode("utf-8"))
 
+def decode_toon_to_json(toon_text: str) -> Any:
+    payload = extract_toon_payload(toon_text)
+    if TOON_DECODER == "cli":
+        return decode_toon_via_cli(payload)
+    return toon.decode(payload)
+
+_FENCE_LINE_RE = re.compile(r"```\s*(?:toon)?\s*", re.IGNORECASE)
+
+def repair_toon_output(toon_text: str) -> Tuple[str, List[str]]:
+    """`toon_text` re-fenced after lossless local fixes, and the fixes that changed it.
+
+    `fence` handles an unclosed, untagged or repeated fence: the payload runs from
+    after the first run of fence lines to the next fence line. The rest is toon.repair.
+    """
+    fixes: List[str] = []
+    payload = extract_toon_payload(toon_text)
+    lines = toon_text.strip().split("\n")
+    fences = [i for i, ln in enumerate(lines) if _FENCE_LINE_RE.fullmatch(ln.strip())]
+    if fences:
+        start = fences[0]
+        while start < len(lines) and _FENCE_LINE_RE.fullmatch(lines[start].strip()):
+            start += 1
+        end = next((i for i in fences if i > start), len(lines))
+        unfenced = "\n".join(lines[start:end]).strip()
+        if unfenced != payload:
+            fixes.append("fence")
+            payload = unfenced
+    payload, more = toon.repair(payload)
+    fixes += more
+    return (f"```toon\n{payload}\n```", fixes) if fixes else (toon_text, fixes)
+
+# =========================================
+# Direct scoring (raw text -> models -> digest, no dict tree)
+# =========================================
+# An output is validated straight into the case model (Pydantic validate_json on the JSON
+# text, or on the JSON text toon.to_json writes while decoding). When its direct digest equals
+# gold's it passes without json.loads, validate_python or the canonical copy; a mismatch is
+# canonicalised from the models' dump for the diff. An output that fails to parse or validate
+# goes through the dict path, whose error text is the repair feedback. Both paths give the
+# same Scored. EVAL_DIRECT_SCORE=0 always uses the dict path.
+DIRECT_SCORE = os.environ.get("EVAL_DIRECT_SCORE", "1") != "0"
+
+def direct_score(fmt: str, out: str, gold: canonical.Canonical, canon_case: str) -> Optional["Scored"]:
+    """Scored from the direct path; None when `out` needs the dict path."""
+    schema_model = CASES[canon_case].schema_model
+    try:
+        # Unwrapped like normalize_by_key, unless the key is the model's own field (users)
+        direct = canonical.direct_for_model(schema_model, None if canon_case in schema_model.model_fields else canon_case)
+        if fmt in TOON_FORMATS:
+            if TOON_DECODER != "python":
+                return None
+            out = toon.to_json(extract_toon_payload(out))
+        obj, digest = direct.validate_digest(out)
+    except (ValueError, TypeError):  # pydantic.ValidationError and ToonDecodeError are ValueErrors
+        return None
+    if digest == direct.gold_digest(gold):
+        return Scored(gold.value, None, True)  # digest-equal, so its canonical form is gold's
+    dumped = obj.model_dump(exclude_unset=True)
+    del obj  # the models can go before the canonical copy is built
+    got = canonical.for_model(schema_model).canonicalize(dumped)
+    if got.digest == gold.digest:  # e.g. -0.0, which only the canonical form normalises
+        return Scored(got.value, None, True)
+    return Scored(got.value, values_differ(got.value, gold.value), False)
+
 # =========================================
 # Prompts — JSON (structured) / TOON
 # =========================================
@@ -334,50 +628,80 @@ def make_json_prompt_invoice() -> str:
 # =========================================
 # Improved TOON Prompts (short nested examples + same tasks)
 # =========================================
+# Rules and reference example, identical for every case: kept as one leading block so
+# providers' prefix caches can reuse it across cases, runs and repairs.
+TOON_RULES = (
+    "You are to produce output STRICTLY in TOON format.\n\n"
+    "TOON RULES:\n"
+    "- Use 2-space indentation\n"
+    "- Scalars: fieldName: value\n"
+    "- Objects: fieldName: then nested fields indented\n"
+    "- Arrays of objects:\n"
+    "    arrayName[N]:\n"
+    "      - field1: value1\n"
+    "        field2: value2\n"
+    "- Tabular arrays (for simple data):\n"
+    "    arrayName[N]{field1,field2}:\n"
+    "      val1,val2\n"
+    "      val3,val4\n"
+    "- [N] MUST equal actual row/item count\n"
+    "- Output ONLY a ```toon code block\n\n"
+    "Reference example:\n"
+    "```toon\n"
+    "id: 100\n"
+    "type: Sample\n"
+    "metadata:\n"
+    "  version: 1\n"
+    "  author: Alex\n"
+    "sections[2]:\n"
+    "  - code: A\n"
+    "    title: Introduction\n"
+    "    items[2]{id,value}:\n"
+    "      1,First\n"
+    "      2,Second\n"
+    "  - code: B\n"
+    "    title: Details\n"
+    "    items[1]{id,value}:\n"
+    "      3,Third\n"
+    "summary:\n"
+    "  total: 3\n"
+    "  status: complete\n"
+    "```\n\n"
+)
 
+def toon_task_prompt(task: str) -> str:
+    """User message of the TOON track: the shared rules + reference example, then the task."""
+    return f"{TOON_RULES}{task}"
+
+# Schema-tailored variant (EVAL_TOON_TAILORED): the layout of the case's own model with
+# <placeholders> instead of the generic example, and only the rules that layout needs.
+@lru_cache(maxsize=None)
+def toon_schema_rules(schema_model: Type[BaseModel]) -> str:
+    sk = toon_grammar.skeleton(schema_model)
+    rules = [
+        "[N] = actual row/item count" if sk.arrays else None,
+        "Tabular arrays: one line per row, values in header sequence" if sk.tabular else None,
+        "'- ' starts each list item; its other fields align under the first" if sk.list_items else None,
+        "Numbers as plain digits (14.5, not $14.50)" if sk.numbers else None,
+        "Quote text that contains a comma or colon or looks like a number" if sk.texts else None,
+        f"Optional: {', '.join(sk.optional)}" if sk.optional else None,
+    ]
+    # No case keywords ("order", "customer", ...) here: mock_server.detect_case reads the whole prompt
+    layout = "same keys, sequence and 2-space indentation" if sk.nested else "same keys and sequence"
+    return (
+        f"Output ONLY a ```toon code block in this TOON layout ({layout}; replace each <...>):\n"
+        f"```toon\n{sk.text}\n```\n"
+        + "".join(f"- {r}\n" for r in rules if r) + "\n"
+    )
 
-
-
+def toon_tailored_prompt(schema_model: Type[BaseModel], prompt: str) -> str:
+    """`prompt` (a TOON-track message or bare task) with the schema-tailored rules in place of TOON_RULES."""
+    task = prompt[len(TOON_RULES):] if prompt.startswith(TOON_RULES) else prompt
+    return f"{toon_schema_rules(schema_model)}{task}"
 
 
 def make_toon_prompt_users() -> str:
-    return (
-        "You are to produce output STRICTLY in TOON format.\n\n"
-        "TOON RULES:\n"
-        "- Use 2-space indentation\n"
-        "- Scalars: fieldName: value\n"
-        "- Objects: fieldName: then nested fields indented\n"
-        "- Arrays of objects:\n"
-        "    arrayName[N]:\n"
-        "      - field1: value1\n"
-        "        field2: value2\n"
-        "- Tabular arrays (for simple data):\n"
-        "    arrayName[N]{field1,field2}:\n"
-        "      val1,val2\n"
-        "      val3,val4\n"
-        "- [N] MUST equal actual row/item count\n"
-        "- Output ONLY a ```toon code block\n\n"
-        "Reference example:\n"
-        "```toon\n"
-        "id: 100\n"
-        "type: Sample\n"
-        "metadata:\n"
-        "  version: 1\n"
-        "  author: Alex\n"
-        "sections[2]:\n"
-        "  - code: A\n"
-        "    title: Introduction\n"
-        "    items[2]{id,value}:\n"
-        "      1,First\n"
-        "      2,Second\n"
-        "  - code: B\n"
-        "    title: Details\n"
-        "    items[1]{id,value}:\n"
-        "      3,Third\n"
-        "summary:\n"
-        "  total: 3\n"
-        "  status: complete\n"
-        "```\n\n"
+    return toon_task_prompt(
         "TASK:\n"
         "Create an array named users with fields id, name, and role.\n"
         "User data:\n"
@@ -387,47 +711,8 @@ def make_toon_prompt_users() -> str:
         "Output only the TOON code block.\n"
     )
 
-
-
-
 def make_toon_prompt_order() -> str:
-    return (
-        "You are to produce output STRICTLY in TOON format.\n\n"
-        "TOON RULES:\n"
-        "- Use 2-space indentation\n"
-        "- Scalars: fieldName: value\n"
-        "- Objects: fieldName: then nested fields indented\n"
-        "- Arrays of objects:\n"
-        "    arrayName[N]:\n"
-        "      - field1: value1\n"
-        "        field2: value2\n"
-        "- Tabular arrays (for simple data):\n"
-        "    arrayName[N]{field1,field2}:\n"
-        "      val1,val2\n"
-        "      val3,val4\n"
-        "- [N] MUST equal actual row/item count\n"
-        "- Output ONLY a ```toon code block\n\n"
-        "Reference example:\n"
-        "```toon\n"
-        "id: 100\n"
-        "type: Sample\n"
-        "metadata:\n"
-        "  version: 1\n"
-        "  author: Alex\n"
-        "sections[2]:\n"
-        "  - code: A\n"
-        "    title: Introduction\n"
-        "    items[2]{id,value}:\n"
-        "      1,First\n"
-        "      2,Second\n"
-        "  - code: B\n"
-        "    title: Details\n"
-        "    items[1]{id,value}:\n"
-        "      3,Third\n"
-        "summary:\n"
-        "  total: 3\n"
-        "  status: complete\n"
-        "```\n\n"
+    return toon_task_prompt(
         "TASK:\n"
         "Create an order record with fields: id, customer (with id and name), "
         "and items array (with sku, qty, price).\n"
@@ -438,45 +723,8 @@ def make_toon_prompt_order() -> str:
         "  * Product B2: quantity 1, price $14.50 each\n"
     )
 
-
 def make_toon_prompt_company() -> str:
-    return (
-        "You are to produce output STRICTLY in TOON format.\n\n"
-        "TOON RULES:\n"
-        "- Use 2-space indentation\n"
-        "- Scalars: fieldName: value\n"
-        "- Objects: fieldName: then nested fields indented\n"
-        "- Arrays of objects:\n"
-        "    arrayName[N]:\n"
-        "      - field1: value1\n"
-        "        field2: value2\n"
-        "- Tabular arrays (for simple data):\n"
-        "    arrayName[N]{field1,field2}:\n"
-        "      val1,val2\n"
-        "      val3,val4\n"
-        "- [N] MUST equal actual row/item count\n"
-        "- Output ONLY a ```toon code block\n\n"
-        "Reference example:\n"
-        "```toon\n"
-        "id: 100\n"
-        "type: Sample\n"
-        "metadata:\n"
-        "  version: 1\n"
-        "  author: Alex\n"
-        "sections[2]:\n"
-        "  - code: A\n"
-        "    title: Introduction\n"
-        "    items[2]{id,value}:\n"
-        "      1,First\n"
-        "      2,Second\n"
-        "  - code: B\n"
-        "    title: Details\n"
-        "    items[1]{id,value}:\n"
-        "      3,Third\n"
-        "summary:\n"
-        "  total: 3\n"
-        "  status: complete\n"
-        "```\n\n"
+    return toon_task_prompt(
         "TASK:\n"
         "Create a company organization structure with company info and nested departments array, each containing employees:\n"
         "- Company: Acme (ID: 1)\n"
@@ -487,45 +735,8 @@ def make_toon_prompt_company() -> str:
         "  * Eve (ID: 3) - analyst\n\n"
     )
 
-
 def make_toon_prompt_invoice() -> str:
-    return (
-        "You are to produce output STRICTLY in TOON format.\n\n"
-        "TOON RULES:\n"
-        "- Use 2-space indentation\n"
-        "- Scalars: fieldName: value\n"
-        "- Objects: fieldName: then nested fields indented\n"
-        "- Arrays of objects:\n"
-        "    arrayName[N]:\n"
-        "      - field1: value1\n"
-        "        field2: value2\n"
-        "- Tabular arrays (for simple data):\n"
-        "    arrayName[N]{field1,field2}:\n"
-        "      val1,val2\n"
-        "      val3,val4\n"
-        "- [N] MUST equal actual row/item count\n"
-        "- Output ONLY a ```toon code block\n\n"
-        "Reference example:\n"
-        "```toon\n"
-        "id: 100\n"
-        "type: Sample\n"
-        "metadata:\n"
-        "  version: 1\n"
-        "  author: Alex\n"
-        "sections[2]:\n"
-        "  - code: A\n"
-        "    title: Introduction\n"
-        "    items[2]{id,value}:\n"
-        "      1,First\n"
-        "      2,Second\n"
-        "  - code: B\n"
-        "    title: Details\n"
-        "    items[1]{id,value}:\n"
-        "      3,Third\n"
-        "summary:\n"
-        "  total: 3\n"
-        "  status: complete\n"
-        "```\n\n"
+    return toon_task_prompt(
         "TASK:\n"
         "Create an invoice with all invoice details including items array and totals breakdown:\n"
         "- Invoice number: INV-2025-001\n"
@@ -539,9 +750,20 @@ def make_toon_prompt_invoice() -> str:
         "- Grand total: $41.38\n"
         "- Notes: Thank you for your business.\n"
     )
+
 # =========================================
 # Repair prompts
 # =========================================
+VALUES_DIFFER = "Structure valid but values differ from expected gold."
+
+def values_differ(got: Any, gold: Any, pointer: str = "") -> str:
+    """Repair feedback for output that validates but does not match gold."""
+    if not REPAIR_DIFF:
+        return VALUES_DIFFER
+    mismatches = json_diff.diff(got, gold, REPAIR_DIFF_LIMIT + 1, pointer)
+    return (f"{VALUES_DIFFER}\nMismatches (JSON Pointer: expected vs got):\n"
+            f"{json_diff.format_diff(mismatches, REPAIR_DIFF_LIMIT)}")
+
 def make_json_repair_prompt(prev_output: str, error_msg: str) -> str:
     return (
         "Your previous JSON did not validate against the schema. "
@@ -551,8 +773,9 @@ def make_json_repair_prompt(prev_output: str, error_msg: str) -> str:
         f"{prev_output}\n"
     )
 
-def make_toon_repair_prompt(prev_output: str, error_msg: str) -> str:
-    return (
+def make_toon_repair_prompt(prev_output: str, error_msg: str, schema_model: Optional[Type[BaseModel]] = None) -> str:
+    """`schema_model` set: the tailored track's repair, behind that model's rules and layout."""
+    repair = (
         "Your previous TOON was invalid. Return ONLY a ```toon fenced block.\n"
         "- Use 2-space indentation; no trailing spaces.\n"
         "- Ensure headers/fieldsets and [N] match row counts.\n"
@@ -560,226 +783,651 @@ def make_toon_repair_prompt(prev_output: str, error_msg: str) -> str:
         "Previous output:\n"
         f"{prev_output}\n"
     )
+    if PROMPT_LAYOUT == "legacy":
+        return repair
+    return toon_tailored_prompt(schema_model, repair) if schema_model else toon_task_prompt(repair)
+
+# =========================================
+# Case registry
+# =========================================
+class Case:
+    """One benchmark case, declared once. Gold is loaded on first use and shared
+    by every model, run and track."""
+
+    def __init__(
+        self,
+        name: str,
+        schema_model: Type[BaseModel],
+        make_json_prompt: Callable[[], str],
+        make_toon_prompt: Callable[[], str],
+        validate: Callable[[Any], Any],
+        key: Optional[str] = None,
+        gold_path: Optional[Path] = None,
+        max_tokens: int = MAX_TOKENS,
+    ):
+        self.name = name  # unit name in checkpoints, the results store and CSV columns
+        self.key = key or name  # wrapper key TOON output may use ({"order": {...}}) and CASES entry for canonicalisation
+        self.schema_model = schema_model
+        self.make_json_prompt = make_json_prompt
+        self.make_toon_prompt = make_toon_prompt
+        self.validate = validate
+        self.gold_path = gold_path or GOLD / f"{name}.gold.json"
+        self.max_tokens = max_tokens
+
+    @cached_property
+    def gold(self) -> canonical.Canonical:
+        """Gold from gold/<name>.gold.json (or `gold_path`), canonicalised and hashed once."""
+        gold = json.loads(self.gold_path.read_text(encoding="utf-8"))
+        return canonical.for_model(self.schema_model).canonicalize(gold)
+
+
+CASES: Dict[str, Case] = {c.name: c for c in (
+    Case("users", UsersPayload, make_json_prompt_users, make_toon_prompt_users, validate_users_json),
+    Case("order", Order, make_json_prompt_order, make_toon_prompt_order, validate_order_json),
+    Case("company", Company, make_json_prompt_company, make_toon_prompt_company, validate_company_json),
+    Case("invoice", Invoice, make_json_prompt_invoice, make_toon_prompt_invoice, validate_invoice_json),
+)}
+# EVAL_LOCAL_REPAIR=1 adds the "toon_local" track (T+local-repair): the TOON track, but an
+# output that does not decode first gets toon.repair's lossless fixes (fence, indentation,
+# [N] counts, ...) and only spends a repair call if it still fails. Each attempt records the
+# fixes it needed; the unit runs after T so its first call is a response-cache hit.
+# EVAL_TOON_GRAMMAR=1 adds "toon_so" (TOON-SO): the TOON track with every call constrained
+# by the grammar toon_grammar compiles from the case's model, TOON's counterpart to JSO.
+# EVAL_TOON_TAILORED=1 adds "toon_tailored": the TOON track with toon_schema_rules (the case
+# model's own layout and only the rules it exercises) instead of the universal TOON_RULES.
+EXTRA_FORMATS = ((("toon_local",) if LOCAL_REPAIR else ()) + (("toon_so",) if TOON_GRAMMAR else ())
+                 + (("toon_tailored",) if TOON_TAILORED else ()))
+FORMATS = ("json", "json_plain", "toon") + EXTRA_FORMATS
+TOON_FORMATS = ("toon", "toon_local", "toon_so", "toon_tailored")
 
 # =========================================
-# Core evaluation (one-shot + ≤9 repairs)
+# Core evaluation (one-shot + ≤9 repairs; repairs stay sequential within a track)
 # =========================================
 MAX_ATTEMPTS = 3
 
-def eval_json_track(
+class Scored(NamedTuple):
+    decoded: Any          # parsed output (its canonical form once it validated); None if it did not parse
+    error: Optional[str]  # feedback for the repair prompt; None when the output matched gold
+    ok: bool
+
+def score_output(fmt: str, out: str, aborted: Optional[str], validate_fn, gold: canonical.Canonical,
+                 canon_case: str, direct: bool = DIRECT_SCORE) -> Scored:
+    """Decode, validate and compare one output with gold by digest (shared by the tracks and rescore.py)."""
+    if direct and not aborted:
+        scored = direct_score(fmt, out, gold, canon_case)
+        if scored is not None:
+            return scored
+    decoded = None
+    try:
+        if aborted:
+            raise ValueError(aborted)
+        decoded = decode_toon_to_json(out) if fmt in TOON_FORMATS else json.loads(out)
+        validate_fn(decoded)  # Pydantic
+        got = canonical_json(normalize_by_key(decoded, canon_case), canon_case)
+    except Exception as e:
+        return Scored(decoded, str(e), False)
+    if got.digest == gold.digest:
+        return Scored(got.value, None, True)
+    return Scored(got.value, values_differ(got.value, gold.value), False)
+
+def repair_locally(out: str, validate: Callable[[Any], Any]) -> Tuple[str, List[str]]:
+    """TOON `out` as is if it decodes and validates, else after repair_toon_output; and the fixes."""
+    try:
+        validate(decode_toon_to_json(out))
+        return out, []
+    except Exception:
+        return repair_toon_output(out)
+
+class AttemptLog:
+    """Every attempt of one track: kept per attempt for the results store and
+    reduced to the per-unit latency CSV columns. `ledger` keeps the raw output
+    and outcome of each attempt for the ledger (not checkpointed)."""
+
+    def __init__(self):
+        self.queue_s = self.gen_s = self.decode_s = 0.0
+        self.completion_tokens = self.cached_tokens = 0
+        self.ttfts: List[float] = []
+        self.attempts: List[Dict[str, Any]] = []
+        self.ledger: List[Dict[str, Any]] = []
+
+    def add(self, lat: CallLatency, prompt_tokens: int, completion_tokens: int, aborted: Optional[str],
+            cached_tokens: int = 0, output: Optional[str] = None) -> None:
+        self.attempts.append(dict(
+            prompt_tokens=prompt_tokens, completion_tokens=completion_tokens, cached_tokens=cached_tokens,
+            aborted=bool(aborted),
+            queue_s=round(lat.queue_wait_s, 4), ttft_s=None if lat.ttft_s is None else round(lat.ttft_s, 4),
+            gen_s=round(lat.gen_s, 4),
+        ))
+        self.ledger.append(dict(output=output, error=aborted))
+        self.queue_s += lat.queue_wait_s
+        self.gen_s += lat.gen_s
+        # Decode throughput excludes prefill when the stream told us when it ended
+        self.decode_s += lat.gen_s - (lat.ttft_s or 0.0)
+        self.completion_tokens += completion_tokens
+        self.cached_tokens += cached_tokens
+        if lat.ttft_s is not None:
+            self.ttfts.append(lat.ttft_s)
+
+    def outcome(self, scored: Scored) -> Scored:
+        """Note how the last attempt scored."""
+        self.ledger[-1].update(decoded=scored.decoded, error=scored.error, ok=scored.ok)
+        return scored
+
+    def repair_locally(self, out: str, validate: Callable[[Any], Any]) -> str:
+        """`out` after repair_locally, with the fixes noted on the last attempt."""
+        out, fixes = repair_locally(out, validate)
+        if fixes:
+            self.attempts[-1]["local_fixes"] = fixes
+        return out
+
+    def as_dict(self) -> Dict[str, Any]:
+        return dict(
+            queue_s=round(self.queue_s, 4),
+            ttft_s=round(sum(self.ttfts) / len(self.ttfts), 4) if self.ttfts else None,
+            gen_s=round(self.gen_s, 4),
+            tokens_per_s=round(self.completion_tokens / self.decode_s, 2) if self.decode_s > 0 else None,
+            tokens_cached=self.cached_tokens,
+            attempts=self.attempts,
+            ledger=self.ledger,
+        )
+
+async def eval_json_track(
     model: str,
     make_prompt_fn,
     schema_model: Type[BaseModel],
     validate_fn,
     gold_obj,
     canon_case: str,
+    max_tokens: int = MAX_TOKENS,
 ):
     tokens_p = tokens_c = 0
+    log = AttemptLog()
     prompt = make_prompt_fn()
-    out, p, c = llm_call_json_structured(model, prompt, schema_model); tokens_p += p; tokens_c += c
-    try:
-        parsed = json.loads(out)
-        # print(f"JSON SO parsed: {parsed}")
-        validate_fn(parsed)  # Pydantic
-        parsed = canonical_json(normalize_by_key(parsed, canon_case), canon_case)
-        one_shot_ok = final_ok = (parsed == gold_obj)
-        if final_ok:
-            return dict(one_shot_ok=True, final_ok=True, attempts_used=1,
-                        tokens_prompt=tokens_p, tokens_completion=tokens_c)
-    except Exception as e:
-        err = str(e); one_shot_ok = False; prev = out
-    else:
-        err = "Structure valid but values differ from expected gold."; prev = out
+    out, p, c, aborted, lat, cached = await llm_call_json_structured(model, prompt, schema_model, canon_case, max_tokens); tokens_p += p; tokens_c += c; log.add(lat, p, c, aborted, cached, out)
+    scored = log.outcome(score_output("json", out, aborted, validate_fn, gold_obj, canon_case))
+    if scored.ok:
+        return dict(one_shot_ok=True, final_ok=True, attempts_used=1,
+                    tokens_prompt=tokens_p, tokens_completion=tokens_c, **log.as_dict())
+    one_shot_ok = False; err = scored.error; prev = out
 
     for i in range(1, MAX_ATTEMPTS):
         repair_prompt = make_json_repair_prompt(prev, err)
-        out, p, c = llm_call_json_structured(model, repair_prompt, schema_model); tokens_p += p; tokens_c += c
-        try:
-            parsed = json.loads(out)
-            validate_fn(parsed)
-            parsed = canonical_json(normalize_by_key(parsed, canon_case), canon_case)
-            final_ok = (parsed == gold_obj)
-            if final_ok:
-                return dict(one_shot_ok=one_shot_ok, final_ok=True, attempts_used=i+1,
-                            tokens_prompt=tokens_p, tokens_completion=tokens_c)
-            else:
-                err = "Structure valid but values differ from expected gold."
-                prev = out
-        except Exception as e:
-            err = str(e); prev = out
-            continue
+        out, p, c, aborted, lat, cached = await llm_call_json_structured(model, repair_prompt, schema_model, canon_case, max_tokens); tokens_p += p; tokens_c += c; log.add(lat, p, c, aborted, cached, out)
+        scored = log.outcome(score_output("json", out, aborted, validate_fn, gold_obj, canon_case))
+        if scored.ok:
+            return dict(one_shot_ok=one_shot_ok, final_ok=True, attempts_used=i+1,
+                        tokens_prompt=tokens_p, tokens_completion=tokens_c, **log.as_dict())
+        err = scored.error; prev = out
 
     return dict(one_shot_ok=one_shot_ok, final_ok=False, attempts_used=MAX_ATTEMPTS,
-                tokens_prompt=tokens_p, tokens_completion=tokens_c)
+                tokens_prompt=tokens_p, tokens_completion=tokens_c, **log.as_dict())
 
-def eval_json_plain_track(
+async def eval_json_plain_track(
     model: str,
     make_prompt_fn,
     schema_model: Type[BaseModel],
     validate_fn,
     gold_obj,
     canon_case: str,
+    max_tokens: int = MAX_TOKENS,
 ):
     """Evaluate JSON generation without response_format (plain completion)."""
     tokens_p = tokens_c = 0
+    log = AttemptLog()
     prompt = make_prompt_fn()
-    out, p, c = llm_call_json_plain(model, prompt, schema_model); tokens_p += p; tokens_c += c
-    try:
-        parsed = json.loads(out)
-        # print(f"JSON plain parsed: {parsed}")
-        validate_fn(parsed)  # Pydantic
-        parsed = canonical_json(normalize_by_key(parsed, canon_case), canon_case)
-        one_shot_ok = final_ok = (parsed == gold_obj)
-        if final_ok:
-            return dict(one_shot_ok=True, final_ok=True, attempts_used=1,
-                        tokens_prompt=tokens_p, tokens_completion=tokens_c)
-    except Exception as e:
-        err = str(e); one_shot_ok = False; prev = out
-    else:
-        err = "Structure valid but values differ from expected gold."; prev = out
+    out, p, c, aborted, lat, cached = await llm_call_json_plain(model, prompt, schema_model, canon_case, max_tokens); tokens_p += p; tokens_c += c; log.add(lat, p, c, aborted, cached, out)
+    scored = log.outcome(score_output("json_plain", out, aborted, validate_fn, gold_obj, canon_case))
+    if scored.ok:
+        return dict(one_shot_ok=True, final_ok=True, attempts_used=1,
+                    tokens_prompt=tokens_p, tokens_completion=tokens_c, **log.as_dict())
+    one_shot_ok = False; err = scored.error; prev = out
 
     for i in range(1, MAX_ATTEMPTS):
         repair_prompt = make_json_repair_prompt(prev, err)
-        out, p, c = llm_call_json_plain(model, repair_prompt, schema_model); tokens_p += p; tokens_c += c
-        try:
-            parsed = json.loads(out)
-            validate_fn(parsed)
-            parsed = canonical_json(normalize_by_key(parsed, canon_case), canon_case)
-            final_ok = (parsed == gold_obj)
-            if final_ok:
-                return dict(one_shot_ok=one_shot_ok, final_ok=True, attempts_used=i+1,
-                            tokens_prompt=tokens_p, tokens_completion=tokens_c)
-            else:
-                err = "Structure valid but values differ from expected gold."
-                prev = out
-        except Exception as e:
-            err = str(e); prev = out
-            continue
+        out, p, c, aborted, lat, cached = await llm_call_json_plain(model, repair_prompt, schema_model, canon_case, max_tokens); tokens_p += p; tokens_c += c; log.add(lat, p, c, aborted, cached, out)
+        scored = log.outcome(score_output("json_plain", out, aborted, validate_fn, gold_obj, canon_case))
+        if scored.ok:
+            return dict(one_shot_ok=one_shot_ok, final_ok=True, attempts_used=i+1,
+                        tokens_prompt=tokens_p, tokens_completion=tokens_c, **log.as_dict())
+        err = scored.error; prev = out
 
     return dict(one_shot_ok=one_shot_ok, final_ok=False, attempts_used=MAX_ATTEMPTS,
-                tokens_prompt=tokens_p, tokens_completion=tokens_c)
+                tokens_prompt=tokens_p, tokens_completion=tokens_c, **log.as_dict())
 
-def eval_toon_track(model: str, make_prompt_fn, validate_fn, gold_obj, canon_case: str):
+async def eval_toon_track(model: str, make_prompt_fn, schema_model: Type[BaseModel], validate_fn, gold_obj, canon_case: str,
+                          max_tokens: int = MAX_TOKENS, local_repair: bool = False, call=llm_call_plain,
+                          tailored: bool = False):
     tokens_p = tokens_c = 0
+    log = AttemptLog()
     prompt = make_prompt_fn()
-    out, p, c = llm_call_plain(model, prompt); tokens_p += p; tokens_c += c
-    try:
-        decoded = decode_toon_to_json(out)
-        # print(f"TOON decoded: {decoded}")
-        validate_fn(decoded)
-        decoded = canonical_json(normalize_by_key(decoded, canon_case), canon_case)
-        one_shot_ok = final_ok = (decoded == gold_obj)
-        if final_ok:
-            return dict(one_shot_ok=True, final_ok=True, attempts_used=1,
-                        tokens_prompt=tokens_p, tokens_completion=tokens_c)
-    except Exception as e:
-        err = str(e); one_shot_ok = False; prev = out
-    else:
-        err = "Structure valid but values differ from expected gold."; prev = out
+    if tailored:
+        prompt = toon_tailored_prompt(schema_model, prompt)
+    out, p, c, aborted, lat, cached = await call(model, prompt, schema_model, canon_case, max_tokens); tokens_p += p; tokens_c += c; log.add(lat, p, c, aborted, cached, out)
+    if local_repair and not aborted:
+        out = log.repair_locally(out, validate_fn)
+    scored = log.outcome(score_output("toon", out, aborted, validate_fn, gold_obj, canon_case))
+    if scored.ok:
+        return dict(one_shot_ok=True, final_ok=True, attempts_used=1,
+                    tokens_prompt=tokens_p, tokens_completion=tokens_c, **log.as_dict())
+    one_shot_ok = False; err = scored.error; prev = out
 
     for i in range(1, MAX_ATTEMPTS):
-        repair_prompt = make_toon_repair_prompt(prev, err)
-        out, p, c = llm_call_plain(model, repair_prompt); tokens_p += p; tokens_c += c
-        try:
-            decoded = decode_toon_to_json(out)
-            validate_fn(decoded)
-            decoded = canonical_json(normalize_by_key(decoded, canon_case), canon_case)
-            final_ok = (decoded == gold_obj)
-            if final_ok:
-                return dict(one_shot_ok=one_shot_ok, final_ok=True, attempts_used=i+1,
-                            tokens_prompt=tokens_p, tokens_completion=tokens_c)
-            else:
-                err = "Structure valid but values differ from expected gold."
-                prev = out
-        except Exception as e:
-            err = str(e); prev = out
-            continue
+        repair_prompt = make_toon_repair_prompt(prev, err, schema_model if tailored else None)
+        out, p, c, aborted, lat, cached = await call(model, repair_prompt, schema_model, canon_case, max_tokens); tokens_p += p; tokens_c += c; log.add(lat, p, c, aborted, cached, out)
+        if local_repair and not aborted:
+            out = log.repair_locally(out, validate_fn)
+        scored = log.outcome(score_output("toon", out, aborted, validate_fn, gold_obj, canon_case))
+        if scored.ok:
+            return dict(one_shot_ok=one_shot_ok, final_ok=True, attempts_used=i+1,
+                        tokens_prompt=tokens_p, tokens_completion=tokens_c, **log.as_dict())
+        err = scored.error; prev = out
 
     return dict(one_shot_ok=one_shot_ok, final_ok=False, attempts_used=MAX_ATTEMPTS,
-                tokens_prompt=tokens_p, tokens_completion=tokens_c)
+                tokens_prompt=tokens_p, tokens_completion=tokens_c, **log.as_dict())
+
+# =========================================
+# Checkpointed units (model, run, case, track)
+# =========================================
+checkpoint: Optional[UnitCheckpoint] = None  # opened in __main__
+results_store: Optional[ResultsStore] = None  # opened in __main__
+ledger: Optional[Ledger] = None  # raw outputs next to the results store (rescore.py), opened in __main__
+
+async def run_unit(model: str, case: str, track: str, evaluate: Callable[[], Awaitable[Dict[str, Any]]]) -> Dict[str, Any]:
+    """Evaluate one unit, or return its result from the checkpoint file if already done."""
+    run_idx = CURRENT_RUN.get()
+    if checkpoint is not None:
+        done = checkpoint.get(model, run_idx, case, track)
+        if done is not None:
+            return done
+    result = await evaluate()
+    entries = result.pop("ledger", None)
+    if ledger is not None and entries is not None:
+        ledger.record_unit(model, run_idx, case, track, result["attempts"], entries)
+    if results_store is not None:
+        results_store.append_unit(model, run_idx, case, track, result)
+    if checkpoint is not None:
+        checkpoint.record(model, run_idx, case, track, result)
+    return result
 
 # =========================================
 # Case runners aggregating metrics
 # =========================================
-def run_case_users(model: str):
-    gold = json.loads(USERS_JSON.read_text(encoding="utf-8"))
-    gold = canonical_json(gold, "users")
-    jm = eval_json_track(model, make_json_prompt_users, UsersPayload, validate_users_json, gold, "users")
-    jpm = eval_json_plain_track(model, make_json_prompt_users, UsersPayload, validate_users_json, gold, "users")
-    tm = eval_toon_track(model, make_toon_prompt_users, validate_users_json, gold, "users")
-    return {
-        "users_json_one_shot": jm["one_shot_ok"], "users_json_final": jm["final_ok"],
-        "users_json_attempts": jm["attempts_used"],
-        "users_json_tokens_prompt": jm["tokens_prompt"], "users_json_tokens_completion": jm["tokens_completion"],
-        "users_json_plain_one_shot": jpm["one_shot_ok"], "users_json_plain_final": jpm["final_ok"],
-        "users_json_plain_attempts": jpm["attempts_used"],
-        "users_json_plain_tokens_prompt": jpm["tokens_prompt"], "users_json_plain_tokens_completion": jpm["tokens_completion"],
-        "users_toon_one_shot": tm["one_shot_ok"], "users_toon_final": tm["final_ok"],
-        "users_toon_attempts": tm["attempts_used"],
-        "users_toon_tokens_prompt": tm["tokens_prompt"], "users_toon_tokens_completion": tm["tokens_completion"],
+LATENCY_FIELDS = ("queue_s", "ttft_s", "gen_s", "tokens_per_s")
+
+def latency_fields(prefix: str, unit: Dict[str, Any]) -> Dict[str, Any]:
+    """Latency columns for one unit (missing for units checkpointed before they were recorded)."""
+    return {f"{prefix}_{name}": unit.get(name) for name in LATENCY_FIELDS}
+
+def local_fixes(unit: Dict[str, Any]) -> str:
+    """Fixes applied per attempt, e.g. "1:fence+counts;3:indent" ("" when none were needed)."""
+    return ";".join(f"{i}:{'+'.join(a['local_fixes'])}" for i, a in enumerate(unit.get("attempts") or [], start=1)
+                    if a.get("local_fixes"))
+
+RUN_AFTER = {"toon_local": "toon"}  # track -> track whose unit must finish first (shares its first call)
+
+async def run_case(model: str, case: Case) -> Dict[str, Any]:
+    """Every track of one case for `model`, as flat `<case>_<track>_*` result keys."""
+    evaluators = {
+        "json": lambda: eval_json_track(model, case.make_json_prompt, case.schema_model, case.validate, case.gold,
+                                        case.key, case.max_tokens),
+        "json_plain": lambda: eval_json_plain_track(model, case.make_json_prompt, case.schema_model, case.validate,
+                                                    case.gold, case.key, case.max_tokens),
+        "toon": lambda: eval_toon_track(model, case.make_toon_prompt, case.schema_model, case.validate, case.gold,
+                                        case.key, case.max_tokens),
+        "toon_local": lambda: eval_toon_track(model, case.make_toon_prompt, case.schema_model, case.validate,
+                                              case.gold, case.key, case.max_tokens, local_repair=True),
+        "toon_so": lambda: eval_toon_track(model, case.make_toon_prompt, case.schema_model, case.validate, case.gold,
+                                           case.key, case.max_tokens, call=llm_call_toon_grammar),
+        "toon_tailored": lambda: eval_toon_track(model, case.make_toon_prompt, case.schema_model, case.validate,
+                                                 case.gold, case.key, case.max_tokens, tailored=True),
     }
+    tasks: Dict[str, asyncio.Task] = {}
+
+    async def run_track(fmt: str) -> Dict[str, Any]:
+        if fmt in RUN_AFTER and RUN_AFTER[fmt] in tasks:
+            await asyncio.wait([tasks[RUN_AFTER[fmt]]])
+        return await run_unit(model, case.name, fmt, evaluators[fmt])
+
+    for fmt in FORMATS:
+        tasks[fmt] = asyncio.create_task(run_track(fmt))
+    units = await asyncio.gather(*tasks.values())
+    results: Dict[str, Any] = {}
+    for fmt, unit in zip(FORMATS, units):
+        prefix = f"{case.name}_{fmt}"
+        results.update({
+            f"{prefix}_one_shot": unit["one_shot_ok"], f"{prefix}_final": unit["final_ok"],
+            f"{prefix}_attempts": unit["attempts_used"],
+            f"{prefix}_tokens_prompt": unit["tokens_prompt"], f"{prefix}_tokens_completion": unit["tokens_completion"],
+            f"{prefix}_tokens_cached": unit.get("tokens_cached"),  # missing for units checkpointed before it was recorded
+            **latency_fields(prefix, unit),
+        })
+        if fmt == "toon_local":
+            results[f"{prefix}_local_fixes"] = local_fixes(unit)
+    return results
 
-def run_case_order(model: str):
-    gold = json.loads(ORDER_JSON.read_text(encoding="utf-8"))
-    gold = canonical_json(gold, "order")
-    jm = eval_json_track(model, make_json_prompt_order, Order, validate_order_json, gold, "order")
-    jpm = eval_json_plain_track(model, make_json_prompt_order, Order, validate_order_json, gold, "order")
-    tm = eval_toon_track(model, make_toon_prompt_order, validate_order_json, gold, "order")
-    return {
-        "order_json_one_shot": jm["one_shot_ok"], "order_json_final": jm["final_ok"],
-        "order_json_attempts": jm["attempts_used"],
-        "order_json_tokens_prompt": jm["tokens_prompt"], "order_json_tokens_completion": jm["tokens_completion"],
-        "order_json_plain_one_shot": jpm["one_shot_ok"], "order_json_plain_final": jpm["final_ok"],
-        "order_json_plain_attempts": jpm["attempts_used"],
-        "order_json_plain_tokens_prompt": jpm["tokens_prompt"], "order_json_plain_tokens_completion": jpm["tokens_completion"],
-        "order_toon_one_shot": tm["one_shot_ok"], "order_toon_final": tm["final_ok"],
-        "order_toon_attempts": tm["attempts_used"],
-        "order_toon_tokens_prompt": tm["tokens_prompt"], "order_toon_tokens_completion": tm["tokens_completion"],
-    }
+# =========================================
+# Payload-size sweep (EVAL_SWEEP_ROWS)
+# =========================================
+# EVAL_SWEEP_ROWS=10,30,100,300,1000 swaps the gold cases for synthetic.py
+# payloads of those row counts (cases from EVAL_SWEEP_CASES, seed EVAL_SWEEP_SEED).
+# Every (model, run, case, rows) runs all three tracks; eval_sweep.csv gets one
+# row per track and crossover.py fits the row count where T's total tokens drop
+# below J's and JSO's. Units are named "<case>@<rows>s<seed>" in the checkpoint
+# (so another seed never resumes them) and go to their own results store
+# (results/sweep), so the main tables are unaffected.
+SWEEP_ROWS = [int(x) for x in os.environ.get("EVAL_SWEEP_ROWS", "").split(",") if x.strip()]
+SWEEP_CASES = [c.strip() for c in os.environ.get("EVAL_SWEEP_CASES", ",".join(synthetic.NATURAL_DEPTH)).split(",")
+               if c.strip()]
+SWEEP_SEED = int(os.environ.get("EVAL_SWEEP_SEED", "0"))
+SWEEP_CSV_PATH = Path(os.environ.get("EVAL_SWEEP_PATH", f"eval_sweep{_OUT}.csv"))
+SWEEP_FIELDS = ["model", "run", "case", "rows", "track", "one_shot", "final", "attempts",
+                "prompt_tokens", "completion_tokens", "total_tokens", "cached_tokens", *LATENCY_FIELDS]
+
+def _is_rows(value: Any) -> bool:
+    return isinstance(value, (list, synthetic.Rows))
+
+def _inline(obj: Dict[str, Any]) -> str:
+    return ", ".join(f"{k}={v}" for k, v in obj.items() if not _is_rows(v))
+
+def describe_payload(obj: Dict[str, Any], depth: int = 0) -> List[str]:
+    """Bullet-list rendering of a payload for task prompts (neutral: neither JSON nor TOON)."""
+    pad = "  " * depth
+    lines = []
+    for key, value in obj.items():
+        if isinstance(value, dict):
+            lines.append(f"{pad}- {key}: {_inline(value)}")
+        elif _is_rows(value):
+            lines.append(f"{pad}- {key} ({len(value)}):")
+            for item in value:
+                lines.append(f"{pad}  * {_inline(item)}")
+                lines += describe_payload({k: v for k, v in item.items() if _is_rows(v)}, depth + 2)
+        else:
+            lines.append(f"{pad}- {key}: {value}")
+    return lines
+
+def sweep_case(base: str, rows: int, seed: int = SWEEP_SEED) -> Case:
+    """`CASES[base]` with a synthetic payload of `rows` leaf rows as gold and task."""
+    lay = synthetic.layout(base, rows, seed=seed)
+    json_path, _ = synthetic.gold_paths(lay)
+    data = "\n".join(describe_payload(lay.payload()))
+    task = f"Create this {base} record with exactly these fields, nested objects and arrays (keep the order):\n{data}\n"
+    json_prompt = f"{task}\nReturn the data as JSON."
+    toon_prompt = toon_task_prompt(f"TASK:\n{task}\nOutput only the TOON code block.\n")
+    c = CASES[base]
+    return Case(f"{base}@{rows}s{seed}", c.schema_model, lambda: json_prompt, lambda: toon_prompt, c.validate,
+                key=base, gold_path=json_path,
+                max_tokens=max(MAX_TOKENS, json_path.stat().st_size // 2))  # JSON runs ~3-4 bytes per token
+
+def sweep_rows(model: str, run_idx: int, case: Case, rows: int, results: Dict[str, Any]) -> List[Dict[str, Any]]:
+    out = []
+    for fmt in FORMATS:
+        prefix = f"{case.name}_{fmt}"
+        p, c = results[f"{prefix}_tokens_prompt"], results[f"{prefix}_tokens_completion"]
+        out.append({
+            "model": model, "run": run_idx, "case": case.key, "rows": rows, "track": fmt,
+            "one_shot": results[f"{prefix}_one_shot"], "final": results[f"{prefix}_final"],
+            "attempts": results[f"{prefix}_attempts"],
+            "prompt_tokens": p, "completion_tokens": c, "total_tokens": p + c,
+            "cached_tokens": results[f"{prefix}_tokens_cached"],
+            **{name: results[f"{prefix}_{name}"] for name in LATENCY_FIELDS},
+        })
+    return out
+
+async def run_sweep_model_run(model: str, run_idx: int, cases: List[Tuple[Case, int]]) -> List[Dict[str, Any]]:
+    CURRENT_RUN.set(run_idx)
+    print(f"Sweeping {model} run {run_idx}...")
+    done = await asyncio.gather(*(run_case(model, case) for case, _ in cases))
+    return [row for (case, rows), results in zip(cases, done) for row in sweep_rows(model, run_idx, case, rows, results)]
+
+async def run_sweep(writer: csv.DictWriter, f) -> None:
+    """Every model × run × sweep case; the CSV is rewritten in full (finished units come from the checkpoint)."""
+    cases = [(sweep_case(base, rows), rows) for base in SWEEP_CASES for rows in sorted(set(SWEEP_ROWS))]
+    tasks = [asyncio.create_task(run_sweep_model_run(model, run_idx, cases))
+             for model in MODELS for run_idx in range(1, RUNS_PER_MODEL + 1)]
+    reporter = asyncio.create_task(scheduler.report(STATS_EVERY_S)) if STATS_EVERY_S > 0 else None
+    try:
+        for task in tasks:
+            writer.writerows(await task)
+            f.flush()
+    finally:
+        if reporter is not None:
+            reporter.cancel()
+    print(scheduler.format_snapshot())
+    print(response_cache.stats())
 
-def run_case_company(model: str):
-    gold = json.loads(COMPANY_JSON.read_text(encoding="utf-8"))
-    gold = canonical_json(gold, "company")
-    jm = eval_json_track(model, make_json_prompt_company, Company, validate_company_json, gold, "company")
-    jpm = eval_json_plain_track(model, make_json_prompt_company, Company, validate_company_json, gold, "company")
-    tm = eval_toon_track(model, make_toon_prompt_company, validate_company_json, gold, "company")
-    return {
-        "company_json_one_shot": jm["one_shot_ok"], "company_json_final": jm["final_ok"],
-        "company_json_attempts": jm["attempts_used"],
-        "company_json_tokens_prompt": jm["tokens_prompt"], "company_json_tokens_completion": jm["tokens_completion"],
-        "company_json_plain_one_shot": jpm["one_shot_ok"], "company_json_plain_final": jpm["final_ok"],
-        "company_json_plain_attempts": jpm["attempts_used"],
-        "company_json_plain_tokens_prompt": jpm["tokens_prompt"], "company_json_plain_tokens_completion": jpm["tokens_completion"],
-        "company_toon_one_shot": tm["one_shot_ok"], "company_toon_final": tm["final_ok"],
-        "company_toon_attempts": tm["attempts_used"],
-        "company_toon_tokens_prompt": tm["tokens_prompt"], "company_toon_tokens_completion": tm["tokens_completion"],
-    }
+# =========================================
+# Batched multi-record tracks (EVAL_BATCH_K)
+# =========================================
+# EVAL_BATCH_K=1,5,20 asks for K independent records of a case in one
+# completion (a `records` array, JSON or TOON), so the TOON rules / JSON Schema
+# are paid once per K records. Records are synthetic.py case objects with
+# EVAL_BATCH_ROWS leaf rows each; every record is validated and compared with
+# its own gold. A record counts as one-shot correct when attempt 1 got it right
+# and as final correct when any attempt did (repairs resend the whole batch with
+# the failing records' errors). eval_batch.csv gets one row per record with the
+# unit's tokens and generation time divided by K.
+BATCH_K = [int(x) for x in os.environ.get("EVAL_BATCH_K", "").split(",") if x.strip()]
+BATCH_CASES = [c.strip() for c in os.environ.get("EVAL_BATCH_CASES", ",".join(CASES)).split(",") if c.strip()]
+BATCH_ROWS = int(os.environ.get("EVAL_BATCH_ROWS", "3"))
+BATCH_CSV_PATH = Path(os.environ.get("EVAL_BATCH_PATH", f"eval_batch{_OUT}.csv"))
+BATCH_FIELDS = ["model", "run", "case", "k", "track", "record", "one_shot", "final", "attempts",
+                "prompt_tokens", "completion_tokens", "total_tokens", "cached_tokens", "gen_s"]
+BATCH_CALLS = {"json": llm_call_json_structured, "json_plain": llm_call_json_plain, "toon": llm_call_plain,
+               "toon_local": llm_call_plain, "toon_so": llm_call_toon_grammar, "toon_tailored": llm_call_plain}
+BATCH_KEY = "records"
+
+@lru_cache(maxsize=None)
+def batch_schema(schema_model: Type[BaseModel]) -> Type[BaseModel]:
+    """{"records": [<schema_model>, ...]}"""
+    return create_model(f"{schema_model.__name__}Batch", __config__=ConfigDict(extra="forbid", strict=True),
+                        records=(List[schema_model], ...))
+
+class Batch:
+    """K independent records of one case, requested in a single completion."""
+
+    def __init__(self, base: str, k: int, rows_per_record: int = BATCH_ROWS, seed: int = SWEEP_SEED):
+        self.case = CASES[base]
+        self.k = k
+        # unit name in the checkpoint and results store; carries every input of the golds
+        self.name = f"{base}x{k}r{rows_per_record}s{seed}"
+        self.schema_model = batch_schema(self.case.schema_model)
+        lay = synthetic.layout(base, k * rows_per_record, seed=seed)
+        records = [lay.case_object(i, i * rows_per_record, (i + 1) * rows_per_record) for i in range(k)]
+        canon = canonical.for_model(self.case.schema_model)
+        self.golds = [canon.canonicalize(json.loads("".join(synthetic.iter_json(r)))) for r in records]
+        data = "\n\n".join(f"Record {i + 1}:\n" + "\n".join(describe_payload(r)) for i, r in enumerate(records))
+        task = (f"Create {k} independent {base} records, in this order, each with exactly these fields, "
+                f"nested objects and arrays:\n\n{data}\n")
+        self.json_prompt = f"{task}\nReturn the data as JSON: an object whose '{BATCH_KEY}' array holds the {k} records."
+        self.toon_prompt = toon_task_prompt(f"TASK:\n{task}\n"
+                                            f"Output one array named {BATCH_KEY} with the {k} records as list items. "
+                                            "Output only the TOON code block.\n")
+        gold_chars = sum(len(g.data) for g in self.golds)
+        self.max_tokens = max(MAX_TOKENS, gold_chars // 2)
+
+    @staticmethod
+    def records(data: Any) -> List[Any]:
+        records = data.get(BATCH_KEY) if isinstance(data, dict) else data
+        if not isinstance(records, list):
+            raise ValueError(f"Expected an object with a '{BATCH_KEY}' array")
+        return records
+
+    def score(self, fmt: str, out: str, aborted: Optional[str]) -> Tuple[Any, List[Optional[str]]]:
+        """The decoded output and an error per record (None when it matches its gold);
+        a parse error fails every record."""
+        decoded = None
+        try:
+            if aborted:
+                raise ValueError(aborted)
+            decoded = decode_toon_to_json(out) if fmt in TOON_FORMATS else json.loads(out)
+            records = self.records(decoded)
+        except Exception as e:
+            return decoded, [str(e)] * self.k
+        errors: List[Optional[str]] = []
+        for i, gold in enumerate(self.golds):
+            if i >= len(records):
+                errors.append(f"missing (got {len(records)} of {self.k} records)")
+                continue
+            try:
+                self.case.validate(records[i])
+                got = canonical_json(normalize_by_key(records[i], self.case.key), self.case.key)
+                errors.append(None if got.digest == gold.digest else values_differ(got.value, gold.value, f"/{BATCH_KEY}/{i}"))
+            except Exception as e:
+                errors.append(str(e))
+        return decoded, errors
+
+    @staticmethod
+    def feedback(errors: List[Optional[str]]) -> Optional[str]:
+        """Repair feedback listing the failing records (None when every record matched)."""
+        return "\n".join(f"record {i + 1}: {e}" for i, e in enumerate(errors) if e is not None) or None
+
+async def eval_batch_track(model: str, fmt: str, batch: Batch) -> Dict[str, Any]:
+    tokens_p = tokens_c = 0
+    log = AttemptLog()
+    call = BATCH_CALLS[fmt]
+    prompt = batch.toon_prompt if fmt in TOON_FORMATS else batch.json_prompt
+    tailored = batch.schema_model if fmt == "toon_tailored" else None
+    if tailored:
+        prompt = toon_tailored_prompt(tailored, prompt)
+    one_shot: List[bool] = []
+    final = [False] * batch.k
+    for attempt in range(1, MAX_ATTEMPTS + 1):
+        out, p, c, aborted, lat, cached = await call(model, prompt, batch.schema_model, batch.case.key, batch.max_tokens)
+        tokens_p += p; tokens_c += c; log.add(lat, p, c, aborted, cached, out)
+        if fmt == "toon_local" and not aborted:
+            out = log.repair_locally(out, batch.records)
+        decoded, errors = batch.score(fmt, out, aborted)
+        failing = batch.feedback(errors)
+        log.outcome(Scored(decoded, failing, failing is None))
+        one_shot = one_shot or [e is None for e in errors]
+        final = [ok or e is None for ok, e in zip(final, errors)]
+        if all(final):
+            break
+        if fmt in TOON_FORMATS:
+            prompt = make_toon_repair_prompt(out, failing, tailored)
+        else:
+            prompt = make_json_repair_prompt(out, failing)
+    return dict(one_shot_ok=all(one_shot), final_ok=all(final), attempts_used=attempt,
+                tokens_prompt=tokens_p, tokens_completion=tokens_c,
+                record_one_shot=one_shot, record_final=final, **log.as_dict())
+
+def batch_rows(model: str, run_idx: int, batch: Batch, fmt: str, unit: Dict[str, Any]) -> List[Dict[str, Any]]:
+    k = batch.k
+    p, c = unit["tokens_prompt"] / k, unit["tokens_completion"] / k
+    return [{
+        "model": model, "run": run_idx, "case": batch.case.name, "k": k, "track": fmt, "record": i + 1,
+        "one_shot": unit["record_one_shot"][i], "final": unit["record_final"][i], "attempts": unit["attempts_used"],
+        "prompt_tokens": round(p, 2), "completion_tokens": round(c, 2), "total_tokens": round(p + c, 2),
+        "cached_tokens": round((unit.get("tokens_cached") or 0) / k, 2),
+        "gen_s": round(unit["gen_s"] / k, 4),
+    } for i in range(k)]
+
+async def run_batch_model_run(model: str, run_idx: int, batches: List[Batch]) -> List[Dict[str, Any]]:
+    CURRENT_RUN.set(run_idx)
+    print(f"Batching {model} run {run_idx}...")
+    jobs = [(b, fmt) for b in batches for fmt in FORMATS]
+    units = await asyncio.gather(*(
+        run_unit(model, b.name, fmt, lambda b=b, fmt=fmt: eval_batch_track(model, fmt, b)) for b, fmt in jobs
+    ))
+    return [row for (b, fmt), unit in zip(jobs, units) for row in batch_rows(model, run_idx, b, fmt, unit)]
+
+async def run_batches(writer: csv.DictWriter, f) -> List[Dict[str, Any]]:
+    batches = [Batch(base, k) for base in BATCH_CASES for k in sorted(set(BATCH_K))]
+    tasks = [asyncio.create_task(run_batch_model_run(model, run_idx, batches))
+             for model in MODELS for run_idx in range(1, RUNS_PER_MODEL + 1)]
+    reporter = asyncio.create_task(scheduler.report(STATS_EVERY_S)) if STATS_EVERY_S > 0 else None
+    rows: List[Dict[str, Any]] = []
+    try:
+        for task in tasks:
+            done = await task
+            writer.writerows(done)
+            f.flush()
+            rows += done
+    finally:
+        if reporter is not None:
+            reporter.cancel()
+    print(scheduler.format_snapshot())
+    print(response_cache.stats())
+    return rows
+
+def print_batch_summary(rows: List[Dict[str, Any]]) -> None:
+    """Per (case, K, track): record accuracy, tokens per record and records per generation second."""
+    groups: Dict[Tuple[str, int, str], List[Dict[str, Any]]] = {}
+    for r in rows:
+        groups.setdefault((r["case"], r["k"], r["track"]), []).append(r)
+    print(f"  {'case':<8} {'K':>4} {'track':<13} {'1S':>6} {'F':>6} {'tok/rec':>9} {'rec/s':>8}")
+    for (case, k, fmt), rs in sorted(groups.items()):
+        n = len(rs)
+        gen = sum(r["gen_s"] for r in rs)
+        print(f"  {case:<8} {k:>4} {fmt:<13} {sum(r['one_shot'] for r in rs) / n:>6.2f} "
+              f"{sum(r['final'] for r in rs) / n:>6.2f} {sum(r['total_tokens'] for r in rs) / n:>9.1f} "
+              f"{(n / gen if gen > 0 else float('nan')):>8.2f}")
 
-def run_case_invoice(model: str):
-    gold = json.loads(INVOICE_JSON.read_text(encoding="utf-8"))
-    gold = canonical_json(gold, "invoice")
-    jm = eval_json_track(model, make_json_prompt_invoice, Invoice, validate_invoice_json, gold, "invoice")
-    jpm = eval_json_plain_track(model, make_json_prompt_invoice, Invoice, validate_invoice_json, gold, "invoice")
-    tm = eval_toon_track(model, make_toon_prompt_invoice, validate_invoice_json, gold, "invoice")
-    return {
-        "invoice_json_one_shot": jm["one_shot_ok"], "invoice_json_final": jm["final_ok"],
-        "invoice_json_attempts": jm["attempts_used"],
-        "invoice_json_tokens_prompt": jm["tokens_prompt"], "invoice_json_tokens_completion": jm["tokens_completion"],
-        "invoice_json_plain_one_shot": jpm["one_shot_ok"], "invoice_json_plain_final": jpm["final_ok"],
-        "invoice_json_plain_attempts": jpm["attempts_used"],
-        "invoice_json_plain_tokens_prompt": jpm["tokens_prompt"], "invoice_json_plain_tokens_completion": jpm["tokens_completion"],
-        "invoice_toon_one_shot": tm["one_shot_ok"], "invoice_toon_final": tm["final_ok"],
-        "invoice_toon_attempts": tm["attempts_used"],
-        "invoice_toon_tokens_prompt": tm["tokens_prompt"], "invoice_toon_tokens_completion": tm["tokens_completion"],
-    }
+# =========================================
+# Offline re-scoring (rescore.py)
+# =========================================
+# rescore.py replays the raw outputs in a ledger through these, so a change to
+# decoding, validation, canonicalisation or local repair re-scores a paid sweep
+# without API calls. Sweep and batch units are rebuilt from their names, which
+# carry the seed (and rows per record); names from before those were recorded
+# ("order@100", "orderx5") fall back to EVAL_SWEEP_SEED / EVAL_BATCH_ROWS.
+_SWEEP_NAME_RE = re.compile(r"(\w+)@(\d+)(?:s(\d+))?")
+_BATCH_NAME_RE = re.compile(r"(\w+)x(\d+)(?:r(\d+)s(\d+))?")
+
+@lru_cache(maxsize=None)
+def unit_case(name: str):
+    """The Case or Batch behind a unit's case name ("order", "order@100s0", "orderx5r3s0")."""
+    if name in CASES:
+        return CASES[name]
+    m = _SWEEP_NAME_RE.fullmatch(name)
+    if m and m.group(1) in CASES:
+        return sweep_case(m.group(1), int(m.group(2)), int(m.group(3) or SWEEP_SEED))
+    m = _BATCH_NAME_RE.fullmatch(name)
+    if m and m.group(1) in CASES:
+        rows, seed = (int(m.group(3)), int(m.group(4))) if m.group(3) else (BATCH_ROWS, SWEEP_SEED)
+        return Batch(m.group(1), int(m.group(2)), rows, seed)
+    raise KeyError(f"Unknown case {name!r}")
+
+def rescore_unit(case_name: str, track: str,
+                 attempts: List[Tuple[str, Optional[str]]]) -> Tuple[List[Optional[str]], bool, bool]:
+    """Score the recorded (output, abort reason) attempts of one unit again.
+
+    Returns the error per attempt kept, one-shot and final. Like the live
+    track, the unit ends at its first success, so a re-score can end a unit
+    earlier but never add attempts: repairs that were never sent cannot be
+    replayed.
+    """
+    case = unit_case(case_name)
+    errors: List[Optional[str]] = []
+    if isinstance(case, Batch):
+        one_shot: List[bool] = []
+        final = [False] * case.k
+        for out, aborted in attempts:
+            if track == "toon_local" and not aborted:
+                out, _ = repair_locally(out, case.records)
+            _, record_errors = case.score(track, out, aborted)
+            errors.append(case.feedback(record_errors))
+            one_shot = one_shot or [e is None for e in record_errors]
+            final = [ok or e is None for ok, e in zip(final, record_errors)]
+            if all(final):
+                break
+        return errors, all(one_shot), all(final)
+    for out, aborted in attempts:
+        if track == "toon_local" and not aborted:
+            out, _ = repair_locally(out, case.validate)
+        scored = score_output(track, out, aborted, case.validate, case.gold, case.key)
+        errors.append(scored.error)
+        if scored.ok:
+            break
+    return errors, errors[0] is None, errors[-1] is None
 
 # =========================================
 # Summary helpers
 # =========================================
 def summarize_formats(results: Dict[str, Any]) -> Dict[str, Any]:
-    cases = ["users", "order", "company", "invoice"]
+    cases = list(CASES)
     summary = {}
-    for fmt in ["json", "json_plain", "toon"]:
+    for fmt in FORMATS:
         one_shot_hits = sum(1 for case in cases if results.get(f"{case}_{fmt}_one_shot"))
         final_hits    = sum(1 for case in cases if results.get(f"{case}_{fmt}_final"))
         n = len(cases)
@@ -790,20 +1438,39 @@ def summarize_formats(results: Dict[str, Any]) -> Dict[str, Any]:
         summary[f"{fmt}_prompt_tokens"]     = prompt_tokens
         summary[f"{fmt}_completion_tokens"] = comp_tokens
         summary[f"{fmt}_total_tokens"]      = prompt_tokens + comp_tokens
+        cached = [results.get(f"{case}_{fmt}_tokens_cached") for case in cases]
+        cached = [v for v in cached if v is not None]
+        summary[f"{fmt}_cached_tokens"]     = sum(cached) if cached else None
+        for name in ("queue_s", "gen_s"):
+            vals = [results.get(f"{case}_{fmt}_{name}") for case in cases]
+            vals = [v for v in vals if v is not None]
+            summary[f"{fmt}_{name}"] = round(sum(vals), 4) if vals else None
+        for name in ("ttft_s", "tokens_per_s"):
+            vals = [results.get(f"{case}_{fmt}_{name}") for case in cases]
+            vals = [v for v in vals if v is not None]
+            summary[f"{fmt}_{name}"] = round(sum(vals) / len(vals), 4) if vals else None
     summary["overall_prompt_tokens"]     = summary["json_prompt_tokens"] + summary["json_plain_prompt_tokens"] + summary["toon_prompt_tokens"]
     summary["overall_completion_tokens"] = summary["json_completion_tokens"] + summary["json_plain_completion_tokens"] + summary["toon_completion_tokens"]
     summary["overall_total_tokens"]      = summary["json_total_tokens"] + summary["json_plain_total_tokens"] + summary["toon_total_tokens"]
     return summary
 
+# Per-track summary columns of opt-in tracks (the three base tracks list theirs explicitly)
+EXTRA_SUMMARY_FIELDS = ("one_shot_accuracy", "final_accuracy", "prompt_tokens", "completion_tokens", "total_tokens")
+
 def flatten_for_csv(model: str, run_idx: int, results: Dict[str, Any]) -> Dict[str, Any]:
     row = {"model": model, "run": run_idx}
-    for case in ["users", "order", "company", "invoice"]:
-        for fmt in ["json", "json_plain", "toon"]:
+    for case in CASES:
+        for fmt in FORMATS:
             row[f"{case}_{fmt}_one_shot"] = results.get(f"{case}_{fmt}_one_shot", False)
             row[f"{case}_{fmt}_final"]    = results.get(f"{case}_{fmt}_final", False)
             row[f"{case}_{fmt}_attempts"] = results.get(f"{case}_{fmt}_attempts", 0)
             row[f"{case}_{fmt}_prompt_tokens"] = results.get(f"{case}_{fmt}_tokens_prompt", 0)
             row[f"{case}_{fmt}_completion_tokens"] = results.get(f"{case}_{fmt}_tokens_completion", 0)
+            row[f"{case}_{fmt}_cached_tokens"] = results.get(f"{case}_{fmt}_tokens_cached")
+            for name in LATENCY_FIELDS:
+                row[f"{case}_{fmt}_{name}"] = results.get(f"{case}_{fmt}_{name}")
+            if fmt == "toon_local":
+                row[f"{case}_{fmt}_local_fixes"] = results.get(f"{case}_{fmt}_local_fixes", "")
     summary = summarize_formats(results)
     row.update({
         "json_one_shot_accuracy": summary["json_one_shot_accuracy"],
@@ -825,22 +1492,32 @@ def flatten_for_csv(model: str, run_idx: int, results: Dict[str, Any]) -> Dict[s
         "overall_completion_tokens": summary["overall_completion_tokens"],
         "overall_total_tokens":   summary["overall_total_tokens"],
     })
+    for fmt in EXTRA_FORMATS:
+        row.update({f"{fmt}_{name}": summary[f"{fmt}_{name}"] for name in EXTRA_SUMMARY_FIELDS})
+    for fmt in FORMATS:
+        row[f"{fmt}_cached_tokens"] = summary[f"{fmt}_cached_tokens"]
+        for name in LATENCY_FIELDS:
+            row[f"{fmt}_{name}"] = summary[f"{fmt}_{name}"]
     return row
 
 # =========================================
-# Main (iterate models × runs, write CSV)
+# Main (schedule models × runs concurrently, write CSV in order)
 # =========================================
-if __name__ == "__main__":
+def csv_header_fields() -> List[str]:
     header_fields = ["model", "run"]
-    for case in ["users", "order", "company", "invoice"]:
-        for fmt in ["json", "json_plain", "toon"]:
+    for case in CASES:
+        for fmt in FORMATS:
             header_fields += [
                 f"{case}_{fmt}_one_shot",
                 f"{case}_{fmt}_final",
                 f"{case}_{fmt}_attempts",
                 f"{case}_{fmt}_prompt_tokens",
                 f"{case}_{fmt}_completion_tokens",
+                f"{case}_{fmt}_cached_tokens",
             ]
+            header_fields += [f"{case}_{fmt}_{name}" for name in LATENCY_FIELDS]
+            if fmt == "toon_local":
+                header_fields.append(f"{case}_{fmt}_local_fixes")
     header_fields += [
         "json_one_shot_accuracy","json_final_accuracy",
         "json_prompt_tokens","json_completion_tokens","json_total_tokens",
@@ -850,27 +1527,101 @@ if __name__ == "__main__":
         "toon_prompt_tokens","toon_completion_tokens","toon_total_tokens",
         "overall_prompt_tokens","overall_completion_tokens","overall_total_tokens",
     ]
+    for fmt in EXTRA_FORMATS:
+        header_fields += [f"{fmt}_{name}" for name in EXTRA_SUMMARY_FIELDS]
+    for fmt in FORMATS:
+        header_fields += [f"{fmt}_cached_tokens"] + [f"{fmt}_{name}" for name in LATENCY_FIELDS]
+    return header_fields
+
+async def run_model_run(model: str, run_idx: int) -> Dict[str, Any]:
+    """Every case × three tracks for one (model, run), as one flattened CSV row."""
+    CURRENT_RUN.set(run_idx)
+    print(f"Processing {model} run {run_idx}...")
+    results: Dict[str, Any] = {}
+    for case_results in await asyncio.gather(*(run_case(model, case) for case in CASES.values())):
+        results.update(case_results)
+    print(f"{model} run {run_idx} done")
+    return flatten_for_csv(model, run_idx, results)
+
+async def run_all(writer: csv.DictWriter, f) -> None:
+    already_written = completed_runs(CSV_PATH)
+    tasks = [
+        asyncio.create_task(run_model_run(model, run_idx))
+        for model in MODELS
+        for run_idx in range(1, RUNS_PER_MODEL + 1)
+        if (model, run_idx) not in already_written
+    ]
+    if already_written:
+        print(f"Resuming: {len(already_written)} (model, run) rows already in {CSV_PATH}, "
+              f"{len(checkpoint.done) if checkpoint else 0} units checkpointed")
+    reporter = asyncio.create_task(scheduler.report(STATS_EVERY_S)) if STATS_EVERY_S > 0 else None
+    try:
+        # Rows are written in (model, run) order, same as the sequential loop
+        for task in tasks:
+            writer.writerow(await task)
+            f.flush()
+    finally:
+        if reporter is not None:
+            reporter.cancel()
+    print(scheduler.format_snapshot())
+    print(response_cache.stats())
+
+def main_sweep() -> None:
+    global results_store, ledger
+    results_store = ResultsStore(RESULTS_DIR / "sweep")
+    ledger = Ledger(results_store.root / LEDGER_NAME)
+    with SWEEP_CSV_PATH.open("w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=SWEEP_FIELDS)
+        writer.writeheader()
+        try:
+            asyncio.run(run_sweep(writer, f))
+        finally:
+            checkpoint.close()
+            results_store.close()
+            ledger.close()
+    print(f"Wrote per-size sweep stats to {SWEEP_CSV_PATH.resolve()}")
+    crossover.main([str(SWEEP_CSV_PATH)])
+
+def main_batch() -> None:
+    global results_store, ledger
+    results_store = ResultsStore(RESULTS_DIR / "batch")
+    ledger = Ledger(results_store.root / LEDGER_NAME)
+    with BATCH_CSV_PATH.open("w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=BATCH_FIELDS)
+        writer.writeheader()
+        try:
+            rows = asyncio.run(run_batches(writer, f))
+        finally:
+            checkpoint.close()
+            results_store.close()
+            ledger.close()
+    print_batch_summary(rows)
+    print(f"Wrote per-record batch stats to {BATCH_CSV_PATH.resolve()}")
 
-    write_header = not CSV_PATH.exists()
-    with CSV_PATH.open("a", newline="", encoding="utf-8") as f:
-        writer = csv.DictWriter(f, fieldnames=header_fields)
-        if write_header:
-            writer.writeheader()
-
-        for model in MODELS:
-            print(f"Processing {model}...")
-            for run_idx in range(1, RUNS_PER_MODEL + 1):
-                print(f"Run {run_idx}...")
-                results: Dict[str, Any] = {}
-                results.update(run_case_users(model))
-                print("Users done")
-                results.update(run_case_order(model))
-                print("Order done")
-                results.update(run_case_company(model))
-                print("Company done")
-                results.update(run_case_invoice(model))
-                print("Invoice done")
-                row = flatten_for_csv(model, run_idx, results)
-                writer.writerow(row)
-
-    print(f"Wrote per-run stats to {CSV_PATH.resolve()}")
\ No newline at end of file
+if __name__ == "__main__":
+    if not LLM_API_KEY:
+        raise RuntimeError("Missing LLM_API_KEY environment variable")
+    checkpoint = UnitCheckpoint(CHECKPOINT_PATH)
+    if SWEEP_ROWS:
+        main_sweep()
+    elif BATCH_K:
+        main_batch()
+    else:
+        header_fields = csv_header_fields()
+        results_store = ResultsStore(RESULTS_DIR)
+        ledger = Ledger(results_store.root / LEDGER_NAME)
+        CSV_PATH.parent.mkdir(parents=True, exist_ok=True)
+        upgrade_csv_header(CSV_PATH, header_fields)  # e.g. rows written before the latency columns
+        write_header = not CSV_PATH.exists()
+        with CSV_PATH.open("a", newline="", encoding="utf-8") as f:
+            writer = csv.DictWriter(f, fieldnames=header_fields)
+            if write_header:
+                writer.writeheader()
+            try:
+                asyncio.run(run_all(writer, f))
+            finally:
+                checkpoint.close()
+                results_store.close()
+                ledger.close()
+
+        print(f"Wrote per-run stats to {CSV_PATH.resolve()}")
@@ -1,168 +1,149 @@
 # generate.py
-from typing import List, Literal, Optional
+"""Build the gold reference data (gold/*.gold.json + *.gold.toon).
+
+Nothing runs at import time: `gold_objects()` builds the Python gold objects
+once (cached) and `build_gold()` writes them to disk. Run `python generate.py`
+to (re)build the files.
+"""
+from functools import lru_cache
+from typing import Any, Dict, List, Tuple, Type
+import hashlib
 import json
-import subprocess
 from pathlib import Path
-from pydantic import BaseModel, ConfigDict, Field
-
-# ---------- Pydantic models (simple) ----------
-class UserRow(BaseModel):
-    model_config = ConfigDict(extra='forbid', strict=True)
-    id: int
-    name: str = Field(min_length=1)
-    role: Literal['admin', 'staff', 'guest']
-
-class Customer(BaseModel):
-    model_config = ConfigDict(extra='forbid', strict=True)
-    id: int
-    name: str
-
-class OrderItem(BaseModel):
-    model_config = ConfigDict(extra='forbid', strict=True)
-    sku: str
-    qty: int
-    price: float
-
-class Order(BaseModel):
-    model_config = ConfigDict(extra='forbid', strict=True)
-    id: int
-    customer: Customer
-    items: List[OrderItem]
-
-
-# ---------- Pydantic models (more complex #1: company) ----------
-class Employee(BaseModel):
-    model_config = ConfigDict(extra='forbid', strict=True)
-    id: int
-    name: str
-    title: Literal['engineer', 'manager', 'analyst']
-
-class Department(BaseModel):
-    model_config = ConfigDict(extra='forbid', strict=True)
-    code: str
-    name: str
-    employees: List[Employee]
-
-class Company(BaseModel):
-    model_config = ConfigDict(extra='forbid', strict=True)
-    id: int
-    name: str
-    departments: List[Department]
-
-
-# ---------- Pydantic models (more complex #2: invoice) ----------
-class InvoiceLine(BaseModel):
-    model_config = ConfigDict(extra='forbid', strict=True)
-    sku: str
-    qty: int
-    unit_price: float
-    line_total: float  # keep explicit to avoid computed logic here
-
-class Totals(BaseModel):
-    model_config = ConfigDict(extra='forbid', strict=True)
-    subtotal: float
-    tax: float
-    grand_total: float
-
-class Invoice(BaseModel):
-    model_config = ConfigDict(extra='forbid', strict=True)
-    number: str
-    currency: Literal['USD', 'EUR', 'SAR']
-    customer: Customer
-    items: List[InvoiceLine]
-    totals: Totals
-    notes: Optional[str] = None
+from pydantic import BaseModel
 
+import toon
+from schemas import (
+    UserRow, Customer, OrderItem, Order,
+    Employee, Department, Company,
+    InvoiceLine, Totals, Invoice,
+    UsersPayload,
+)
+
+GOLD_DIR = Path("gold")
+MANIFEST_PATH = GOLD_DIR / "manifest.json"
+MANIFEST_VERSION = 1  # bump when the encoder output format changes
 
-# ---------- Create gold Python objects ----------
-# 1) Tabular users
-users = [
-    UserRow(id=1, name="Alice", role="admin"),
-    UserRow(id=2, name="Bob",   role="staff"),
-    UserRow(id=3, name="Eve",   role="guest"),
-]
-users_gold = {"users": [u.model_dump() for u in users]}
-
-# 2) Nested order
-order_gold = Order(
-    id=101,
-    customer=Customer(id=9, name="Ada"),
-    items=[
-        OrderItem(sku="A1", qty=2, price=9.99),
-        OrderItem(sku="B2", qty=1, price=14.50),
-    ],
-).model_dump()
-
-# 3) More complex: company with nested tabular arrays
-company_gold = Company(
-    id=1,
-    name="Acme",
-    departments=[
-        Department(
-            code="ENG",
-            name="Engineering",
-            employees=[
-                Employee(id=1, name="Alice", title="engineer"),
-                Employee(id=2, name="Bob",   title="manager"),
-            ],
-        ),
-        Department(
-            code="OPS",
-            name="Operations",
-            employees=[
-                Employee(id=3, name="Eve", title="analyst"),
-            ],
-        ),
-    ],
-).model_dump()
-
-# 4) More complex: invoice with nested objects + tabular line items
-invoice_gold = Invoice(
-    number="INV-2025-001",
-    currency="USD",
-    customer=Customer(id=9, name="Ada"),
-    items=[
-        InvoiceLine(sku="A1", qty=2, unit_price=9.99, line_total=19.98),
-        InvoiceLine(sku="B2", qty=1, unit_price=14.50, line_total=14.50),
-    ],
-    totals=Totals(subtotal=34.48, tax=6.90, grand_total=41.38),
-    notes="Thank you for your business.",
-).model_dump()
-
-
-# ---------- Write gold JSON to disk ----------
-outdir = Path("gold")
-outdir.mkdir(exist_ok=True)
 
+# ---------- Create gold Python objects ----------
+@lru_cache(maxsize=1)
+def gold_objects() -> Dict[str, Tuple[Type[BaseModel], Any]]:
+    """case name -> (schema model, gold payload as plain JSON-compatible data)."""
+    # 1) Tabular users
+    users = [
+        UserRow(id=1, name="Alice", role="admin"),
+        UserRow(id=2, name="Bob",   role="staff"),
+        UserRow(id=3, name="Eve",   role="guest"),
+    ]
+    users_gold = {"users": [u.model_dump() for u in users]}
+
+    # 2) Nested order
+    order_gold = Order(
+        id=101,
+        customer=Customer(id=9, name="Ada"),
+        items=[
+            OrderItem(sku="A1", qty=2, price=9.99),
+            OrderItem(sku="B2", qty=1, price=14.50),
+        ],
+    ).model_dump()
+
+    # 3) More complex: company with nested tabular arrays
+    company_gold = Company(
+        id=1,
+        name="Acme",
+        departments=[
+            Department(
+                code="ENG",
+                name="Engineering",
+                employees=[
+                    Employee(id=1, name="Alice", title="engineer"),
+                    Employee(id=2, name="Bob",   title="manager"),
+                ],
+            ),
+            Department(
+                code="OPS",
+                name="Operations",
+                employees=[
+                    Employee(id=3, name="Eve", title="analyst"),
+                ],
+            ),
+        ],
+    ).model_dump()
+
+    # 4) More complex: invoice with nested objects + tabular line items
+    invoice_gold = Invoice(
+        number="INV-2025-001",
+        currency="USD",
+        customer=Customer(id=9, name="Ada"),
+        items=[
+            InvoiceLine(sku="A1", qty=2, unit_price=9.99, line_total=19.98),
+            InvoiceLine(sku="B2", qty=1, unit_price=14.50, line_total=14.50),
+        ],
+        totals=Totals(subtotal=34.48, tax=6.90, grand_total=41.38),
+        notes="Thank you for your business.",
+    ).model_dump()
+
+    return {
+        "users":   (UsersPayload, users_gold),
+        "order":   (Order,        order_gold),
+        "company": (Company,      company_gold),
+        "invoice": (Invoice,      invoice_gold),
+    }
+
+
+# ---------- Write gold JSON + TOON to disk (skip unchanged inputs) ----------
 def write_json(path: Path, obj) -> None:
     path.write_text(json.dumps(obj, ensure_ascii=False, separators=(",", ":")), encoding="utf-8")
 
-users_json_path   = outdir / "users.gold.json"
-order_json_path   = outdir / "order.gold.json"
-company_json_path = outdir / "company.gold.json"
-invoice_json_path = outdir / "invoice.gold.json"
-
-write_json(users_json_path, users_gold)
-write_json(order_json_path, order_gold)
-write_json(company_json_path, company_gold)
-write_json(invoice_json_path, invoice_gold)
-
-
-# ---------- Use TOON CLI via npx to encode JSON -> TOON ----------
-def encode_to_toon(json_path: Path, toon_path: Path) -> None:
-    subprocess.run(
-        ["npx", "@toon-format/cli", str(json_path), "-o", str(toon_path)],
-        check=True,
-    )
-
-encode_to_toon(users_json_path,   outdir / "users.gold.toon")
-encode_to_toon(order_json_path,   outdir / "order.gold.toon")
-encode_to_toon(company_json_path, outdir / "company.gold.toon")
-encode_to_toon(invoice_json_path, outdir / "invoice.gold.toon")
-
-print("Wrote:")
-for p in [users_json_path, outdir / "users.gold.toon",
-          order_json_path, outdir / "order.gold.toon",
-          company_json_path, outdir / "company.gold.toon",
-          invoice_json_path, outdir / "invoice.gold.toon"]:
-    print(f"  {p}")
+# ---------- Encode JSON -> TOON in-process (same output as @toon-format/cli) ----------
+def encode_to_toon(obj, toon_path: Path) -> None:
+    toon_path.write_text(toon.encode(obj), encoding="utf-8")
+
+def sha256_json(obj) -> str:
+    blob = json.dumps(obj, ensure_ascii=False, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(blob.encode("utf-8")).hexdigest()
+
+def load_manifest(path: Path = MANIFEST_PATH) -> Dict[str, Any]:
+    if not path.exists():
+        return {}
+    try:
+        return json.loads(path.read_text(encoding="utf-8"))
+    except json.JSONDecodeError:
+        return {}
+
+def write_gold(manifest: Dict[str, Any], name: str, schema_model: Type[BaseModel], obj) -> List[Path]:
+    """Write gold/<name>.gold.{json,toon} unless schema + payload hashes match the manifest."""
+    json_path = GOLD_DIR / f"{name}.gold.json"
+    toon_path = GOLD_DIR / f"{name}.gold.toon"
+    entry = {
+        "version": MANIFEST_VERSION,
+        "schema": sha256_json(schema_model.model_json_schema()),
+        "payload": sha256_json(obj),
+    }
+    if manifest.get(name) == entry and json_path.exists() and toon_path.exists():
+        return []
+    write_json(json_path, obj)
+    encode_to_toon(obj, toon_path)
+    manifest[name] = entry
+    return [json_path, toon_path]
+
+@lru_cache(maxsize=1)
+def build_gold() -> Tuple[Path, ...]:
+    """Write all gold files (once per process); returns the paths that were rewritten."""
+    GOLD_DIR.mkdir(exist_ok=True)
+    manifest = load_manifest()
+    written: List[Path] = []
+    for name, (schema_model, obj) in gold_objects().items():
+        written += write_gold(manifest, name, schema_model, obj)
+    MANIFEST_PATH.write_text(json.dumps(manifest, indent=2, sort_keys=True), encoding="utf-8")
+    return tuple(written)
+
+
+if __name__ == "__main__":
+    written = build_gold()
+    if written:
+        print("Wrote:")
+        for p in written:
+            print(f"  {p}")
+    else:
+        print("Gold files up to date.")
@@ -0,0 +1,102 @@
+# json_diff.py
+"""Structural diff of a (canonicalised) output against its gold object, keyed by JSON Pointer.
+
+Used to turn "values differ" into feedback a repair prompt can act on:
+
+    /items/1/price: expected 14.5, got 15.5
+    /customer/name: missing (expected "Ada")
+    /items: expected 2 items, got 3
+
+Equal subtrees are skipped with one `==` (C-level) comparison, so the cost
+is proportional to the parts that differ, not to the payload. Equality is
+Python's (1 == 1.0). The tracks only call this after the canonical digests
+(canonical.py) of output and gold differ.
+"""
+import json
+from typing import Any, List, NamedTuple, Optional
+
+MAX_VALUE_CHARS = 60  # longer values are elided in formatted mismatches
+
+
+class Mismatch(NamedTuple):
+    pointer: str  # RFC 6901 JSON Pointer ("" is the whole document)
+    kind: str     # "value" | "type" | "missing" | "unexpected" | "length"
+    expected: Any
+    actual: Any
+
+
+def escape(token: Any) -> str:
+    return str(token).replace("~", "~0").replace("/", "~1")
+
+
+def _kind(value: Any) -> str:
+    return "object" if isinstance(value, dict) else "array" if isinstance(value, list) else "scalar"
+
+
+class _Full(Exception):
+    pass
+
+
+def _walk(actual: Any, expected: Any, pointer: str, out: List[Mismatch], limit: Optional[int]) -> None:
+    if actual == expected:
+        return
+
+    def add(m: Mismatch) -> None:
+        out.append(m)
+        if limit is not None and len(out) >= limit:
+            raise _Full
+
+    if isinstance(expected, dict) and isinstance(actual, dict):
+        for key, exp in expected.items():
+            at = f"{pointer}/{escape(key)}"
+            if key not in actual:
+                add(Mismatch(at, "missing", exp, None))
+            else:
+                _walk(actual[key], exp, at, out, limit)
+        for key, act in actual.items():
+            if key not in expected:
+                add(Mismatch(f"{pointer}/{escape(key)}", "unexpected", None, act))
+    elif isinstance(expected, list) and isinstance(actual, list):
+        if len(actual) != len(expected):
+            add(Mismatch(pointer, "length", len(expected), len(actual)))
+        for i, (act, exp) in enumerate(zip(actual, expected)):
+            _walk(act, exp, f"{pointer}/{i}", out, limit)
+    elif _kind(actual) != _kind(expected):
+        add(Mismatch(pointer, "type", expected, actual))
+    else:
+        add(Mismatch(pointer, "value", expected, actual))
+
+
+def diff(actual: Any, expected: Any, limit: Optional[int] = None, pointer: str = "") -> List[Mismatch]:
+    """Mismatches of `actual` against `expected`, in document order (at most `limit`)."""
+    out: List[Mismatch] = []
+    try:
+        _walk(actual, expected, pointer, out, limit)
+    except _Full:
+        pass
+    return out
+
+
+def _short(value: Any) -> str:
+    text = json.dumps(value, ensure_ascii=False, separators=(",", ":"))
+    return text if len(text) <= MAX_VALUE_CHARS else text[: MAX_VALUE_CHARS - 3] + "..."
+
+
+def format_mismatch(m: Mismatch) -> str:
+    at = m.pointer or "/"
+    if m.kind == "missing":
+        return f"{at}: missing (expected {_short(m.expected)})"
+    if m.kind == "unexpected":
+        return f"{at}: unexpected key (got {_short(m.actual)})"
+    if m.kind == "length":
+        return f"{at}: expected {m.expected} items, got {m.actual}"
+    return f"{at}: expected {_short(m.expected)}, got {_short(m.actual)}"
+
+
+def format_diff(mismatches: List[Mismatch], limit: int) -> str:
+    """One line per mismatch; a trailing note when there were more than `limit`
+    (pass `diff(..., limit + 1)` so a list of exactly `limit` is not marked as cut)."""
+    lines = [format_mismatch(m) for m in mismatches[:limit]]
+    if len(mismatches) > limit:
+        lines.append(f"(first {limit} mismatches shown)")
+    return "\n".join(lines)
@@ -0,0 +1,111 @@
+# ledger.py
+"""SQLite ledger of every attempt's raw model output, for offline re-scoring.
+
+The results store keeps one boolean per attempt; the ledger keeps what it was
+computed from: the raw completion text, the decoded object (its canonical
+form once it validated), the error fed to the repair prompt, usage and timing. One
+file sits next to each results store (`results/ledger.sqlite`,
+`results/sweep/ledger.sqlite`, ...) and `rescore.py` re-runs decode,
+validation and the gold comparison over it without any API calls.
+
+Rows are keyed on (model, run, case, track, attempt); recording a unit again
+(a re-run sweep) replaces all of its attempts.
+"""
+import json
+import sqlite3
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, NamedTuple, Optional
+
+LEDGER_NAME = "ledger.sqlite"
+
+COLUMNS = ("model", "run", "case", "track", "attempt", "output", "decoded", "error", "ok", "aborted",
+           "prompt_tokens", "completion_tokens", "cached_tokens", "queue_s", "ttft_s", "gen_s", "local_fixes",
+           "recorded")
+
+
+class Attempt(NamedTuple):
+    output: str
+    error: Optional[str]
+    ok: bool
+    aborted: bool
+    prompt_tokens: int
+    completion_tokens: int
+    queue_s: Optional[float]
+    ttft_s: Optional[float]
+    gen_s: Optional[float]
+
+
+class Unit(NamedTuple):
+    model: str
+    run: int
+    case: str
+    track: str
+    attempts: List[Attempt]
+
+
+class Ledger:
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self._db: Optional[sqlite3.Connection] = None
+
+    def _conn(self) -> sqlite3.Connection:
+        if self._db is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._db = sqlite3.connect(self.path)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS attempts ("
+                " model TEXT NOT NULL, run INTEGER NOT NULL, \"case\" TEXT NOT NULL, track TEXT NOT NULL,"
+                " attempt INTEGER NOT NULL, output TEXT, decoded TEXT, error TEXT, ok INTEGER NOT NULL,"
+                " aborted INTEGER NOT NULL, prompt_tokens INTEGER, completion_tokens INTEGER,"
+                " cached_tokens INTEGER, queue_s REAL, ttft_s REAL, gen_s REAL, local_fixes TEXT,"
+                " recorded REAL NOT NULL, PRIMARY KEY (model, run, \"case\", track, attempt))"
+            )
+            self._db.execute("CREATE INDEX IF NOT EXISTS attempts_case ON attempts(\"case\", track)")
+        return self._db
+
+    def record_unit(self, model: str, run: int, case: str, track: str,
+                    attempts: List[Dict[str, Any]], entries: List[Dict[str, Any]]) -> None:
+        """Store one evaluated unit: `attempts` are the track's per-attempt metrics, `entries`
+        the matching raw outputs and outcomes (AttemptLog.ledger)."""
+        db = self._conn()
+        now = time.time()
+        rows = []
+        for i, (a, e) in enumerate(zip(attempts, entries), start=1):
+            decoded = e.get("decoded")
+            rows.append((
+                model, run, case, track, i, e.get("output"),
+                None if decoded is None else json.dumps(decoded, ensure_ascii=False, separators=(",", ":")),
+                e.get("error"), bool(e.get("ok")), bool(a.get("aborted")),
+                a.get("prompt_tokens"), a.get("completion_tokens"), a.get("cached_tokens"),
+                a.get("queue_s"), a.get("ttft_s"), a.get("gen_s"), "+".join(a.get("local_fixes") or ()) or None,
+                now,
+            ))
+        with db:
+            db.execute("DELETE FROM attempts WHERE model = ? AND run = ? AND \"case\" = ? AND track = ?",
+                       (model, run, case, track))
+            db.executemany(f"INSERT INTO attempts VALUES ({', '.join('?' * len(COLUMNS))})", rows)
+
+    def units(self) -> Iterator[Unit]:
+        """Every recorded unit with its attempts in order (raw outputs and original outcomes)."""
+        db = self._conn()
+        cur = db.execute(
+            "SELECT model, run, \"case\", track, output, error, ok, aborted, prompt_tokens, completion_tokens,"
+            " queue_s, ttft_s, gen_s FROM attempts ORDER BY model, run, \"case\", track, attempt"
+        )
+        unit: Optional[Unit] = None
+        for model, run, case, track, output, error, ok, aborted, p, c, queue_s, ttft_s, gen_s in cur:
+            if unit is None or (model, run, case, track) != unit[:4]:
+                if unit is not None:
+                    yield unit
+                unit = Unit(model, run, case, track, [])
+            unit.attempts.append(Attempt(output or "", error, bool(ok), bool(aborted), p or 0, c or 0,
+                                         queue_s, ttft_s, gen_s))
+        if unit is not None:
+            yield unit
+
+    def close(self) -> None:
+        if self._db is not None:
+            self._db.close()
+            self._db = None
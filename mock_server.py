@@ -0,0 +1,375 @@
+# mock_server.py
+"""Local OpenAI-compatible chat-completions stand-in for offline harness benchmarking.
+
+Serves POST /v1/chat/completions over a minimal keep-alive HTTP/1.1 server
+(stdlib asyncio only). Each reply is either the gold JSON / TOON for the case
+the prompt asks for (for eval.py's size-sweep and batch prompts, the synthetic
+payload read back from the prompt's own field list), or a recorded output
+replayed from the response cache,
+optionally with injected latency, 5xx errors, 429s and malformed outputs.
+A request carrying a TOON grammar (`guided_grammar` / `grammar` GBNF or a
+`guided_regex`, as eval.py's TOON-SO track sends) is treated as constrained:
+a malformed output the grammar would not allow is served intact instead.
+`--prefix-cache N` reports `usage.prompt_tokens_details.cached_tokens` like a
+provider prefix cache working in N-character blocks.
+`"stream": true` requests get server-sent events, one chunk per line of output.
+Sweep and batch repair prompts do not restate the payload, so with
+`--malform-rate` those repairs get a fixed gold and fail.
+
+Usage:
+    python mock_server.py --port 8765 --latency lognormal:-3,0.5 --rate-limit-rate 0.02
+    LLM_BASE_URL=http://127.0.0.1:8765/v1 EVAL_CACHE=off python eval.py
+"""
+import argparse
+import asyncio
+import hashlib
+import json
+import random
+import re
+import sqlite3
+import time
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import synthetic
+import toon
+import toon_grammar
+from response_cache import cache_key
+
+GOLD = Path("gold")
+CASES = ("users", "order", "company", "invoice")
+_SDK_PARAMS = {"max_tokens", "temperature", "top_p", "response_format", "stop", "seed", "n",
+               "presence_penalty", "frequency_penalty"}
+_NOT_HASHED = {"model", "messages", "stream", "stream_options"}
+GRAMMAR_FIELDS = ("guided_grammar", "grammar")
+
+
+# =========================================
+# Case / format detection + reply text
+# =========================================
+def detect_case(prompt: str) -> str:
+    """Which gold case a (task or repair) prompt is about."""
+    low = prompt.lower()
+    if "invoice" in low or "inv-" in low or "grand_total" in low:
+        return "invoice"
+    if "compan" in low or "department" in low:
+        return "company"
+    if "order" in low or "customer" in low:
+        return "order"
+    return "users"
+
+def load_gold() -> Dict[str, Tuple[str, str]]:
+    return {
+        case: (
+            (GOLD / f"{case}.gold.json").read_text(encoding="utf-8"),
+            (GOLD / f"{case}.gold.toon").read_text(encoding="utf-8"),
+        )
+        for case in CASES
+    }
+
+# eval.py's sweep ("Create this order record ...") and batch ("Create 5 independent
+# order records ...") tasks list the payload as bullets (eval.describe_payload);
+# reading them back and typing the values through the case model gives the gold.
+_SWEEP_TASK = re.compile(r"Create this (\w+) record with exactly these fields[^\n]*:\n")
+_BATCH_TASK = re.compile(r"Create \d+ independent (\w+) records[^\n]*:\n")
+_RECORD = re.compile(r"Record \d+:\n")
+_BULLETS = re.compile(r"(?: *[-*] [^\n]*\n)+")
+_BULLET = re.compile(r"( *)([-*]) (.*)")
+_ROWS = re.compile(r"(\w+) \((\d+)\):")
+_INLINE = re.compile(r", (?=\w+=)")
+
+def _inline(text: str) -> Dict[str, str]:
+    return dict(part.split("=", 1) for part in _INLINE.split(text)) if text else {}
+
+def _fields(lines: List[str], i: int, pad: int) -> Tuple[Dict[str, Any], int]:
+    """`- key: ...` / `- key (N):` bullets at indentation `pad`, from line `i`."""
+    obj: Dict[str, Any] = {}
+    while i < len(lines):
+        m = _BULLET.fullmatch(lines[i])
+        if not m or len(m.group(1)) != pad or m.group(2) != "-":
+            break
+        i += 1
+        rows = _ROWS.fullmatch(m.group(3))
+        if rows is None:
+            key, _, value = m.group(3).partition(": ")
+            obj[key] = _inline(value) if re.match(r"\w+=", value) else value
+            continue
+        items = []
+        while i < len(lines):
+            m = _BULLET.fullmatch(lines[i])
+            if not m or len(m.group(1)) != pad + 2 or m.group(2) != "*":
+                break
+            item = _inline(m.group(3))
+            nested, i = _fields(lines, i + 1, pad + 4)
+            items.append({**item, **nested})
+        obj[rows.group(1)] = items
+    return obj, i
+
+def _described(case: str, prompt: str, start: int) -> Any:
+    block = _BULLETS.match(prompt, start)
+    obj, _ = _fields(block.group(0).splitlines() if block else [], 0, 0)
+    return synthetic.MODELS[case].model_validate(obj, strict=False).model_dump(mode="json")
+
+def synthetic_gold(prompt: str) -> Optional[Any]:
+    """The payload a sweep or batch task prompt describes (None for other prompts)."""
+    m = _BATCH_TASK.search(prompt)
+    if m and m.group(1) in synthetic.MODELS:
+        return {"records": [_described(m.group(1), prompt, r.end()) for r in _RECORD.finditer(prompt, m.end())]}
+    m = _SWEEP_TASK.search(prompt)
+    if m and m.group(1) in synthetic.MODELS:
+        return _described(m.group(1), prompt, m.end())
+    return None
+
+def malform(text: str) -> str:
+    """Break an output in a way the harness must catch (drops one line / truncates JSON)."""
+    lines = text.split("\n")
+    if len(lines) > 3:
+        del lines[len(lines) // 2]
+        return "\n".join(lines)
+    return text[: max(1, len(text) // 2)]
+
+@lru_cache(maxsize=64)
+def _compile(regex: str) -> "re.Pattern[str]":
+    return re.compile(regex)
+
+def constraint(body: Dict[str, Any]) -> Optional["re.Pattern[str]"]:
+    """The output language a constrained request allows (None when unconstrained)."""
+    if body.get("guided_regex"):
+        return _compile(body["guided_regex"])
+    grammar = next((body[f] for f in GRAMMAR_FIELDS if body.get(f)), None)
+    return _compile(toon_grammar.to_regex(grammar)) if grammar else None
+
+def parse_latency(spec: str) -> Callable[[], float]:
+    """'0', 'fixed:0.05', 'uniform:0.01,0.2', 'lognormal:mu,sigma' (seconds)."""
+    kind, _, args = spec.partition(":")
+    if kind in ("0", "none", ""):
+        return lambda: 0.0
+    vals = [float(x) for x in args.split(",")] if args else []
+    if kind == "fixed":
+        return lambda: vals[0]
+    if kind == "uniform":
+        return lambda: random.uniform(vals[0], vals[1])
+    if kind == "lognormal":
+        return lambda: random.lognormvariate(vals[0], vals[1])
+    raise ValueError(f"Unknown latency spec {spec!r}")
+
+
+class Replayer:
+    """Looks up recorded outputs in the response cache (tries each run namespace in turn)."""
+
+    def __init__(self, path: Path, runs: int):
+        self.db = sqlite3.connect(path)
+        self.runs = runs
+
+    def lookup(self, body: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        # Rebuild the params dict eval.chat_completion hashed (top_k etc. travel as extra_body)
+        params = {k: v for k, v in body.items() if k in _SDK_PARAMS}
+        extra = {k: v for k, v in body.items() if k not in _SDK_PARAMS and k not in _NOT_HASHED}
+        if extra:
+            params["extra_body"] = extra
+        if body.get("stream"):
+            params["stream"] = True  # streamed calls are cached under their own key
+        for run_idx in range(1, self.runs + 1):
+            key = cache_key(body["model"], body["messages"], params, namespace=f"run={run_idx}")
+            row = self.db.execute("SELECT body FROM responses WHERE key = ?", (key,)).fetchone()
+            if row is not None:
+                return json.loads(row[0])
+        return None
+
+
+class PrefixCache:
+    """Per-model prompt prefixes seen so far, in fixed-size blocks (hash of the whole prefix per block)."""
+
+    def __init__(self, block_chars: int):
+        self.block = block_chars
+        self.seen: Dict[str, set] = {}
+
+    def cached_chars(self, model: str, text: str) -> int:
+        """Length of the longest block-aligned prefix of `text` already seen for `model`; records `text`."""
+        seen = self.seen.setdefault(model, set())
+        h = hashlib.sha256()
+        hit, missed = 0, False
+        for end in range(self.block, len(text) + 1, self.block):
+            h.update(text[end - self.block:end].encode("utf-8"))
+            digest = h.digest()
+            if not missed and digest in seen:
+                hit = end
+            else:
+                missed = True
+                seen.add(digest)
+        return hit
+
+
+# =========================================
+# Server
+# =========================================
+class MockServer:
+    def __init__(self, args: argparse.Namespace):
+        self.args = args
+        self.gold = load_gold()
+        self.latency = parse_latency(args.latency)
+        self.replayer = Replayer(Path(args.replay), args.runs) if args.replay else None
+        self.prefix_cache = PrefixCache(args.prefix_cache) if args.prefix_cache > 0 else None
+        self.served = 0
+        self.injected = {"error": 0, "rate_limit": 0, "malformed": 0, "replayed": 0}
+        self.started = time.monotonic()
+
+    def completion(self, body: Dict[str, Any]) -> Dict[str, Any]:
+        if self.replayer is not None:
+            recorded = self.replayer.lookup(body)
+            if recorded is not None:
+                self.injected["replayed"] += 1
+                return recorded
+        prompt = body["messages"][-1]["content"]
+        value = synthetic_gold(prompt)
+        if value is not None:
+            gold_json, gold_toon = "".join(synthetic.iter_json(value)), toon.encode(value)
+        else:
+            gold_json, gold_toon = self.gold[detect_case(prompt)]
+        text = f"```toon\n{gold_toon}\n```" if "TOON" in prompt else gold_json
+        if random.random() < self.args.malform_rate:
+            allowed = constraint(body)
+            broken = malform(text)
+            if allowed is None or allowed.fullmatch(broken):
+                self.injected["malformed"] += 1
+                text = broken
+        prompt_chars = sum(len(m.get("content") or "") for m in body["messages"])
+        p, c = max(1, prompt_chars // 4), max(1, len(text) // 4)
+        usage = {"prompt_tokens": p, "completion_tokens": c, "total_tokens": p + c}
+        if self.prefix_cache is not None:
+            flat = "".join(f"<{m.get('role')}>{m.get('content') or ''}" for m in body["messages"])
+            usage["prompt_tokens_details"] = {"cached_tokens": self.prefix_cache.cached_chars(body.get("model", ""), flat) // 4}
+        return {
+            "id": f"mock-{self.served}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": body.get("model", "mock"),
+            "choices": [{"index": 0, "finish_reason": "stop",
+                         "message": {"role": "assistant", "content": text}}],
+            "usage": usage,
+        }
+
+    async def stream(self, writer: asyncio.StreamWriter, body: Dict[str, Any], completion: Dict[str, Any]) -> None:
+        """Send `completion` as chat.completion.chunk SSE events (chunked transfer encoding)."""
+        head = ["HTTP/1.1 200 OK", "content-type: text/event-stream",
+                "transfer-encoding: chunked", "connection: keep-alive"]
+        writer.write(("\r\n".join(head) + "\r\n\r\n").encode("latin-1"))
+        base = {"id": completion["id"], "object": "chat.completion.chunk",
+                "created": completion["created"], "model": completion["model"]}
+
+        def event(obj: Any) -> None:
+            data = f"data: {obj if isinstance(obj, str) else json.dumps(obj)}\n\n".encode()
+            writer.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+
+        text = completion["choices"][0]["message"]["content"] or ""
+        for piece in text.splitlines(keepends=True):
+            event({**base, "choices": [{"index": 0, "delta": {"content": piece}, "finish_reason": None}]})
+            await writer.drain()
+            if self.args.token_latency > 0:
+                await asyncio.sleep(self.args.token_latency)
+        event({**base, "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}]})
+        if (body.get("stream_options") or {}).get("include_usage"):
+            event({**base, "choices": [], "usage": completion.get("usage")})
+        event("[DONE]")
+        writer.write(b"0\r\n\r\n")
+        await writer.drain()
+
+    async def respond(self, body: Dict[str, Any]) -> Tuple[int, Dict[str, str], Any]:
+        """(status, extra headers, payload); payload is the completion dict when it must be streamed."""
+        delay = self.latency()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        roll = random.random()
+        if roll < self.args.rate_limit_rate:
+            self.injected["rate_limit"] += 1
+            err = {"error": {"message": "Rate limit exceeded (mock)", "type": "rate_limit_error"}}
+            return 429, {"retry-after": str(self.args.retry_after)}, json.dumps(err).encode()
+        if roll < self.args.rate_limit_rate + self.args.error_rate:
+            self.injected["error"] += 1
+            err = {"error": {"message": "Internal error (mock)", "type": "server_error"}}
+            return 500, {}, json.dumps(err).encode()
+        completion = self.completion(body)
+        if body.get("stream"):
+            return 200, {}, completion  # handle() streams it
+        return 200, {}, json.dumps(completion).encode()
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                method, path, _ = request_line.decode("latin-1").split(" ", 2)
+                headers: Dict[str, str] = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                raw = await reader.readexactly(int(headers.get("content-length", "0")))
+                body = json.loads(raw or b"{}")
+                if method == "POST" and path.rstrip("/").endswith("/chat/completions"):
+                    status, extra, payload = await self.respond(body)
+                else:
+                    status, extra, payload = 404, {}, b'{"error":{"message":"not found"}}'
+                self.served += 1
+                if isinstance(payload, dict):
+                    await self.stream(writer, body, payload)
+                    continue
+                head = [f"HTTP/1.1 {status} {'OK' if status == 200 else 'ERR'}",
+                        "content-type: application/json",
+                        f"content-length: {len(payload)}",
+                        "connection: keep-alive"]
+                head += [f"{k}: {v}" for k, v in extra.items()]
+                writer.write(("\r\n".join(head) + "\r\n\r\n").encode("latin-1") + payload)
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    async def report(self, every: float) -> None:
+        while True:
+            await asyncio.sleep(every)
+            elapsed = time.monotonic() - self.started
+            print(f"[mock] served={self.served} ({self.served / elapsed:.0f} req/s) injected={self.injected}")
+
+
+async def serve(args: argparse.Namespace) -> None:
+    server = MockServer(args)
+    srv = await asyncio.start_server(server.handle, args.host, args.port, backlog=1024)
+    print(f"Mock chat-completions server on http://{args.host}:{args.port}/v1")
+    reporter = asyncio.create_task(server.report(args.stats_every)) if args.stats_every > 0 else None
+    try:
+        async with srv:
+            await srv.serve_forever()
+    finally:
+        if reporter is not None:
+            reporter.cancel()
+
+
+def build_arg_parser() -> argparse.ArgumentParser:
+    ap = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=8765)
+    ap.add_argument("--latency", default="0", help="0 | fixed:S | uniform:A,B | lognormal:MU,SIGMA (seconds)")
+    ap.add_argument("--error-rate", type=float, default=0.0, help="fraction of requests answered with HTTP 500")
+    ap.add_argument("--rate-limit-rate", type=float, default=0.0, help="fraction of requests answered with HTTP 429")
+    ap.add_argument("--retry-after", type=float, default=1.0, help="Retry-After seconds sent with 429s")
+    ap.add_argument("--token-latency", type=float, default=0.0, help="seconds between streamed chunks (one per line)")
+    ap.add_argument("--malform-rate", type=float, default=0.0, help="fraction of outputs corrupted to exercise repairs")
+    ap.add_argument("--replay", default=None, help="response cache (sqlite) to replay recorded outputs from")
+    ap.add_argument("--runs", type=int, default=10, help="run namespaces to search when replaying")
+    ap.add_argument("--prefix-cache", type=int, default=0,
+                    help="simulate a provider prefix cache with blocks of this many characters (0: off)")
+    ap.add_argument("--stats-every", type=float, default=10.0)
+    return ap
+
+
+if __name__ == "__main__":
+    try:
+        asyncio.run(serve(build_arg_parser().parse_args()))
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,254 @@
+# ratelimit.py
+"""Rate-limit-aware scheduler for concurrent API calls.
+
+Each model gets a request bucket and a token bucket (per-minute limits,
+configured up front or learned from `x-ratelimit-*` response headers), an
+in-flight cap, and a pause gate that a 429 closes for `Retry-After` seconds
+so every waiter for that model backs off together instead of retrying in
+lock-step. Token buckets are charged an estimate on admission and settled
+with the real `usage` numbers afterwards. Other models keep running while
+one is throttled.
+"""
+import asyncio
+import random
+import time
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict, Mapping, Optional
+
+class TokenBucket:
+    """Classic token bucket; `level` may go negative after settling a large call."""
+
+    def __init__(self, per_minute: float):
+        self.configure(per_minute)
+        self.level = self.capacity
+        self.updated = time.monotonic()
+
+    def configure(self, per_minute: float) -> None:
+        self.capacity = float(per_minute)
+        self.rate = float(per_minute) / 60.0  # per second
+
+    def _refill(self, now: float) -> None:
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount: float, now: float) -> float:
+        self._refill(now)
+        need = min(amount, self.capacity) - self.level
+        return need / self.rate if need > 0 else 0.0
+
+    def consume(self, amount: float) -> None:
+        self.level -= amount
+
+
+class ModelLimiter:
+    """Per-model (per-endpoint) admission state and live counters."""
+
+    def __init__(self, max_in_flight: int, rpm: Optional[float], tpm: Optional[float]):
+        self.slots = asyncio.Semaphore(max_in_flight)
+        self.lock = asyncio.Lock()
+        self.requests = TokenBucket(rpm) if rpm else None
+        self.tokens = TokenBucket(tpm) if tpm else None
+        self.paused_until = 0.0
+        self.avg_completion = 500.0  # running estimate used for token admission
+        # live stats
+        self.queued = 0
+        self.in_flight = 0
+        self.throttled_s = 0.0
+        self.rate_limited = 0
+        self.completed = 0
+
+    def wait_time(self, est_tokens: float, now: float) -> float:
+        wait = self.paused_until - now
+        if self.requests is not None:
+            wait = max(wait, self.requests.wait_time(1, now))
+        if self.tokens is not None:
+            wait = max(wait, self.tokens.wait_time(est_tokens, now))
+        return wait
+
+
+class Ticket:
+    """Handed to the caller for one admitted request; settle it with the real usage."""
+
+    def __init__(self, limiter: ModelLimiter, est_tokens: float):
+        self.limiter = limiter
+        self.est_tokens = est_tokens
+        self.queue_wait_s = 0.0
+
+    def settle(self, prompt_tokens: int, completion_tokens: int) -> None:
+        lim = self.limiter
+        if lim.tokens is not None:
+            lim.tokens.consume(prompt_tokens + completion_tokens - self.est_tokens)
+        lim.avg_completion = 0.8 * lim.avg_completion + 0.2 * completion_tokens
+
+
+def _header_seconds(value: Optional[str]) -> Optional[float]:
+    """Parse `Retry-After`-style values: '12', '1.5', '20ms', '6m0s', '1h2m3.5s'."""
+    if not value:
+        return None
+    value = value.strip()
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    if value.endswith("ms"):
+        try:
+            return float(value[:-2]) / 1000.0
+        except ValueError:
+            return None
+    total, num = 0.0, ""
+    for ch in value:
+        if ch.isdigit() or ch == ".":
+            num += ch
+        elif ch in "hms" and num:
+            total += float(num) * {"h": 3600, "m": 60, "s": 1}[ch]
+            num = ""
+        else:
+            return None
+    return total if not num else None
+
+
+def retry_after_seconds(headers: Optional[Mapping[str, str]]) -> Optional[float]:
+    if not headers:
+        return None
+    ms = headers.get("retry-after-ms")
+    if ms:
+        try:
+            return float(ms) / 1000.0
+        except ValueError:
+            pass
+    return _header_seconds(headers.get("retry-after"))
+
+
+class RateLimitScheduler:
+    def __init__(
+        self,
+        max_in_flight: int,
+        max_in_flight_per_model: int,
+        per_model_in_flight: Optional[Dict[str, int]] = None,
+        requests_per_minute: Optional[float] = None,
+        tokens_per_minute: Optional[float] = None,
+    ):
+        self.max_in_flight = max_in_flight
+        self.max_in_flight_per_model = max_in_flight_per_model
+        self.per_model_in_flight = per_model_in_flight or {}
+        self.rpm = requests_per_minute
+        self.tpm = tokens_per_minute
+        self._global: Optional[asyncio.Semaphore] = None
+        self._models: Dict[str, ModelLimiter] = {}
+
+    def limiter(self, model: str) -> ModelLimiter:
+        lim = self._models.get(model)
+        if lim is None:
+            cap = self.per_model_in_flight.get(model, self.max_in_flight_per_model)
+            lim = self._models[model] = ModelLimiter(cap, self.rpm, self.tpm)
+        return lim
+
+    @asynccontextmanager
+    async def slot(self, model: str, prompt_tokens_est: float) -> AsyncIterator[Ticket]:
+        """Admit one request for `model`: in-flight caps, buckets and any 429 pause."""
+        if self._global is None:
+            self._global = asyncio.Semaphore(self.max_in_flight)
+        lim = self.limiter(model)
+        est = prompt_tokens_est + lim.avg_completion
+        ticket = Ticket(lim, est)
+        lim.queued += 1
+        t0 = time.monotonic()
+        try:
+            # Model slot first so a throttled model never sits on a global slot
+            await lim.slots.acquire()
+            try:
+                async with lim.lock:  # FIFO admission per model
+                    while True:
+                        wait = lim.wait_time(est, time.monotonic())
+                        if wait <= 0:
+                            break
+                        lim.throttled_s += wait
+                        await asyncio.sleep(wait)
+                    if lim.requests is not None:
+                        lim.requests.consume(1)
+                    if lim.tokens is not None:
+                        lim.tokens.consume(est)
+                await self._global.acquire()
+            except BaseException:
+                lim.slots.release()
+                raise
+        finally:
+            lim.queued -= 1
+        ticket.queue_wait_s = time.monotonic() - t0
+        lim.in_flight += 1
+        try:
+            yield ticket
+        finally:
+            lim.in_flight -= 1
+            lim.completed += 1
+            self._global.release()
+            lim.slots.release()
+
+    def observe_headers(self, model: str, headers: Optional[Mapping[str, str]]) -> None:
+        """Learn limits from `x-ratelimit-*` headers and pause when a budget is exhausted."""
+        if not headers:
+            return
+        lim = self.limiter(model)
+        for kind, bucket_attr in (("requests", "requests"), ("tokens", "tokens")):
+            limit = headers.get(f"x-ratelimit-limit-{kind}")
+            if limit and getattr(lim, bucket_attr) is None:
+                try:
+                    setattr(lim, bucket_attr, TokenBucket(float(limit)))
+                except ValueError:
+                    pass
+            remaining = headers.get(f"x-ratelimit-remaining-{kind}")
+            if remaining is not None and remaining.strip() in ("0", "0.0"):
+                reset = _header_seconds(headers.get(f"x-ratelimit-reset-{kind}"))
+                if reset:
+                    self.pause(model, reset)
+
+    def pause(self, model: str, seconds: float) -> None:
+        lim = self.limiter(model)
+        lim.paused_until = max(lim.paused_until, time.monotonic() + seconds)
+
+    def on_rate_limited(self, model: str, headers: Optional[Mapping[str, str]], attempt: int, initial_delay: float) -> float:
+        """Record a 429 and pause the model; returns the delay applied."""
+        lim = self.limiter(model)
+        lim.rate_limited += 1
+        delay = retry_after_seconds(headers)
+        if delay is None:
+            delay = backoff_delay(attempt, initial_delay)
+        else:
+            delay += random.uniform(0, 0.25 * delay + 0.1)  # de-synchronise waiters
+        self.pause(model, delay)
+        self.observe_headers(model, headers)
+        return delay
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        now = time.monotonic()
+        return {
+            model: {
+                "queued": lim.queued,
+                "in_flight": lim.in_flight,
+                "completed": lim.completed,
+                "rate_limited": lim.rate_limited,
+                "throttled_s": round(lim.throttled_s, 2),
+                "paused_s": round(max(0.0, lim.paused_until - now), 2),
+            }
+            for model, lim in self._models.items()
+        }
+
+    def format_snapshot(self) -> str:
+        snap = self.snapshot()
+        queued = sum(s["queued"] for s in snap.values())
+        in_flight = sum(s["in_flight"] for s in snap.values())
+        throttled = sum(s["throttled_s"] for s in snap.values())
+        busiest = sorted(snap.items(), key=lambda kv: -kv[1]["queued"])[:3]
+        detail = ", ".join(f"{m}: q={s['queued']} f={s['in_flight']} thr={s['throttled_s']}s" for m, s in busiest)
+        return f"[scheduler] queued={queued} in_flight={in_flight} throttled={throttled:.1f}s | {detail}"
+
+    async def report(self, every: float) -> None:
+        """Print live queue depth / throttle time until cancelled."""
+        while True:
+            await asyncio.sleep(every)
+            print(self.format_snapshot())
+
+
+def backoff_delay(attempt: int, initial_delay: float, cap: float = 60.0) -> float:
+    """Full-jitter exponential backoff."""
+    return random.uniform(0, min(cap, initial_delay * (2 ** attempt)))
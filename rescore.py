@@ -0,0 +1,145 @@
+# rescore.py
+"""Re-score a finished sweep from its ledger of raw outputs, without API calls.
+
+eval.py records every attempt (raw output, decoded object, error, usage,
+timing) in `ledger.sqlite` next to its results store. After a change to
+decoding, validation, canonicalisation or local repair, this replays every
+stored output through the same scoring code (`eval.rescore_unit`), spread
+over worker processes, and writes:
+
+- a fresh results store (default `<store>_rescored/`) with the new outcomes
+  and the recorded tokens and timings;
+- eval_results_by_model.csv and eval_results_by_case.csv from it (the
+  aggregate.py tables), inside that store unless --tables-dir says otherwise.
+
+It then prints one-shot / final accuracy per track, before and after. A unit
+ends at its first successful attempt, as it does live: re-scoring can end a
+unit earlier but cannot add attempts that were never sent.
+
+Usage:
+    python rescore.py [results] [--out results_rescored] [--workers N] [--tables-dir DIR]
+"""
+import argparse
+import os
+import shutil
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+import aggregate
+import eval as harness
+from ledger import LEDGER_NAME, Ledger, Unit
+from results_store import Columns, ResultsStore, UnitTable
+
+Job = Tuple[str, str, List[Tuple[str, Optional[str]]]]  # (case, track, [(output, abort reason)])
+Rescored = Tuple[List[Optional[str]], bool, bool]       # (error per kept attempt, one-shot, final)
+CHUNK = 256  # units per worker task
+
+
+def _rescore_chunk(jobs: List[Job]) -> List[Rescored]:
+    return [harness.rescore_unit(case, track, attempts) for case, track, attempts in jobs]
+
+
+def rescore(units: List[Unit], workers: int) -> List[Rescored]:
+    jobs = [(u.case, u.track, [(a.output, a.error if a.aborted else None) for a in u.attempts]) for u in units]
+    # Units of one case stay together so each worker builds that case's gold once
+    order = sorted(range(len(jobs)), key=lambda i: (jobs[i][0], jobs[i][1]))
+    chunks = [[jobs[i] for i in order[k:k + CHUNK]] for k in range(0, len(order), CHUNK)]
+    if workers <= 1:
+        done = [r for chunk in chunks for r in _rescore_chunk(chunk)]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            done = [r for part in pool.map(_rescore_chunk, chunks) for r in part]
+    out: List[Optional[Rescored]] = [None] * len(jobs)
+    for i, r in zip(order, done):
+        out[i] = r
+    return out
+
+
+def to_columns(store: ResultsStore, units: List[Unit], rescored: List[Rescored]) -> Columns:
+    """Attempt records for the new store: recorded usage and timing, new outcomes."""
+    cols = Columns.empty(sum(len(errors) for errors, _, _ in rescored))
+    i = 0
+    for u, (errors, _, final) in zip(units, rescored):
+        kept = u.attempts[:len(errors)]
+        j = i + len(kept)
+        cols["model"][i:j] = store.code("model", u.model)
+        cols["run"][i:j] = u.run
+        cols["case"][i:j] = store.code("case", u.case)
+        cols["track"][i:j] = store.code("track", u.track)
+        cols["attempt"][i:j] = np.arange(1, len(kept) + 1)
+        cols["ok"][j - 1] = final  # tracks stop at the first attempt that matches gold
+        cols["aborted"][i:j] = [a.aborted for a in kept]
+        cols["prompt_tokens"][i:j] = [a.prompt_tokens for a in kept]
+        cols["completion_tokens"][i:j] = [a.completion_tokens for a in kept]
+        for name in ("queue_s", "ttft_s", "gen_s"):
+            cols[name][i:j] = [np.nan if getattr(a, name) is None else getattr(a, name) for a in kept]
+        i = j
+    return cols
+
+
+def accuracy_by_track(store: ResultsStore) -> dict:
+    """track -> (units, one-shot accuracy, final accuracy)."""
+    rec = store.load()
+    if not len(rec):
+        return {}
+    units = UnitTable(rec)
+    out = {}
+    for t, track in enumerate(store.dims["track"]):
+        present = units.present[..., t]
+        n = int(present.sum())
+        if n:
+            out[track] = (n, float(units.one_shot[..., t][present].mean()), float(units.final[..., t][present].mean()))
+    return out
+
+
+def main(argv=None) -> None:
+    ap = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    ap.add_argument("store", nargs="?", default="results", help="results store directory holding ledger.sqlite")
+    ap.add_argument("--out", default=None, help="new results store (default: <store>_rescored)")
+    ap.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    ap.add_argument("--tables-dir", default=None, help="where to write the two summary CSVs (default: the --out store)")
+    args = ap.parse_args(argv)
+
+    src = Path(args.store)
+    out = Path(args.out) if args.out else src.with_name(src.name + "_rescored")
+    if out.resolve() == src.resolve():
+        raise SystemExit("--out must differ from the source store")
+    t0 = time.perf_counter()
+    ledger = Ledger(src / LEDGER_NAME)
+    units = list(ledger.units())
+    ledger.close()
+    if not units:
+        raise SystemExit(f"No ledger records in {src / LEDGER_NAME}; run eval.py first")
+    rescored = rescore(units, args.workers)
+    t_score = time.perf_counter() - t0
+
+    if (out / "dims.json").exists():
+        shutil.rmtree(out)  # a previous re-score
+    store = ResultsStore(out)
+    for dim, names in ResultsStore(src).dims.items():  # keep the source's codes, so tables keep their row order
+        for name in names:
+            store.code(dim, name)
+    store.append(to_columns(store, units, rescored))
+    store.close()
+    units_table = UnitTable(store.load())
+    tables_dir = Path(args.tables_dir) if args.tables_dir else out
+    tables_dir.mkdir(parents=True, exist_ok=True)
+    aggregate.write_table(tables_dir / "eval_results_by_model.csv", aggregate.model_table(store, units_table))
+    aggregate.write_table(tables_dir / "eval_results_by_case.csv", aggregate.case_table(store, units_table))
+
+    before, after = accuracy_by_track(ResultsStore(src)), accuracy_by_track(store)
+    print(f"  {'track':<14} {'units':>6} {'1S before':>10} {'1S after':>9} {'F before':>9} {'F after':>8}")
+    for track, (n, one_shot, final) in after.items():
+        _, one_shot_0, final_0 = before.get(track, (0, float("nan"), float("nan")))
+        print(f"  {track:<14} {n:>6} {one_shot_0:>10.3f} {one_shot:>9.3f} {final_0:>9.3f} {final:>8.3f}")
+    print(f"Re-scored {len(units)} units ({sum(len(u.attempts) for u in units)} attempts) with {args.workers} "
+          f"worker(s) in {t_score:.2f}s -> {out}, {tables_dir / 'eval_results_by_model.csv'}, "
+          f"{tables_dir / 'eval_results_by_case.csv'}")
+
+
+if __name__ == "__main__":
+    main()
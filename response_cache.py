@@ -0,0 +1,112 @@
+# response_cache.py
+"""Persistent, content-addressed cache for deterministic chat completions.
+
+Entries are keyed on sha256 of (model, messages, response_format, sampling
+params, namespace) and hold the full response JSON, `usage` included, so
+token accounting on a replay matches the original call. Storage is a single
+SQLite file with size-bounded LRU eviction.
+
+Modes:
+  off     - never touch the cache
+  read    - read-through: serve hits, call the API on a miss and store it
+  write   - write-through: always call the API, store/refresh the entry
+  replay  - serve hits only; a miss raises CacheMiss (zero API calls)
+"""
+import hashlib
+import json
+import sqlite3
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+MODES = ("off", "read", "write", "replay")
+
+class CacheMiss(LookupError):
+    """Raised in replay mode when a request has no stored response."""
+
+
+def cache_key(model: str, messages: List[Dict[str, Any]], params: Dict[str, Any], namespace: str = "") -> str:
+    blob = json.dumps(
+        {"model": model, "messages": messages, "params": params, "ns": namespace},
+        sort_keys=True, ensure_ascii=False, separators=(",", ":"),
+    )
+    return hashlib.sha256(blob.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    def __init__(self, path: Path, mode: str = "read", max_bytes: int = 512 * 1024 * 1024):
+        if mode not in MODES:
+            raise ValueError(f"Unknown cache mode {mode!r}; expected one of {MODES}")
+        self.mode = mode
+        self.path = Path(path)
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._db: Optional[sqlite3.Connection] = None
+        self._bytes: Optional[int] = None
+
+    @property
+    def reads(self) -> bool:
+        return self.mode in ("read", "replay")
+
+    @property
+    def writes(self) -> bool:
+        return self.mode in ("read", "write")
+
+    def _conn(self) -> sqlite3.Connection:
+        if self._db is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._db = sqlite3.connect(self.path)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                " key TEXT PRIMARY KEY, model TEXT NOT NULL, body TEXT NOT NULL,"
+                " size INTEGER NOT NULL, created REAL NOT NULL, last_access REAL NOT NULL)"
+            )
+            self._db.execute("CREATE INDEX IF NOT EXISTS responses_lru ON responses(last_access)")
+            self._bytes = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        return self._db
+
+    def get(self, key: str) -> Optional[str]:
+        """Stored response JSON for `key`, or None. Touches the entry for LRU."""
+        db = self._conn()
+        row = db.execute("SELECT body FROM responses WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        db.execute("UPDATE responses SET last_access = ? WHERE key = ?", (time.time(), key))
+        db.commit()
+        return row[0]
+
+    def put(self, key: str, model: str, body: str) -> None:
+        db = self._conn()
+        size = len(body.encode("utf-8"))
+        now = time.time()
+        old = db.execute("SELECT size FROM responses WHERE key = ?", (key,)).fetchone()
+        db.execute(
+            "INSERT OR REPLACE INTO responses (key, model, body, size, created, last_access) VALUES (?, ?, ?, ?, ?, ?)",
+            (key, model, body, size, now, now),
+        )
+        self._bytes += size - (old[0] if old else 0)
+        if self._bytes > self.max_bytes:
+            self._evict()
+        db.commit()
+
+    def _evict(self) -> None:
+        """Drop least-recently-used entries until the cache is back under 90% of max_bytes."""
+        db = self._conn()
+        target = int(self.max_bytes * 0.9)
+        for key, size in db.execute("SELECT key, size FROM responses ORDER BY last_access").fetchall():
+            if self._bytes <= target:
+                break
+            db.execute("DELETE FROM responses WHERE key = ?", (key,))
+            self._bytes -= size
+
+    def stats(self) -> str:
+        return f"[cache] mode={self.mode} hits={self.hits} misses={self.misses} size={(self._bytes or 0) / 1e6:.1f}MB"
+
+    def close(self) -> None:
+        if self._db is not None:
+            self._db.close()
+            self._db = None
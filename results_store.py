@@ -0,0 +1,279 @@
+# results_store.py
+"""Columnar long-format results store: one record per (model, run, case, track, attempt).
+
+Each field is its own append-only binary column file, so loading millions of
+attempts is one contiguous `np.fromfile` per column and aggregation is plain
+array arithmetic (bincount over dense unit ids). Strings (model / case /
+track) are stored as small integer codes whose dictionaries live next to the
+data.
+
+Layout of the store directory (default `results/`):
+  <field>.bin   one column per field of ATTEMPT_DTYPE, appended and fsync'ed
+                one unit at a time (a torn tail is cut to the shortest column,
+                on disk before the first append and when loading)
+  dims.json     {"model": [...], "case": [...], "track": [...]} code -> name
+
+An attempt is `ok` when its output matched gold. A unit's one-shot result is
+attempt 1's `ok`, its final result is "any attempt ok", and its tokens are
+the sum over attempts. If a unit is recorded again (e.g. a re-run sweep),
+only its latest block of attempts counts.
+"""
+import csv
+import json
+import os
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+ATTEMPT_DTYPE = np.dtype([
+    ("model", "<u2"), ("run", "<u2"), ("case", "<u2"), ("track", "<u1"), ("attempt", "<u1"),
+    ("ok", "?"), ("aborted", "?"),
+    ("prompt_tokens", "<u4"), ("completion_tokens", "<u4"),
+    ("queue_s", "<f4"), ("ttft_s", "<f4"), ("gen_s", "<f4"),  # NaN when not measured
+])
+DIMS = ("model", "case", "track")
+
+
+class Columns(dict):
+    """Field name -> contiguous column array, all the same length."""
+
+    def __len__(self) -> int:
+        return len(self["model"]) if "model" in self else 0
+
+    def take(self, index: np.ndarray) -> "Columns":
+        out = Columns({name: col[index] for name, col in self.items()})
+        cached = getattr(self, "_index", None)
+        if cached is not None:
+            out._index = (cached[0][index], cached[1])
+        return out
+
+    @classmethod
+    def empty(cls, n: int = 0) -> "Columns":
+        return cls({name: np.zeros(n, dtype=ATTEMPT_DTYPE[name]) for name in ATTEMPT_DTYPE.names})
+
+    @classmethod
+    def concat(cls, parts: List["Columns"]) -> "Columns":
+        if not parts:
+            return cls.empty()
+        return cls({name: np.concatenate([p[name] for p in parts]) for name in ATTEMPT_DTYPE.names})
+
+
+def _nan(value: Optional[float]) -> float:
+    return float("nan") if value is None or value == "" else float(value)
+
+
+class ResultsStore:
+    def __init__(self, root: Path = Path("results")):
+        self.root = Path(root)
+        self.dims_path = self.root / "dims.json"
+        self.dims: Dict[str, List[str]] = {d: [] for d in DIMS}
+        if self.dims_path.exists():
+            self.dims.update(json.loads(self.dims_path.read_text(encoding="utf-8")))
+        self._codes = {d: {name: i for i, name in enumerate(names)} for d, names in self.dims.items()}
+        self._files: Dict[str, Any] = {}
+
+    def column_path(self, name: str) -> Path:
+        return self.root / f"{name}.bin"
+
+    def code(self, dim: str, name: str) -> int:
+        """Integer code for `name`, registering (and persisting) it on first use."""
+        codes = self._codes[dim]
+        if name not in codes:
+            codes[name] = len(self.dims[dim])
+            self.dims[dim].append(name)
+            self.root.mkdir(parents=True, exist_ok=True)
+            tmp = self.dims_path.with_suffix(".tmp")
+            tmp.write_text(json.dumps(self.dims, ensure_ascii=False, indent=2), encoding="utf-8")
+            os.replace(tmp, self.dims_path)
+        return codes[name]
+
+    def append(self, cols: Columns) -> None:
+        if not len(cols):
+            return
+        if not self._files:
+            self.root.mkdir(parents=True, exist_ok=True)
+            self._cut_torn_tail()
+            self._files = {name: self.column_path(name).open("ab") for name in ATTEMPT_DTYPE.names}
+        for name, f in self._files.items():
+            cols[name].astype(ATTEMPT_DTYPE[name], copy=False).tofile(f)
+            f.flush()
+            os.fsync(f.fileno())
+
+    def append_unit(self, model: str, run: int, case: str, track: str, result: Dict[str, Any]) -> None:
+        """Record every attempt of one evaluated unit (the `attempts` list of a track result)."""
+        attempts = result.get("attempts") or []
+        n = len(attempts)
+        cols = Columns.empty(n)
+        cols["model"][:] = self.code("model", model)
+        cols["run"][:] = run
+        cols["case"][:] = self.code("case", case)
+        cols["track"][:] = self.code("track", track)
+        cols["attempt"][:] = np.arange(1, n + 1)
+        if n and result["final_ok"]:
+            cols["ok"][-1] = True  # tracks stop at the first attempt that matches gold
+        cols["aborted"][:] = [bool(a.get("aborted")) for a in attempts]
+        cols["prompt_tokens"][:] = [a.get("prompt_tokens", 0) for a in attempts]
+        cols["completion_tokens"][:] = [a.get("completion_tokens", 0) for a in attempts]
+        for name in ("queue_s", "ttft_s", "gen_s"):
+            cols[name][:] = [_nan(a.get(name)) for a in attempts]
+        self.append(cols)
+
+    def _records_on_disk(self) -> int:
+        """Complete records in every column (0 if a column is missing)."""
+        paths = {name: self.column_path(name) for name in ATTEMPT_DTYPE.names}
+        if not all(p.exists() for p in paths.values()):
+            return 0
+        return min(p.stat().st_size // ATTEMPT_DTYPE[name].itemsize for name, p in paths.items())
+
+    def _cut_torn_tail(self) -> None:
+        """Truncate every column to the shortest one, so a crash between column writes
+        does not shift the records appended after it."""
+        n = self._records_on_disk()
+        for name in ATTEMPT_DTYPE.names:
+            path = self.column_path(name)
+            size = n * ATTEMPT_DTYPE[name].itemsize
+            if path.exists() and path.stat().st_size != size:
+                with path.open("r+b") as f:
+                    f.truncate(size)
+                    f.flush()
+                    os.fsync(f.fileno())
+
+    def load(self) -> Columns:
+        """All current records (superseded unit blocks and a torn tail dropped)."""
+        paths = {name: self.column_path(name) for name in ATTEMPT_DTYPE.names}
+        if not all(p.exists() for p in paths.values()):
+            return Columns.empty()
+        n = self._records_on_disk()
+        cols = Columns({name: np.fromfile(p, dtype=ATTEMPT_DTYPE[name], count=n) for name, p in paths.items()})
+        return latest_blocks(cols)
+
+    def close(self) -> None:
+        for f in self._files.values():
+            f.close()
+        self._files = {}
+
+
+# =========================================
+# Dense unit indexing
+# =========================================
+def unit_index(rec: Columns):
+    """(flat unit id per record, shape (models, runs, cases, tracks)) for bincount-style grouping.
+
+    Cached on `rec` so filtering and aggregation share one computation.
+    """
+    cached = getattr(rec, "_index", None)
+    if cached is not None:
+        return cached
+    names = ("model", "run", "case", "track")
+    shape = tuple(int(rec[name].max()) + 1 for name in names)
+    flat = rec["model"].astype(np.intp)  # bincount's native index type
+    for name, size in zip(names[1:], shape[1:]):
+        flat *= size
+        flat += rec[name]
+    rec._index = (flat, shape)
+    return rec._index
+
+
+def latest_blocks(rec: Columns) -> Columns:
+    """Drop attempts that belong to an earlier recording of the same unit."""
+    if not len(rec):
+        return rec
+    flat, shape = unit_index(rec)
+    starts = np.flatnonzero(rec["attempt"] == 1)
+    if np.bincount(flat[starts]).max() <= 1:
+        return rec  # every unit recorded once (the usual case)
+    last_start = np.full(int(np.prod(shape)), -1, dtype=np.int64)
+    np.maximum.at(last_start, flat[starts], starts)
+    return rec.take(np.arange(len(rec)) >= last_start[flat])
+
+
+class UnitTable:
+    """Per-unit arrays of shape (models, runs, cases, tracks); `present` marks recorded units."""
+
+    def __init__(self, rec: Columns):
+        flat, shape = unit_index(rec)
+        n = int(np.prod(shape))
+
+        def total(values: np.ndarray) -> np.ndarray:
+            return np.bincount(flat, weights=values, minlength=n).reshape(shape)
+
+        def nan_total(values: np.ndarray) -> np.ndarray:
+            """Sum over attempts; NaN when no attempt of the unit has a value."""
+            seen = ~np.isnan(values)
+            if not seen.any():
+                return np.full(shape, np.nan)
+            if seen.all():
+                return np.where(self.present, total(values), np.nan)
+            sums = np.bincount(flat[seen], weights=values[seen], minlength=n)
+            counts = np.bincount(flat[seen], minlength=n)
+            return np.where(counts > 0, sums, np.nan).reshape(shape)
+
+        self.shape = shape
+        self.attempts = np.bincount(flat, minlength=n).reshape(shape)
+        self.present = self.attempts > 0
+        first = rec["attempt"] == 1
+        one_shot = np.zeros(n, dtype=bool)
+        one_shot[flat[first]] = rec["ok"][first]
+        self.one_shot = one_shot.reshape(shape)
+        self.final = np.bincount(flat[rec["ok"]], minlength=n).reshape(shape) > 0
+        completion = rec["completion_tokens"].astype(np.float64)
+        self.tokens = total(rec["prompt_tokens"] + completion)
+        self.queue_s = nan_total(rec["queue_s"].astype(np.float64))
+        self.gen_s = nan_total(rec["gen_s"].astype(np.float64))
+        ttft = rec["ttft_s"].astype(np.float64)
+        ttft_seen = ~np.isnan(ttft)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            if ttft_seen.any():
+                ttft_n = np.bincount(flat[ttft_seen], minlength=n).reshape(shape)
+                self.ttft_s = nan_total(ttft) / np.where(ttft_n > 0, ttft_n, np.nan)
+                decode_s = nan_total(rec["gen_s"] - np.where(ttft_seen, ttft, 0.0))
+            else:
+                self.ttft_s = np.full(shape, np.nan)
+                decode_s = self.gen_s
+            self.tokens_per_s = np.where(decode_s > 0, total(completion) / decode_s, np.nan)
+
+
+# =========================================
+# Import of the wide per-run CSV
+# =========================================
+def import_runs_csv(store: ResultsStore, csv_path: Path, tracks=("json", "json_plain", "toon", "toon_local", "toon_so", "toon_tailored")) -> int:
+    """Convert eval_runs.csv rows to attempt records; returns the number of records added.
+
+    The wide CSV has no per-attempt detail, so a unit's tokens and latency are
+    attributed to attempt 1; later attempts carry only their ok flag. Rows are
+    numbered as runs 1..N per model in file order, so rows that repeat a
+    (model, run) pair from a restarted sweep stay separate observations.
+    """
+    seen: Dict[str, int] = {}
+    with csv_path.open("r", newline="", encoding="utf-8") as f:
+        reader = csv.DictReader(f)
+        cases = [c[: -len("_json_one_shot")] for c in reader.fieldnames if c.endswith("_json_one_shot")]
+        chunks = []
+        for row in reader:
+            run = seen[row["model"]] = seen.get(row["model"], 0) + 1
+            for case in cases:
+                for track in tracks:
+                    p = f"{case}_{track}"
+                    if f"{p}_attempts" not in row:
+                        continue
+                    n = max(1, int(row[f"{p}_attempts"] or 1))
+                    one_shot = row[f"{p}_one_shot"] == "True"
+                    final = row[f"{p}_final"] == "True"
+                    recs = np.zeros(n, dtype=ATTEMPT_DTYPE)
+                    recs["model"] = store.code("model", row["model"])
+                    recs["run"] = run
+                    recs["case"] = store.code("case", case)
+                    recs["track"] = store.code("track", track)
+                    recs["attempt"] = np.arange(1, n + 1)
+                    recs["ok"][-1] = final
+                    recs["ok"][0] = one_shot or (n == 1 and final)
+                    recs["queue_s"] = recs["ttft_s"] = recs["gen_s"] = np.nan
+                    recs[0]["prompt_tokens"] = int(float(row.get(f"{p}_prompt_tokens") or 0))
+                    recs[0]["completion_tokens"] = int(float(row.get(f"{p}_completion_tokens") or 0))
+                    for name in ("queue_s", "ttft_s", "gen_s"):
+                        recs[0][name] = _nan(row.get(f"{p}_{name}"))
+                    chunks.append(recs)
+    records = np.concatenate(chunks) if chunks else np.zeros(0, dtype=ATTEMPT_DTYPE)
+    store.append(Columns({name: np.ascontiguousarray(records[name]) for name in ATTEMPT_DTYPE.names}))
+    return len(records)
@@ -0,0 +1,77 @@
+# schemas.py
+"""Pydantic models for the benchmark cases. Importing this module has no side effects."""
+from typing import List, Literal, Optional
+from pydantic import BaseModel, ConfigDict, Field
+
+# ---------- Pydantic models (simple) ----------
+class UserRow(BaseModel):
+    model_config = ConfigDict(extra='forbid', strict=True)
+    id: int
+    name: str = Field(min_length=1)
+    role: Literal['admin', 'staff', 'guest']
+
+class Customer(BaseModel):
+    model_config = ConfigDict(extra='forbid', strict=True)
+    id: int
+    name: str
+
+class OrderItem(BaseModel):
+    model_config = ConfigDict(extra='forbid', strict=True)
+    sku: str
+    qty: int
+    price: float
+
+class Order(BaseModel):
+    model_config = ConfigDict(extra='forbid', strict=True)
+    id: int
+    customer: Customer
+    items: List[OrderItem]
+
+
+# ---------- Pydantic models (more complex #1: company) ----------
+class Employee(BaseModel):
+    model_config = ConfigDict(extra='forbid', strict=True)
+    id: int
+    name: str
+    title: Literal['engineer', 'manager', 'analyst']
+
+class Department(BaseModel):
+    model_config = ConfigDict(extra='forbid', strict=True)
+    code: str
+    name: str
+    employees: List[Employee]
+
+class Company(BaseModel):
+    model_config = ConfigDict(extra='forbid', strict=True)
+    id: int
+    name: str
+    departments: List[Department]
+
+
+# ---------- Pydantic models (more complex #2: invoice) ----------
+class InvoiceLine(BaseModel):
+    model_config = ConfigDict(extra='forbid', strict=True)
+    sku: str
+    qty: int
+    unit_price: float
+    line_total: float  # keep explicit to avoid computed logic here
+
+class Totals(BaseModel):
+    model_config = ConfigDict(extra='forbid', strict=True)
+    subtotal: float
+    tax: float
+    grand_total: float
+
+class Invoice(BaseModel):
+    model_config = ConfigDict(extra='forbid', strict=True)
+    number: str
+    currency: Literal['USD', 'EUR', 'SAR']
+    customer: Customer
+    items: List[InvoiceLine]
+    totals: Totals
+    notes: Optional[str] = None
+
+
+# ---------- Payload wrapper (users case is a bare array under "users") ----------
+class UsersPayload(BaseModel):
+    users: List[UserRow]
@@ -0,0 +1,433 @@
+# stream_check.py
+"""Incremental checks over a streaming completion, for early abort.
+
+A checker is fed the accumulated completion text after each chunk and
+returns an error string as soon as the output can no longer pass decoding
+and validation, whatever the model writes next:
+
+  TOON - syntax/indentation errors, `[N]` row/item overflow or an array that
+         closes short, unknown keys under extra='forbid'
+  JSON - prose outside the JSON (or its fence), extra data after the value,
+         mismatched brackets, unknown keys under extra='forbid'
+
+Everything else (missing fields, wrong values) is left to the normal
+validator once the completion finishes.
+"""
+import re
+import typing
+from typing import Any, Dict, List, Optional, Type
+
+from pydantic import BaseModel
+
+import toon
+
+# =========================================
+# Schema key tree (which keys are allowed where)
+# =========================================
+class KeyNode:
+    __slots__ = ("fields", "forbid")
+
+    def __init__(self, fields: Dict[str, Optional["KeyNode"]], forbid: bool):
+        self.fields = fields  # key -> child node (None for scalars / free-form values)
+        self.forbid = forbid  # extra='forbid' on the model
+
+
+def _model_in(annotation: Any) -> Optional[Type[BaseModel]]:
+    """The BaseModel inside X, List[X], Optional[X] ... if any."""
+    if isinstance(annotation, type) and issubclass(annotation, BaseModel):
+        return annotation
+    for arg in typing.get_args(annotation):
+        found = _model_in(arg)
+        if found is not None:
+            return found
+    return None
+
+
+def key_tree(model: Type[BaseModel], wrapper_key: Optional[str] = None) -> KeyNode:
+    """Allowed keys per nesting level; `wrapper_key` allows {"order": {...}} style wrapping at the root."""
+    fields: Dict[str, Optional[KeyNode]] = {}
+    for name, info in model.model_fields.items():
+        child = _model_in(info.annotation)
+        fields[name] = key_tree(child) if child is not None else None
+    node = KeyNode(fields, model.model_config.get("extra") == "forbid")
+    if wrapper_key and wrapper_key not in fields:
+        node.fields = {**fields, wrapper_key: KeyNode(fields, node.forbid)}
+    return node
+
+
+def unknown_key(value: Any, node: Optional[KeyNode], path: str = "") -> Optional[str]:
+    """JSON Pointer of the first key not allowed by `node`, or None."""
+    if node is None:
+        return None
+    if isinstance(value, list):
+        for i, item in enumerate(value):
+            found = unknown_key(item, node, f"{path}/{i}")
+            if found:
+                return found
+        return None
+    if not isinstance(value, dict):
+        return None
+    for key, child in value.items():
+        if key not in node.fields:
+            if node.forbid:
+                return f"{path}/{key}"
+            continue
+        found = unknown_key(child, node.fields[key], f"{path}/{key}")
+        if found:
+            return found
+    return None
+
+
+_THINK_OPEN = re.compile(r"^\s*<think>", re.IGNORECASE)
+
+def _strip_think(text: str) -> Optional[str]:
+    """Text after a leading <think>...</think> block; None while the block is still open."""
+    if not _THINK_OPEN.match(text):
+        head = text.lstrip()[:7].lower()
+        return None if head and len(head) < 7 and "<think>".startswith(head) else text
+    end = text.find("</think>")
+    return None if end < 0 else text[end + len("</think>"):]
+
+
+# =========================================
+# TOON
+# =========================================
+_TOON_FENCE = re.compile(r"```toon", re.IGNORECASE)
+
+
+class _Frame:
+    __slots__ = ("kind", "depth", "node", "path", "header", "hdr", "count")
+
+    def __init__(self, kind: str, depth: int, node: Optional[KeyNode], path: str,
+                 header: Optional[toon._Header] = None, hdr: Optional[toon._Line] = None):
+        self.kind = kind      # "obj", "rows" (tabular array) or "list" ('- ' items)
+        self.depth = depth    # indentation level of the container's fields / items
+        self.node = node
+        self.path = path      # JSON Pointer of the container
+        self.header = header
+        self.hdr = hdr        # header line, for count errors
+        self.count = 0        # rows / items seen so far
+
+
+class ToonStreamChecker:
+    """Line-level mirror of `toon.decode(partial=True)`: keeps the stack of open
+    containers, so each feed parses only the lines completed since the last one."""
+
+    def __init__(self, schema_model: Type[BaseModel], wrapper_key: Optional[str] = None):
+        self.node = key_tree(schema_model, wrapper_key)
+        self._lex = toon._Parser("")  # key / header splitting
+        self._body: Optional[int] = None   # offset of the text after any <think> block
+        self._scan = 0                     # where to look for the opening fence next
+        self._pos: Optional[int] = None    # start of the first unparsed payload line
+        self._close_from = 0               # where to look for the closing fence next
+        self._num = 0                      # payload lines parsed
+        self._blank = False                # blank line(s) right before the next one
+        self._pending: Optional[toon._Line] = None  # first line without ':' (root primitive?)
+        self._stack: Optional[List[_Frame]] = None  # None until the first line, [] once the root closed
+        self._error: Optional[str] = None
+        self._closed = False
+
+    def feed(self, text: str) -> Optional[str]:
+        if self._error or self._closed:
+            return self._error
+        if self._body is None:
+            body = _strip_think(text)
+            if body is None:
+                return None
+            self._body = self._scan = len(text) - len(body)
+        if self._pos is None:
+            m = _TOON_FENCE.search(text, self._scan)
+            if not m:
+                self._scan = max(self._scan, len(text) - 6)
+                return None  # unfenced output (or fence not seen yet): leave it to the final decode
+            self._scan = m.start()
+            nl = text.find("\n", m.end())
+            if nl < 0:
+                return None
+            self._pos = self._close_from = nl + 1
+        close = text.find("```", self._close_from)
+        if close >= 0:
+            end = close
+        else:
+            self._close_from = max(self._pos, len(text) - 2)
+            end = text.rfind("\n", self._pos) + 1  # complete lines only
+            if end <= self._pos:
+                return None
+        lines = text[self._pos:end].split("\n")
+        if close < 0:
+            lines.pop()  # the empty piece after the last newline
+        self._pos = end
+        try:
+            for raw in lines:
+                self._num += 1
+                self._error = self._line(raw)
+                if self._error:
+                    return self._error
+            if close >= 0:
+                self._closed = True
+                self._finish()
+        except toon.ToonDecodeError as e:
+            self._error = f"TOON decode error while streaming: {e}"
+        return self._error
+
+    # ---- lines ----
+    def _line(self, raw: str) -> Optional[str]:
+        ln = toon._scan_line(raw, self._num)
+        if ln is None:
+            self._blank = True
+            return None
+        blank, self._blank = self._blank, False
+        if self._stack is None:
+            return self._root(ln)
+        if self._pending is not None:  # a second line: the first was not a lone primitive
+            first, self._pending = self._pending, None
+            self._field(first.text, first, 1, 0, self.node, "")
+        stack = self._stack
+        while stack and stack[-1].depth > ln.depth:
+            self._close(stack.pop())
+        if not stack:
+            raise toon.ToonDecodeError("unexpected content after document root", ln.num, ln.indent + 1)
+        top = stack[-1]
+        if top.depth < ln.depth:
+            raise toon.ToonDecodeError("unexpected indentation", ln.num, ln.indent + 1)
+        if top.kind == "obj":
+            return self._field(ln.text, ln, ln.indent + 1, top.depth, top.node, top.path)
+        if blank and top.count:
+            raise toon.ToonDecodeError("blank line inside array", ln.num - 1, 1)
+        if top.kind == "rows":
+            return self._table_row(top, ln)
+        return self._list_item(top, ln)
+
+    def _root(self, ln: toon._Line) -> Optional[str]:
+        if ln.depth != 0:
+            raise toon.ToonDecodeError("unexpected indentation at document root", ln.num, ln.indent + 1)
+        self._stack = []
+        if ln.text.startswith("["):
+            m = toon._HEADER_RE.match(ln.text)
+            if m:
+                header = self._lex._make_header(m, ln, 1)
+                rest = ln.text[m.end():]
+                lead = len(rest) - len(rest.lstrip())
+                return self._array(header, rest.strip(), m.end() + lead + 1, ln, 1, self.node, "")
+        self._stack.append(_Frame("obj", 0, self.node, ""))
+        if toon._find_unquoted(ln.text, ":", 0) < 0:
+            self._pending = ln
+            return None
+        return self._field(ln.text, ln, 1, 0, self.node, "")
+
+    def _finish(self) -> None:
+        """The closing fence arrived: every open array must have its declared count."""
+        while self._stack:
+            self._close(self._stack.pop())
+
+    @staticmethod
+    def _close(frame: _Frame) -> None:
+        if frame.kind == "obj" or frame.count == frame.header.length:
+            return
+        what = "tabular array declares [{}] rows" if frame.kind == "rows" else "list array declares [{}] items"
+        raise toon.ToonDecodeError(f"{what.format(frame.header.length)} but has {frame.count}",
+                                   frame.hdr.num, frame.hdr.indent + 1)
+
+    # ---- entries ----
+    def _field(self, text: str, ln: toon._Line, col: int, depth: int,
+               node: Optional[KeyNode], path: str) -> Optional[str]:
+        """One `key...` entry at `depth` of the object at `path`; nested content sits at depth + 1."""
+        key, header, rest, rest_col = self._lex._split_key(text, ln, col)
+        child = None
+        if node is not None:
+            if key in node.fields:
+                child = node.fields[key]
+            elif node.forbid:
+                return f"Unknown key at {path}/{key} (extra fields are forbidden by the schema)"
+        if header is not None:
+            return self._array(header, rest, rest_col, ln, depth + 1, child, f"{path}/{key}")
+        if rest:
+            toon.parse_primitive(rest, ln.num, rest_col)
+        else:
+            self._stack.append(_Frame("obj", depth + 1, child, f"{path}/{key}"))
+        return None
+
+    def _array(self, header: toon._Header, rest: str, rest_col: int, ln: toon._Line, item_depth: int,
+               node: Optional[KeyNode], path: str) -> Optional[str]:
+        if not rest:
+            kind = "rows" if header.fields is not None else "list"
+            self._stack.append(_Frame(kind, item_depth, node, path, header, ln))
+            return None
+        if header.fields is not None:
+            raise toon.ToonDecodeError("unexpected inline values after tabular header", ln.num, rest_col)
+        values = toon._split_values(rest, header.delim, ln.num, rest_col)
+        for tok, c in values:
+            toon.parse_primitive(tok, ln.num, c)
+        if len(values) != header.length:
+            raise toon.ToonDecodeError(
+                f"array declares [{header.length}] but has {len(values)} inline values", ln.num, rest_col
+            )
+        return None
+
+    def _table_row(self, frame: _Frame, ln: toon._Line) -> Optional[str]:
+        fields = frame.header.fields
+        tokens = toon._split_values(ln.text, frame.header.delim, ln.num, ln.indent + 1)
+        if len(tokens) != len(fields):
+            raise toon.ToonDecodeError(
+                f"row has {len(tokens)} values but header declares {len(fields)} fields {{{','.join(fields)}}}",
+                ln.num, ln.indent + 1,
+            )
+        for tok, c in tokens:
+            toon.parse_primitive(tok, ln.num, c)
+        frame.count += 1
+        if frame.count > frame.header.length:
+            raise toon.ToonDecodeError(
+                f"tabular array declares [{frame.header.length}] rows but has more", ln.num, ln.indent + 1
+            )
+        node = frame.node
+        if frame.count == 1 and node is not None and node.forbid:
+            for f in fields:
+                if f not in node.fields:
+                    return f"Unknown key at {frame.path}/0/{f} (extra fields are forbidden by the schema)"
+        return None
+
+    def _list_item(self, frame: _Frame, ln: toon._Line) -> Optional[str]:
+        if ln.text != "-" and not ln.text.startswith("- "):
+            raise toon.ToonDecodeError("expected list item starting with '- '", ln.num, ln.indent + 1)
+        path = f"{frame.path}/{frame.count}"
+        frame.count += 1
+        if frame.count > frame.header.length:
+            raise toon.ToonDecodeError(
+                f"list array declares [{frame.header.length}] items but has more", ln.num, ln.indent + 1
+            )
+        body = ln.text[2:].strip()
+        col = ln.indent + 3
+        if not body:
+            return None
+        if body.startswith("["):
+            m = toon._HEADER_RE.match(body)
+            if not m:
+                raise toon.ToonDecodeError("malformed array header in list item", ln.num, col)
+            header = self._lex._make_header(m, ln, col)
+            rest = body[m.end():]
+            lead = len(rest) - len(rest.lstrip())
+            return self._array(header, rest.strip(), col + m.end() + lead, ln, frame.depth + 1, frame.node, path)
+        if toon._find_unquoted(body, ":", 0) < 0:
+            toon.parse_primitive(body, ln.num, col)
+            return None
+        # Object item: first field on the hyphen line, siblings at depth + 1
+        self._stack.append(_Frame("obj", frame.depth + 1, frame.node, path))
+        return self._field(body, ln, col, frame.depth + 1, frame.node, path)
+
+
+# =========================================
+# JSON
+# =========================================
+_WAIT = object()  # _step result: need more text before deciding
+
+class JsonStreamChecker:
+    """Character-level scanner; only tracks structure and object keys, not full JSON grammar."""
+
+    def __init__(self, schema_model: Type[BaseModel], wrapper_key: Optional[str] = None, allow_fence: bool = True):
+        self.root = key_tree(schema_model, wrapper_key)
+        self.allow_fence = allow_fence
+        self.pos = 0
+        self.started = False
+        self.finished = False
+        self.fenced = False
+        # stack entries: [kind, node, expecting_key, current_key, path]
+        self.stack: List[list] = []
+        self.in_string = False
+        self.escape = False
+        self.buf: List[str] = []
+
+    def feed(self, text: str) -> Optional[str]:
+        body = _strip_think(text)
+        if body is None:
+            return None
+        while self.pos < len(body):
+            err = self._step(body)
+            if err is _WAIT:
+                return None
+            if err:
+                return err
+        return None
+
+    def _step(self, body: str) -> Optional[str]:
+        i = self.pos
+        ch = body[i]
+        if not self.started:
+            if ch.isspace():
+                self.pos += 1
+                return None
+            if ch == "`":
+                if not self.allow_fence:
+                    return "Output must be bare JSON (no code fence)"
+                if len(body) - i < 3:
+                    return _WAIT  # rest of the fence marker not streamed yet
+                if body[i:i + 3] != "```" or self.fenced:
+                    return "Unexpected backtick before JSON"
+                nl = body.find("\n", i)
+                if nl < 0:
+                    return _WAIT
+                self.fenced = True
+                self.pos = nl + 1
+                return None
+            if ch not in "{[":
+                return f"Prose outside the JSON: {body[i:i + 40]!r}"
+            self.started = True
+        if self.finished:
+            if ch.isspace() or (self.fenced and ch == "`"):
+                self.pos += 1
+                return None
+            return f"Extra data after the JSON value: {body[i:i + 40]!r}"
+        self.pos += 1
+        if self.in_string:
+            if self.escape:
+                self.escape = False
+            elif ch == "\\":
+                self.escape = True
+            elif ch == '"':
+                self.in_string = False
+                return self._end_string()
+            if self.buf is not None:
+                self.buf.append(ch)
+            return None
+        if ch == '"':
+            self.in_string = True
+            top = self.stack[-1] if self.stack else None
+            self.buf = [] if top is not None and top[0] == "obj" and top[2] else None
+            return None
+        if ch in "{[":
+            node, path = self._child()
+            self.stack.append(["obj" if ch == "{" else "arr", node, ch == "{", None, path])
+            return None
+        if ch in "}]":
+            want = "obj" if ch == "}" else "arr"
+            if not self.stack or self.stack[-1][0] != want:
+                return f"Mismatched '{ch}' in JSON"
+            self.stack.pop()
+            if not self.stack:
+                self.finished = True
+            return None
+        if ch == "," and self.stack and self.stack[-1][0] == "obj":
+            self.stack[-1][2] = True
+        return None
+
+    def _end_string(self) -> Optional[str]:
+        if self.buf is None:
+            return None
+        key = "".join(self.buf)
+        self.buf = None
+        top = self.stack[-1]
+        top[2] = False
+        top[3] = key
+        node = top[1]
+        if node is not None and key not in node.fields and node.forbid:
+            return f"Unknown key at {top[4]}/{key} (extra fields are forbidden by the schema)"
+        return None
+
+    def _child(self):
+        """Schema node and JSON Pointer for a container that starts at the current position."""
+        if not self.stack:
+            return self.root, ""
+        kind, node, _, key, path = self.stack[-1]
+        if kind == "arr":
+            return node, f"{path}/-"
+        child = node.fields.get(key) if node is not None else None
+        return child, f"{path}/{key}"
@@ -0,0 +1,364 @@
+# synthetic.py
+"""Seeded synthetic payloads for the benchmark cases at any size (10 .. 100k+ rows).
+
+The gold payloads in generate.py are tiny (3 users, 2 order items); this
+module builds the same shapes at scale, over the same Pydantic models:
+
+  users     {"users": [UserRow x rows]}
+  order     Order with `rows` items
+  invoice   Invoice with `rows` lines (totals computed from the lines)
+  company   Company with departments of employees, `rows` employees in total
+
+`rows` counts leaf rows. `depth` is the number of nested array levels; each
+case has a natural depth (company 2, the others 1) and every extra level
+wraps the payload in `{"groups": [{"group": 1, ...}, ...]}`, where the
+innermost groups carry the case object's own fields. Non-leaf arrays hold
+`fanout` entries (fewer when there are not enough rows to go round) and the
+rows are split evenly over the leaf arrays.
+
+Rows are never materialised: arrays are `Rows` sequences whose i-th item is
+generated on demand from (seed, i), so the same seed always gives the same
+payload and the writers below stream gold JSON / TOON to disk in constant
+memory. Row contents depend only on (case, seed, row index), so payloads of
+different depth or fanout contain the same rows.
+
+Usage:
+    python synthetic.py --case order --rows 10 1000 100000            # gold/synthetic/
+    python synthetic.py --case company --rows 50000 --depth 4 --fanout 5 --seed 7
+"""
+import argparse
+import hashlib
+import json
+import random
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, NamedTuple, Optional, Sequence, Tuple, Type
+
+from pydantic import BaseModel, ConfigDict, create_model
+
+import toon
+from generate import GOLD_DIR, MANIFEST_VERSION, load_manifest
+from schemas import Company, Invoice, Order, UsersPayload
+
+SYNTHETIC_DIR = GOLD_DIR / "synthetic"
+NATURAL_DEPTH = {"users": 1, "order": 1, "invoice": 1, "company": 2}
+MODELS: Dict[str, Type[BaseModel]] = {"users": UsersPayload, "order": Order, "invoice": Invoice, "company": Company}
+DEFAULT_FANOUT = 10
+GENERATOR_VERSION = 2  # bump when the generated values change, so cached synthetic golds are rewritten
+
+FIRST_NAMES = ("Ada", "Alice", "Bob", "Carol", "Dave", "Eve", "Frank", "Grace", "Heidi", "Ivan",
+               "Judy", "Mallory", "Noor", "Omar", "Peggy", "Rupert", "Sara", "Trent", "Victor", "Yusuf")
+LAST_NAMES = ("Lovelace", "Hopper", "Turing", "Knuth", "Liskov", "Ritchie", "Thompson", "Hamilton",
+              "Al-Khwarizmi", "Dijkstra", "Wirth", "Backus", "Kay", "Lamport", "Tarjan", "Perlis")
+DEPARTMENTS = (("ENG", "Engineering"), ("OPS", "Operations"), ("FIN", "Finance"), ("HR", "People"),
+               ("MKT", "Marketing"), ("SAL", "Sales"), ("LEG", "Legal"), ("RND", "Research"))
+NOTES = ("Thank you for your business.", "Payment due within 30 days.", "Net 60, 2% early discount.")
+TAX_RATE = 0.15
+
+
+# =========================================
+# Lazy, index-addressable rows
+# =========================================
+class Rows(Sequence):
+    """`n` items; item i is `make(rng, start + i)`, generated on demand.
+
+    Items come in aligned blocks of `block` global indices, each drawn from
+    one RNG seeded with (seed, stream, block number), so an item depends only
+    on its global index and the seed. Only the last block is kept: iterating
+    twice (the TOON encoder checks uniformity before writing rows) costs
+    time, not memory.
+    """
+
+    def __init__(self, n: int, make: Callable[[random.Random, int], Any], seed: int, stream: int,
+                 start: int = 0, block: int = 256):
+        self.n, self.make, self.seed, self.stream, self.start, self.block = n, make, seed, stream, start, block
+        self._block: Tuple[int, List[Any]] = (-1, [])
+
+    def __len__(self) -> int:
+        return self.n
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(self.n))]
+        if i < 0:
+            i += self.n
+        if not 0 <= i < self.n:
+            raise IndexError(i)
+        b, j = divmod(self.start + i, self.block)
+        if self._block[0] != b:
+            rng = random.Random(f"{self.seed}:{self.stream}:{b}")
+            self._block = (b, [self.make(rng, b * self.block + k) for k in range(self.block)])
+        return self._block[1][j]
+
+    def __iter__(self) -> Iterator[Any]:
+        for i in range(self.n):
+            yield self[i]
+
+
+def _name(rng: random.Random) -> str:
+    return f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}"
+
+
+def _sku(rng: random.Random, k: int) -> str:
+    """Unique per payload: the number is the row's global index (canonical.py sorts items by sku)."""
+    return f"{rng.choice('ABCDEFGHJKLMNPQRSTUVWXYZ')}{k + 1:04d}"
+
+
+def _price(rng: random.Random) -> float:
+    return round(rng.uniform(0.5, 500.0), 2)
+
+
+def user_row(rng: random.Random, k: int) -> Dict[str, Any]:
+    return {"id": k + 1, "name": _name(rng), "role": rng.choice(("admin", "staff", "guest"))}
+
+
+def order_item(rng: random.Random, k: int) -> Dict[str, Any]:
+    return {"sku": _sku(rng, k), "qty": rng.randint(1, 20), "price": _price(rng)}
+
+
+def employee(rng: random.Random, k: int) -> Dict[str, Any]:
+    return {"id": k + 1, "name": _name(rng), "title": rng.choice(("engineer", "manager", "analyst"))}
+
+
+def invoice_line(rng: random.Random, k: int) -> Dict[str, Any]:
+    qty, unit_price = rng.randint(1, 20), _price(rng)
+    return {"sku": _sku(rng, k), "qty": qty, "unit_price": unit_price, "line_total": round(qty * unit_price, 2)}
+
+
+def _customer(rng: random.Random, k: int) -> Dict[str, Any]:
+    return {"id": rng.randrange(1, 100000), "name": _name(rng)}
+
+
+# =========================================
+# Payload layout
+# =========================================
+def _split(total: int, parts: int, j: int) -> Tuple[int, int]:
+    """[lo, hi) of part j when `total` is split evenly into `parts`."""
+    return total * j // parts, total * (j + 1) // parts
+
+
+def _fanout(rows: int, levels: int, fanout: int) -> int:
+    """Largest fan-out <= `fanout` that still leaves every leaf array non-empty."""
+    f = max(1, fanout)
+    while f > 1 and f ** levels > rows:
+        f -= 1
+    return f
+
+
+class Layout(NamedTuple):
+    case: str
+    rows: int
+    depth: int
+    seed: int
+    fanout: int  # effective fan-out of the non-leaf arrays
+
+    @property
+    def groups(self) -> int:
+        return self.depth - NATURAL_DEPTH[self.case]
+
+    def case_object(self, unit: int, lo: int, hi: int) -> Dict[str, Any]:
+        """Case object number `unit` holding leaf rows [lo, hi)."""
+        rng = random.Random(f"{self.seed}:unit:{unit}")
+        n, seed = hi - lo, self.seed
+        if self.case == "users":
+            return {"users": Rows(n, user_row, seed, 1, lo)}
+        if self.case == "order":
+            return {"id": 101 + unit, "customer": _customer(rng, unit), "items": Rows(n, order_item, seed, 2, lo)}
+        if self.case == "invoice":
+            items = Rows(n, invoice_line, seed, 4, lo)
+            subtotal = round(sum(line["line_total"] for line in items), 2)
+            tax = round(subtotal * TAX_RATE, 2)
+            return {
+                "number": f"INV-2025-{unit + 1:06d}",
+                "currency": rng.choice(("USD", "EUR", "SAR")),
+                "customer": _customer(rng, unit),
+                "items": items,
+                "totals": {"subtotal": subtotal, "tax": tax, "grand_total": round(subtotal + tax, 2)},
+                "notes": rng.choice(NOTES),
+            }
+        # company: `fanout` departments sharing the rows
+        depts = _fanout(n, 1, self.fanout)
+
+        def department(drng: random.Random, d: int) -> Dict[str, Any]:
+            code, name = DEPARTMENTS[d % len(DEPARTMENTS)]
+            suffix = "" if d < len(DEPARTMENTS) else str(d // len(DEPARTMENTS) + 1)
+            a, b = _split(n, depts, d)
+            return {"code": code + suffix, "name": name + (f" {suffix}" if suffix else ""),
+                    "employees": Rows(b - a, employee, seed, 3, lo + a)}
+
+        return {"id": unit + 1, "name": f"{rng.choice(LAST_NAMES)} {rng.choice(('Inc', 'Ltd', 'GmbH', 'LLC'))}",
+                "departments": Rows(depts, department, seed, 5, block=1)}
+
+    def payload(self) -> Dict[str, Any]:
+        if not self.groups:
+            return self.case_object(0, 0, self.rows)
+        f, levels = self.fanout, self.groups
+
+        def group_rows(level: int, base: int) -> Rows:
+            """Groups at `level` (1 = outermost); `base` numbers the unit range they cover."""
+            def group(_rng: random.Random, g: int) -> Dict[str, Any]:
+                unit = base * f + g
+                if level < levels:
+                    return {"group": g + 1, "groups": group_rows(level + 1, unit)}
+                lo, hi = _split(self.rows, f ** levels, unit)
+                return {"group": g + 1, **self.case_object(unit, lo, hi)}
+            return Rows(f, group, self.seed, 6, block=1)
+
+        return {"groups": group_rows(1, 0)}
+
+
+def layout(case: str, rows: int, depth: Optional[int] = None, seed: int = 0, fanout: int = DEFAULT_FANOUT) -> Layout:
+    if case not in NATURAL_DEPTH:
+        raise ValueError(f"unknown case {case!r} (one of {', '.join(NATURAL_DEPTH)})")
+    depth = NATURAL_DEPTH[case] if depth is None else depth
+    if depth < NATURAL_DEPTH[case]:
+        raise ValueError(f"{case} has at least {NATURAL_DEPTH[case]} nested array level(s), got depth={depth}")
+    if rows < 1:
+        raise ValueError("rows must be >= 1")
+    levels = depth - NATURAL_DEPTH[case] + (1 if case == "company" else 0)
+    return Layout(case, rows, depth, seed, _fanout(rows, levels, fanout) if levels else 1)
+
+
+def synthetic_payload(case: str, rows: int, depth: Optional[int] = None, seed: int = 0,
+                      fanout: int = DEFAULT_FANOUT) -> Dict[str, Any]:
+    """Lazy payload (dicts over `Rows`); encode with `iter_json` / `toon.iter_encode`."""
+    return layout(case, rows, depth, seed, fanout).payload()
+
+
+_STRICT = ConfigDict(extra="forbid", strict=True)
+
+
+def schema_for(case: str, depth: Optional[int] = None) -> Type[BaseModel]:
+    """Pydantic model of a synthetic payload (the case model itself at its natural depth)."""
+    model = MODELS[case]
+    groups = (NATURAL_DEPTH[case] if depth is None else depth) - NATURAL_DEPTH[case]
+    if groups <= 0:
+        return model
+    name = model.__name__
+    inner = create_model(f"{name}Group{groups}", __base__=model, group=(int, ...))
+    for level in range(groups - 1, 0, -1):
+        inner = create_model(f"{name}Group{level}", __config__=_STRICT, group=(int, ...), groups=(List[inner], ...))
+    return create_model(f"{name}Groups", __config__=_STRICT, groups=(List[inner], ...))
+
+
+# =========================================
+# Streaming writers
+# =========================================
+def _dumps(value: Any) -> str:
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":"))
+
+
+def iter_json(value: Any) -> Iterator[str]:
+    """Compact JSON text in chunks; same bytes as generate.write_json.
+
+    Eager subtrees (a row, a customer) go to the C encoder in one call; only
+    dicts and arrays that contain `Rows` are walked here.
+    """
+    if not isinstance(value, Rows):
+        try:
+            yield _dumps(value)
+            return
+        except TypeError:  # holds a Rows somewhere below
+            pass
+    if isinstance(value, dict):
+        yield "{"
+        for i, (key, v) in enumerate(value.items()):
+            yield ("," if i else "") + _dumps(key) + ":"
+            yield from iter_json(v)
+        yield "}"
+    else:
+        yield "["
+        for i, v in enumerate(value):
+            if i:
+                yield ","
+            yield from iter_json(v)
+        yield "]"
+
+
+def _write(path: Path, chunks: Iterator[str], sep: str = "", flush_chars: int = 1 << 20) -> Tuple[str, int]:
+    """Write chunks (joined by `sep`) in ~1 MB batches; returns (sha256, bytes) of the file."""
+    digest, size = hashlib.sha256(), 0
+    tmp = path.with_suffix(path.suffix + ".tmp")
+    with tmp.open("wb") as f:
+
+        def flush(parts: List[str]) -> None:
+            nonlocal size
+            data = "".join(parts).encode("utf-8")
+            f.write(data)
+            digest.update(data)
+            size += len(data)
+
+        buf: List[str] = []
+        pending = 0
+        for i, chunk in enumerate(chunks):
+            if i and sep:
+                buf.append(sep)
+            buf.append(chunk)
+            pending += len(chunk)
+            if pending >= flush_chars:
+                flush(buf)
+                buf, pending = [], 0
+        flush(buf)
+    tmp.replace(path)
+    return digest.hexdigest(), size
+
+
+def write_synthetic(lay: Layout, out_dir: Path = SYNTHETIC_DIR, manifest: Optional[Dict[str, Any]] = None) -> List[Path]:
+    """Stream <name>.gold.json / .gold.toon for `lay` unless the manifest says they are current."""
+    out_dir.mkdir(parents=True, exist_ok=True)
+    name = synthetic_name(lay)
+    json_path, toon_path = out_dir / f"{name}.gold.json", out_dir / f"{name}.gold.toon"
+    manifest = {} if manifest is None else manifest
+    entry = manifest.get(name)
+    if (entry and entry.get("version") == MANIFEST_VERSION and entry.get("generator") == GENERATOR_VERSION
+            and json_path.exists() and toon_path.exists()
+            and json_path.stat().st_size == entry["json_bytes"] and toon_path.stat().st_size == entry["toon_bytes"]):
+        return []
+    json_sha, json_bytes = _write(json_path, iter_json(lay.payload()))
+    toon_sha, toon_bytes = _write(toon_path, toon.iter_encode(lay.payload()), sep="\n")
+    manifest[name] = {"version": MANIFEST_VERSION, "generator": GENERATOR_VERSION, **lay._asdict(),
+                      "json_sha256": json_sha, "json_bytes": json_bytes,
+                      "toon_sha256": toon_sha, "toon_bytes": toon_bytes}
+    return [json_path, toon_path]
+
+
+def synthetic_name(lay: Layout) -> str:
+    return f"{lay.case}-r{lay.rows}-d{lay.depth}-f{lay.fanout}-s{lay.seed}"
+
+
+def gold_paths(lay: Layout, out_dir: Path = SYNTHETIC_DIR) -> Tuple[Path, Path]:
+    """(json, toon) gold files of `lay`, streamed to disk first unless already current."""
+    manifest_path = out_dir / "manifest.json"
+    manifest = load_manifest(manifest_path)
+    if write_synthetic(lay, out_dir, manifest):
+        manifest_path.write_text(json.dumps(manifest, indent=2, sort_keys=True), encoding="utf-8")
+    name = synthetic_name(lay)
+    return out_dir / f"{name}.gold.json", out_dir / f"{name}.gold.toon"
+
+
+def main(argv=None) -> None:
+    ap = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    ap.add_argument("--case", nargs="+", default=list(NATURAL_DEPTH), choices=list(NATURAL_DEPTH))
+    ap.add_argument("--rows", nargs="+", type=int, default=[10, 100, 1000, 10000, 100000])
+    ap.add_argument("--depth", type=int, default=None, help="nested array levels (default: the case's own)")
+    ap.add_argument("--fanout", type=int, default=DEFAULT_FANOUT, help="entries per non-leaf array")
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--out-dir", type=Path, default=SYNTHETIC_DIR)
+    args = ap.parse_args(argv)
+
+    manifest_path = args.out_dir / "manifest.json"
+    manifest = load_manifest(manifest_path)
+    for case in args.case:
+        for rows in args.rows:
+            lay = layout(case, rows, args.depth, args.seed, args.fanout)
+            t0 = time.perf_counter()
+            written = write_synthetic(lay, args.out_dir, manifest)
+            entry = manifest[synthetic_name(lay)]
+            state = f"{time.perf_counter() - t0:.2f}s" if written else "up to date"
+            print(f"{synthetic_name(lay):<36} json {entry['json_bytes']:>11,} B  toon {entry['toon_bytes']:>11,} B"
+                  f"  ({100 * (1 - entry['toon_bytes'] / entry['json_bytes']):.1f}% smaller)  {state}")
+            manifest_path.write_text(json.dumps(manifest, indent=2, sort_keys=True), encoding="utf-8")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,154 @@
+# token_cost.py
+"""Offline token costs of JSON vs TOON output, per local tokenizer (no API calls).
+
+For every case and every tokenizer found (see bpe.py for the formats):
+
+  json_out / toon_out   tokens of the gold output as the tracks expect it:
+                        bare JSON vs a ```toon fenced block
+  saving                output-only saving of TOON (tokens and % of json_out)
+  json_prompt           system + user prompt of the JSON tracks (task + JSON Schema)
+  json_bare             system + the JSON task prompt alone (no schema)
+  toon_prompt           system + user prompt of the TOON track (rules + example)
+  toon_tailored         the same with the schema-tailored rules and layout
+                        (EVAL_TOON_TAILORED's TTP track); tailored_saving is
+                        what it saves against toon_prompt
+  overhead              toon_prompt - json_prompt, and toon_prompt - json_bare
+                        (the "prompt tax" of the TOON rules)
+  break-even            JSON output size (tokens, and x the gold payload) where
+                        TOON's total (prompt + output) equals JSON's, assuming
+                        the gold payload's TOON/JSON output ratio holds at any
+                        size; `cheaper_above` says which format wins beyond it
+                        (break-even 0: that format is cheaper at any size)
+
+A `chars/4` row (the scheduler's estimate) is always included for reference.
+Chat-template tokens are not counted; they are the same for both formats.
+
+Usage:
+    python token_cost.py                          # tokenizers/ (*.tiktoken, */tokenizer.json)
+    python token_cost.py ~/vocabs/o200k_base.tiktoken path/to/Qwen3-32B --out token_costs.csv
+"""
+import argparse
+import csv
+import math
+from pathlib import Path
+from typing import Callable, List, NamedTuple, Tuple
+
+from bpe import Tokenizer, find_tokenizers
+from eval import CASES, GOLD, SYSTEM_PROMPT, json_task_prompt, toon_tailored_prompt
+
+TOKENIZERS_DIR = Path("tokenizers")
+
+
+class CaseCost(NamedTuple):
+    tokenizer: str
+    case: str
+    json_out: int
+    toon_out: int
+    json_prompt: int
+    json_bare: int
+    toon_prompt: int
+    toon_tailored: int
+
+    @property
+    def saving(self) -> int:
+        return self.json_out - self.toon_out
+
+    def break_even(self, json_prompt: int) -> Tuple[float, str]:
+        """(JSON output tokens where the totals cross, format that is cheaper above that size)."""
+        overhead = self.toon_prompt - json_prompt
+        rate = self.saving / self.json_out  # TOON's saving per JSON output token
+        if rate == 0:
+            return 0.0, "toon" if overhead < 0 else "json"
+        crossover = overhead / rate
+        winner = "toon" if rate > 0 else "json"
+        return (crossover, winner) if crossover > 0 else (0.0, winner)
+
+
+def case_costs(name: str, count: Callable[[str], int]) -> List[CaseCost]:
+    system = count(SYSTEM_PROMPT)
+    out = []
+    for case in CASES.values():
+        gold_json = (GOLD / f"{case.name}.gold.json").read_text(encoding="utf-8")
+        gold_toon = (GOLD / f"{case.name}.gold.toon").read_text(encoding="utf-8")
+        out.append(CaseCost(
+            tokenizer=name,
+            case=case.name,
+            json_out=count(gold_json),
+            toon_out=count(f"```toon\n{gold_toon}\n```"),
+            json_prompt=system + count(json_task_prompt(case.make_json_prompt(), case.schema_model)),
+            json_bare=system + count(case.make_json_prompt()),
+            toon_prompt=system + count(case.make_toon_prompt()),
+            toon_tailored=system + count(toon_tailored_prompt(case.schema_model, case.make_toon_prompt())),
+        ))
+    return out
+
+
+def chars_per_4(text: str) -> int:
+    return math.ceil(len(text) / 4)
+
+
+FIELDS = ("tokenizer", "case", "json_out", "toon_out", "saving", "saving_pct",
+          "json_prompt", "json_bare", "toon_prompt", "overhead", "overhead_bare", "toon_tailored", "tailored_saving",
+          "break_even_tokens", "break_even_x_gold", "cheaper_above",
+          "break_even_bare_tokens", "break_even_bare_x_gold", "cheaper_above_bare")
+
+
+def as_row(c: CaseCost) -> dict:
+    row = {
+        "tokenizer": c.tokenizer, "case": c.case, "json_out": c.json_out, "toon_out": c.toon_out,
+        "saving": c.saving, "saving_pct": round(100 * c.saving / c.json_out, 1),
+        "json_prompt": c.json_prompt, "json_bare": c.json_bare, "toon_prompt": c.toon_prompt,
+        "overhead": c.toon_prompt - c.json_prompt, "overhead_bare": c.toon_prompt - c.json_bare,
+        "toon_tailored": c.toon_tailored, "tailored_saving": c.toon_prompt - c.toon_tailored,
+    }
+    for suffix, prompt in (("", c.json_prompt), ("_bare", c.json_bare)):
+        tokens, winner = c.break_even(prompt)
+        row[f"break_even{suffix}_tokens"] = round(tokens, 1)
+        row[f"break_even{suffix}_x_gold"] = round(tokens / c.json_out, 2)
+        row[f"cheaper_above{suffix}"] = winner
+    return row
+
+
+def _crossing(tokens: float, times: float, winner: str) -> str:
+    label = "T" if winner == "toon" else "J"
+    return f"{label} always" if tokens == 0 else f"{label} >{tokens:.0f} ({times:.1f}x)"
+
+
+def print_table(costs: List[CaseCost]) -> None:
+    print(f"\n{costs[0].tokenizer}")
+    print(f"  {'case':<8} {'json':>5} {'toon':>5} {'saving':>13}   {'J+schema':>8} {'J bare':>7} {'T':>5} {'TTP':>5}"
+          f"   {'vs J+schema':>18} {'vs J bare':>18}")
+    for c in costs:
+        r = as_row(c)
+        print(f"  {c.case:<8} {c.json_out:>5} {c.toon_out:>5} {c.saving:>5} ({r['saving_pct']:>5.1f}%)   "
+              f"{c.json_prompt:>8} {c.json_bare:>7} {c.toon_prompt:>5} {c.toon_tailored:>5}   "
+              f"{_crossing(r['break_even_tokens'], r['break_even_x_gold'], r['cheaper_above']):>18} "
+              f"{_crossing(r['break_even_bare_tokens'], r['break_even_bare_x_gold'], r['cheaper_above_bare']):>18}")
+
+
+def main(argv=None) -> None:
+    ap = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    ap.add_argument("paths", nargs="*", type=Path,
+                    help=f"*.tiktoken / tokenizer.json files or directories (default: {TOKENIZERS_DIR}/)")
+    ap.add_argument("--out", type=Path, default=Path("token_costs.csv"))
+    args = ap.parse_args(argv)
+
+    paths = args.paths or ([TOKENIZERS_DIR] if TOKENIZERS_DIR.exists() else [])
+    tokenizers: List[Tokenizer] = find_tokenizers(paths)
+    if not tokenizers:
+        print(f"No tokenizer files found (looked in {', '.join(map(str, paths)) or TOKENIZERS_DIR}); "
+              "showing the chars/4 estimate only")
+
+    results = [case_costs("chars/4", chars_per_4)]
+    results += [case_costs(tok.name, tok.count) for tok in tokenizers]
+    for costs in results:
+        print_table(costs)
+    with args.out.open("w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=FIELDS)
+        writer.writeheader()
+        writer.writerows(as_row(c) for costs in results for c in costs)
+    print(f"\nWrote {args.out}")
+
+
+if __name__ == "__main__":
+    main()
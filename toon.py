@@ -0,0 +1,699 @@
+# toon.py
+"""Pure-Python TOON encoder/decoder (the subset of the spec the benchmark produces).
+
+Covers what `@toon-format/cli --decode` accepts for our gold data:
+scalars, nested objects by indentation, inline primitive arrays
+(`tags[3]: a,b,c`), tabular arrays (`items[N]{f1,f2}:`), `- ` list items
+(including objects whose first field sits on the hyphen line), quoted
+keys/strings and the comma / tab / pipe delimiters. Decoding is strict like
+the CLI: `[N]` must match the actual count, indentation must be a multiple
+of two spaces and tabs are not allowed for indentation. `repair` fixes
+exactly those mechanical slips (plus trailing spaces and stray blank lines)
+where that cannot change the decoded value. `to_json` runs the same parser
+but writes compact JSON text instead of building dicts and lists, for
+Pydantic's `validate_json`.
+
+`encode` mirrors `@toon-format/cli` defaults (2-space indent, comma
+delimiter, tabular arrays for uniform primitive-valued objects, canonical
+numbers such as `14.5` rather than `14.50`). `iter_encode` yields the same
+output line by line and accepts any Sequence as an array, so lazily
+generated payloads (synthetic.py) stream to disk without being built.
+"""
+import json
+import math
+import re
+from decimal import Decimal
+from json.encoder import encode_basestring
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+INDENT = 2
+
+class ToonDecodeError(ValueError):
+    """Decode failure with 1-based line/column of the offending token."""
+
+    def __init__(self, msg: str, line: int, col: int):
+        super().__init__(f"line {line}, col {col}: {msg}")
+        self.msg = msg
+        self.line = line
+        self.col = col
+
+
+# =========================================
+# Lexing helpers
+# =========================================
+_NUMBER_RE = re.compile(r"-?(?:0|[1-9]\d*)(?:\.\d+)?(?:[eE][+-]?\d+)?")
+_HEADER_RE = re.compile(r"\[#?(\d+)([\t|]?)\](?:\{([^}]*)\})?:")
+_ESCAPES = {'"': '"', "\\": "\\", "n": "\n", "r": "\r", "t": "\t"}
+
+
+class _Line:
+    __slots__ = ("num", "depth", "indent", "text")
+
+    def __init__(self, num: int, depth: int, indent: int, text: str):
+        self.num = num        # 1-based line number
+        self.depth = depth    # indentation level
+        self.indent = indent  # leading spaces (for column numbers)
+        self.text = text      # content without indentation / trailing spaces
+
+
+def _scan_line(raw: str, num: int) -> Optional[_Line]:
+    """One physical line; None when blank."""
+    raw = raw.rstrip("\r")
+    if not raw.strip():
+        return None
+    stripped = raw.lstrip(" ")
+    indent = len(raw) - len(stripped)
+    if stripped[0] == "\t":
+        raise ToonDecodeError("tabs are not allowed in indentation", num, indent + 1)
+    if indent % INDENT:
+        raise ToonDecodeError(
+            f"indentation must be a multiple of {INDENT} spaces (got {indent})", num, 1
+        )
+    return _Line(num, indent // INDENT, indent, stripped.rstrip())
+
+
+def _scan_lines(text: str) -> List[Optional[_Line]]:
+    """Split into lines; blank lines are kept as None so array bodies can reject them."""
+    return [_scan_line(raw, num) for num, raw in enumerate(text.split("\n"), start=1)]
+
+
+def _find_unquoted(s: str, chars: str, start: int = 0) -> int:
+    """Index of the first char in `chars` outside double quotes, or -1."""
+    in_q = False
+    i = start
+    while i < len(s):
+        ch = s[i]
+        if in_q:
+            if ch == "\\":
+                i += 1
+            elif ch == '"':
+                in_q = False
+        elif ch == '"':
+            in_q = True
+        elif ch in chars:
+            return i
+        i += 1
+    return -1
+
+
+def _unquote(token: str, line: int, col: int) -> str:
+    """Decode a complete double-quoted token (quotes included)."""
+    out = []
+    i = 1
+    while i < len(token):
+        ch = token[i]
+        if ch == "\\":
+            if i + 1 >= len(token):
+                break
+            esc = token[i + 1]
+            if esc not in _ESCAPES:
+                raise ToonDecodeError(f"invalid escape sequence '\\{esc}'", line, col + i)
+            out.append(_ESCAPES[esc])
+            i += 2
+            continue
+        if ch == '"':
+            if i != len(token) - 1:
+                raise ToonDecodeError("unexpected characters after closing quote", line, col + i + 1)
+            return "".join(out)
+        out.append(ch)
+        i += 1
+    raise ToonDecodeError("unterminated string", line, col)
+
+
+def parse_primitive(token: str, line: int = 1, col: int = 1) -> Any:
+    """Type a single scalar token the way the reference decoder does."""
+    token = token.strip()
+    if token.startswith('"'):
+        return _unquote(token, line, col)
+    if token == "true":
+        return True
+    if token == "false":
+        return False
+    if token == "null":
+        return None
+    if _NUMBER_RE.fullmatch(token):
+        if "." not in token and "e" not in token and "E" not in token:
+            return int(token)
+        value = float(token)
+        # JS numbers: 2.0 and 1e3 come back from the CLI as integers
+        if value.is_integer() and abs(value) < 1e21:
+            return int(value)
+        return value
+    return token
+
+
+def _split_values(s: str, delim: str, line: int, col: int) -> List[Tuple[str, int]]:
+    """Split on `delim` outside quotes; returns (token, column) pairs."""
+    parts: List[Tuple[str, int]] = []
+    if '"' not in s:  # no quotes (most tabular rows): str.split finds the same delimiters
+        start = col
+        for raw in s.split(delim):
+            parts.append((raw.strip(), start + len(raw) - len(raw.lstrip())))
+            start += len(raw) + 1
+        return parts
+    start = 0
+    while True:
+        idx = _find_unquoted(s, delim, start)
+        end = len(s) if idx < 0 else idx
+        raw = s[start:end]
+        lead = len(raw) - len(raw.lstrip())
+        parts.append((raw.strip(), col + start + lead))
+        if idx < 0:
+            return parts
+        start = idx + 1
+
+
+# =========================================
+# Parser
+# =========================================
+class _Header:
+    __slots__ = ("length", "delim", "fields")
+
+    def __init__(self, length: int, delim: str, fields: Optional[List[str]]):
+        self.length = length
+        self.delim = delim
+        self.fields = fields
+
+
+class _Parser:
+    def __init__(self, text: str, partial: bool = False):
+        self.lines = _scan_lines(text)
+        self.i = 0
+        self.partial = partial  # prefix of a document: arrays still open at EOF may be short
+
+    # ---- cursor ----
+    def _peek(self) -> Optional[_Line]:
+        """Next non-blank line without consuming it."""
+        j = self.i
+        while j < len(self.lines) and self.lines[j] is None:
+            j += 1
+        return self.lines[j] if j < len(self.lines) else None
+
+    def _next(self) -> _Line:
+        while self.lines[self.i] is None:
+            self.i += 1
+        ln = self.lines[self.i]
+        self.i += 1
+        return ln
+
+    def _open_at_eof(self) -> bool:
+        """In partial mode, a body that runs into end of input may still be growing."""
+        return self.partial and self._peek() is None
+
+    def _blank_before_next(self) -> bool:
+        """True if blank lines separate the cursor from the next non-blank line."""
+        return self.i < len(self.lines) and self.lines[self.i] is None
+
+    # ---- key / header ----
+    def _split_key(self, text: str, ln: _Line, col: int) -> Tuple[str, Optional[_Header], str, int]:
+        """Parse `key[...]{...}: rest`; returns (key, header, rest, rest_col)."""
+        if text.startswith('"'):
+            close = _find_unquoted(text, ":[", 0)
+            if close < 0:
+                raise ToonDecodeError("missing ':' after key", ln.num, col + len(text))
+            key = _unquote(text[:close].rstrip(), ln.num, col)
+            pos = close
+        else:
+            pos = _find_unquoted(text, ":[", 0)
+            if pos < 0:
+                raise ToonDecodeError(f"expected 'key: value', got {text!r}", ln.num, col)
+            key = text[:pos].strip()
+            if not key:
+                raise ToonDecodeError("empty key", ln.num, col)
+        header = None
+        if text[pos] == "[":
+            m = _HEADER_RE.match(text, pos)
+            if not m:
+                raise ToonDecodeError("malformed array header; expected key[N]: or key[N]{fields}:", ln.num, col + pos)
+            header = self._make_header(m, ln, col + pos)
+            pos = m.end()
+        else:
+            pos += 1
+        rest = text[pos:]
+        lead = len(rest) - len(rest.lstrip())
+        return key, header, rest.strip(), col + pos + lead
+
+    def _make_header(self, m: "re.Match[str]", ln: _Line, col: int) -> _Header:
+        delim = m.group(2) or ","
+        fields = None
+        if m.group(3) is not None:
+            fields = []
+            for tok, fcol in _split_values(m.group(3), delim, ln.num, col + m.group(0).index("{") + 1):
+                if not tok:
+                    raise ToonDecodeError("empty field name in header", ln.num, fcol)
+                fields.append(_unquote(tok, ln.num, fcol) if tok.startswith('"') else tok)
+        return _Header(int(m.group(1)), delim, fields)
+
+    # ---- values ----
+    # Values are built through these hooks; _JsonParser overrides them to write JSON text
+    def _primitive(self, token: str, line: int, col: int) -> Any:
+        return parse_primitive(token, line, col)
+
+    def _row(self, fields: List[str], tokens: List[Tuple[str, int]], line: int) -> Any:
+        return {f: parse_primitive(t, line, c) for f, (t, c) in zip(fields, tokens)}
+
+    def _object(self, obj: Dict[str, Any]) -> Any:
+        return obj
+
+    def _array(self, items: List[Any]) -> Any:
+        return items
+
+    def parse_object(self, depth: int, into: Optional[Dict[str, Any]] = None) -> Any:
+        obj: Dict[str, Any] = {} if into is None else into
+        while True:
+            ln = self._peek()
+            if ln is None or ln.depth < depth:
+                return self._object(obj)
+            if ln.depth > depth:
+                raise ToonDecodeError("unexpected indentation", ln.num, ln.indent + 1)
+            self._next()
+            key, value = self._parse_field(ln.text, ln, ln.indent + 1, depth)
+            obj[key] = value
+
+    def _parse_field(self, text: str, ln: _Line, col: int, depth: int) -> Tuple[str, Any]:
+        """Parse one `key...` entry at `depth`; nested content sits at depth + 1."""
+        key, header, rest, rest_col = self._split_key(text, ln, col)
+        if header is not None:
+            return key, self._parse_array(header, rest, rest_col, ln, depth + 1)
+        if rest:
+            return key, self._primitive(rest, ln.num, rest_col)
+        nxt = self._peek()
+        if nxt is not None and nxt.depth > depth:
+            return key, self.parse_object(depth + 1)
+        return key, self._object({})
+
+    def _parse_array(self, header: _Header, rest: str, rest_col: int, ln: _Line, item_depth: int) -> Any:
+        if rest:
+            if header.fields is not None:
+                raise ToonDecodeError("unexpected inline values after tabular header", ln.num, rest_col)
+            values = [self._primitive(t, ln.num, c) for t, c in _split_values(rest, header.delim, ln.num, rest_col)]
+            if len(values) != header.length:
+                raise ToonDecodeError(
+                    f"array declares [{header.length}] but has {len(values)} inline values", ln.num, rest_col
+                )
+            return self._array(values)
+        if header.fields is not None:
+            return self._parse_rows(header, ln, item_depth)
+        return self._parse_list_items(header, ln, item_depth)
+
+    def _items(self, item_depth: int):
+        """Yield lines belonging to an array body, rejecting blank lines inside it."""
+        started = False
+        while True:
+            ln = self._peek()
+            if ln is None or ln.depth < item_depth:
+                return
+            if ln.depth > item_depth:
+                raise ToonDecodeError("unexpected indentation", ln.num, ln.indent + 1)
+            if started and self._blank_before_next():
+                raise ToonDecodeError("blank line inside array", ln.num - 1, 1)
+            started = True
+            yield self._next()
+
+    def _parse_rows(self, header: _Header, hdr: _Line, item_depth: int) -> Any:
+        fields = header.fields or []
+        rows: List[Any] = []
+        for ln in self._items(item_depth):
+            tokens = _split_values(ln.text, header.delim, ln.num, ln.indent + 1)
+            if len(tokens) != len(fields):
+                raise ToonDecodeError(
+                    f"row has {len(tokens)} values but header declares {len(fields)} fields "
+                    f"{{{','.join(fields)}}}",
+                    ln.num, ln.indent + 1,
+                )
+            rows.append(self._row(fields, tokens, ln.num))
+            if len(rows) > header.length:
+                raise ToonDecodeError(
+                    f"tabular array declares [{header.length}] rows but has more", ln.num, ln.indent + 1
+                )
+        if len(rows) != header.length and not self._open_at_eof():
+            raise ToonDecodeError(
+                f"tabular array declares [{header.length}] rows but has {len(rows)}", hdr.num, hdr.indent + 1
+            )
+        return self._array(rows)
+
+    def _parse_list_items(self, header: _Header, hdr: _Line, item_depth: int) -> Any:
+        items: List[Any] = []
+        for ln in self._items(item_depth):
+            if ln.text != "-" and not ln.text.startswith("- "):
+                raise ToonDecodeError("expected list item starting with '- '", ln.num, ln.indent + 1)
+            items.append(self._parse_list_item(ln, item_depth))
+            if len(items) > header.length:
+                raise ToonDecodeError(
+                    f"list array declares [{header.length}] items but has more", ln.num, ln.indent + 1
+                )
+        if len(items) != header.length and not self._open_at_eof():
+            raise ToonDecodeError(
+                f"list array declares [{header.length}] items but has {len(items)}", hdr.num, hdr.indent + 1
+            )
+        return self._array(items)
+
+    def _parse_list_item(self, ln: _Line, item_depth: int) -> Any:
+        body = ln.text[2:].strip()
+        col = ln.indent + 3
+        if not body:
+            return self._object({})
+        if body.startswith("["):
+            m = _HEADER_RE.match(body)
+            if not m:
+                raise ToonDecodeError("malformed array header in list item", ln.num, col)
+            header = self._make_header(m, ln, col)
+            rest = body[m.end():]
+            lead = len(rest) - len(rest.lstrip())
+            return self._parse_array(header, rest.strip(), col + m.end() + lead, ln, item_depth + 1)
+        if _find_unquoted(body, ":", 0) < 0:
+            return self._primitive(body, ln.num, col)
+        # Object item: first field on the hyphen line, siblings at item_depth + 1
+        key, value = self._parse_field(body, ln, col, item_depth + 1)
+        return self.parse_object(item_depth + 1, into={key: value})
+
+    # ---- root ----
+    def parse_root(self) -> Any:
+        first = self._peek()
+        if first is None:
+            return self._object({})
+        if first.depth != 0:
+            raise ToonDecodeError("unexpected indentation at document root", first.num, first.indent + 1)
+        if first.text.startswith("["):
+            m = _HEADER_RE.match(first.text)
+            if m:
+                self._next()
+                header = self._make_header(m, first, 1)
+                rest = first.text[m.end():]
+                lead = len(rest) - len(rest.lstrip())
+                value = self._parse_array(header, rest.strip(), m.end() + lead + 1, first, 1)
+                self._expect_end()
+                return value
+        non_blank = [ln for ln in self.lines if ln is not None]
+        if len(non_blank) == 1 and _find_unquoted(first.text, ":", 0) < 0:
+            self._next()
+            return self._primitive(first.text, first.num, 1)
+        value = self.parse_object(0)
+        self._expect_end()
+        return value
+
+    def _expect_end(self) -> None:
+        ln = self._peek()
+        if ln is not None:
+            raise ToonDecodeError("unexpected content after document root", ln.num, ln.indent + 1)
+
+
+def decode(text: str, partial: bool = False) -> Any:
+    """Decode a TOON document into JSON-compatible Python values.
+
+    With partial=True the text is treated as a prefix of a document (complete
+    lines only): arrays that reach end of input with fewer than [N] entries are
+    accepted, every other error is still raised.
+    """
+    return _Parser(text, partial).parse_root()
+
+
+def json_token(token: str, line: int = 1, col: int = 1) -> str:
+    """JSON text of the value `parse_primitive(token)` returns; numbers and literals are
+    already valid JSON, so only strings and integral decimals (`2.0` -> `2`) are rewritten."""
+    token = token.strip()
+    if token.startswith('"'):
+        return encode_basestring(_unquote(token, line, col))
+    if token == "true" or token == "false" or token == "null":
+        return token
+    if _NUMBER_RE.fullmatch(token):
+        if "." not in token and "e" not in token and "E" not in token:
+            return token
+        value = float(token)
+        if value.is_integer() and abs(value) < 1e21:
+            return str(int(value))
+        return token if math.isfinite(value) else json.dumps(value)
+    return encode_basestring(token)
+
+
+class _JsonParser(_Parser):
+    """Same grammar and errors as _Parser; every value is emitted as compact JSON text."""
+
+    def __init__(self, text: str):
+        super().__init__(text)
+        self._keys: Dict[Tuple[str, ...], List[str]] = {}  # tabular header -> `{"f1":`, `,"f2":`, ...
+
+    def _primitive(self, token: str, line: int, col: int) -> str:
+        return json_token(token, line, col)
+
+    def _row(self, fields: List[str], tokens: List[Tuple[str, int]], line: int) -> str:
+        keys = self._keys.get(tuple(fields))
+        if keys is None:
+            keys = self._keys[tuple(fields)] = [("," if i else "{") + encode_basestring(f) + ":"
+                                                for i, f in enumerate(fields)]
+        return "".join([k + json_token(t, line, c) for k, (t, c) in zip(keys, tokens)]) + "}"
+
+    def _object(self, obj: Dict[str, str]) -> str:
+        return "{" + ",".join(f"{encode_basestring(k)}:{v}" for k, v in obj.items()) + "}"
+
+    def _array(self, items: List[str]) -> str:
+        return "[" + ",".join(items) + "]"
+
+
+def to_json(text: str) -> str:
+    """Decode a TOON document straight to compact JSON text, without the Python object tree.
+
+    Accepts and rejects exactly what `decode` does; `json.loads(to_json(t)) == decode(t)`.
+    Meant for `TypeAdapter.validate_json`, which then builds models from the text directly.
+    """
+    return _JsonParser(text).parse_root()
+
+
+# =========================================
+# Lossless repair
+# =========================================
+def _is_uniform_step(widths: List[int], step: int) -> bool:
+    """Every indentation level from 0 up to the deepest is used, one `step` apart."""
+    levels = sorted(set(widths))
+    return all(w == k * step for k, w in enumerate(levels))
+
+
+def _fix_counts(lines: List[str]) -> bool:
+    """Set every `[N]` to the number of inline values / rows / list items that follow it."""
+    depths = [(len(raw) - len(raw.lstrip(" "))) // INDENT for raw in lines]
+    changed = False
+    for i, raw in enumerate(lines):
+        text = raw.lstrip(" ")
+        body, child = text, depths[i] + 1
+        if text.startswith("- "):
+            body = text[2:]
+            if not body.startswith("["):
+                child += 1  # field on the hyphen line: its rows sit under the item's other fields
+        pos = 0 if body.startswith("[") else _find_unquoted(body, ":[", 0)
+        m = _HEADER_RE.match(body, pos) if pos >= 0 else None
+        if m is None:
+            continue
+        rest = body[m.end():].strip()
+        if rest:
+            if m.group(3) is not None:
+                continue
+            n = len(_split_values(rest, m.group(2) or ",", i + 1, 1))
+        else:
+            n = 0
+            for j in range(i + 1, len(lines)):
+                if depths[j] < child:
+                    break
+                if depths[j] == child and (m.group(3) is not None or lines[j].lstrip(" ").startswith("-")):
+                    n += 1
+        if n != int(m.group(1)):
+            offset = len(raw) - len(body)
+            start, end = m.span(1)
+            lines[i] = raw[:offset + start] + str(n) + raw[offset + end:]
+            changed = True
+    return changed
+
+
+def repair(text: str) -> Tuple[str, List[str]]:
+    """Apply the mechanical fixes that cannot change what a document says.
+
+    Returns the repaired text and the fixes that changed it, in the order applied:
+    `trailing_space` (stripped), `tabs` (leading tabs expanded to INDENT
+    spaces), `indent` (a uniform indentation step other than INDENT rescaled
+    to INDENT), `blank_lines` (dropped between content lines) and `counts`
+    (each `[N]` set to the values / rows / items actually present). The
+    result still goes through `decode` and the gold comparison; a repair only
+    saves the round-trip that would have asked the model to do the same.
+    """
+    fixes: List[str] = []
+    lines = [raw.rstrip("\r") for raw in text.split("\n")]
+    stripped = [raw.rstrip() for raw in lines]
+    if stripped != lines:
+        fixes.append("trailing_space")
+        lines = stripped
+    expanded = []
+    for raw in lines:
+        body = raw.lstrip(" \t")
+        expanded.append(raw[:len(raw) - len(body)].replace("\t", " " * INDENT) + body)
+    if expanded != lines:
+        fixes.append("tabs")
+        lines = expanded
+    widths = [len(raw) - len(raw.lstrip(" ")) for raw in lines if raw]
+    step = math.gcd(*widths)
+    if step and step != INDENT and _is_uniform_step(widths, step):
+        fixes.append("indent")
+        lines = [" " * ((len(raw) - len(raw.lstrip(" "))) // step * INDENT) + raw.lstrip(" ") for raw in lines]
+    nonblank = [i for i, raw in enumerate(lines) if raw]
+    if nonblank and nonblank[-1] - nonblank[0] + 1 != len(nonblank):
+        fixes.append("blank_lines")
+    lines = [raw for raw in lines if raw]
+    if _fix_counts(lines):
+        fixes.append("counts")
+    return "\n".join(lines), fixes
+
+
+# =========================================
+# Encoder
+# =========================================
+_SAFE_KEY_RE = re.compile(r"[A-Za-z_][A-Za-z0-9_.]*")
+_NUMERIC_LIKE_RE = re.compile(r"-?\d+(?:\.\d+)?(?:[eE][+-]?\d+)?|0\d+")
+
+
+def _is_primitive(value: Any) -> bool:
+    return value is None or isinstance(value, (str, int, float, bool))
+
+
+def format_number(value: Any) -> str:
+    """Canonical TOON number: no exponent, no trailing zeros, -0 -> 0, non-finite -> null."""
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    if isinstance(value, int):
+        return str(value)
+    if not math.isfinite(value):
+        return "null"
+    if value == 0:
+        return "0"
+    if value.is_integer():
+        return str(int(value))
+    text = repr(value)
+    if "e" in text or "E" in text:
+        text = format(Decimal(text), "f")
+    return text
+
+
+def _needs_quotes(s: str, delim: str) -> bool:
+    if not s or s != s.strip():
+        return True
+    if s in ("true", "false", "null") or _NUMERIC_LIKE_RE.fullmatch(s):
+        return True
+    if s.startswith("-"):
+        return True
+    if any(ch in s for ch in ':"\\[]{}') or delim in s:
+        return True
+    return any(ord(ch) < 0x20 for ch in s)
+
+
+def _quote(s: str) -> str:
+    out = s.replace("\\", "\\\\").replace('"', '\\"')
+    out = out.replace("\n", "\\n").replace("\r", "\\r").replace("\t", "\\t")
+    return f'"{out}"'
+
+
+def encode_primitive(value: Any, delim: str = ",") -> str:
+    if value is None:
+        return "null"
+    if isinstance(value, (bool, int, float)):
+        return format_number(value)
+    return _quote(value) if _needs_quotes(value, delim) else value
+
+
+def _encode_key(key: str) -> str:
+    return key if _SAFE_KEY_RE.fullmatch(key) else _quote(key)
+
+
+def _tabular_fields(items: Sequence[Any]) -> Optional[List[str]]:
+    """Field list if every item is a non-empty object with the same keys and primitive values."""
+    if not items or not all(isinstance(it, dict) and it for it in items):
+        return None
+    fields = list(items[0].keys())
+    for it in items:
+        if len(it) != len(fields) or any(k not in it for k in fields):
+            return None
+        if not all(_is_primitive(v) for v in it.values()):
+            return None
+    return fields
+
+
+def _is_array(value: Any) -> bool:
+    """Lists, plus any non-string Sequence (lazily generated rows encode like lists)."""
+    return isinstance(value, list) or (isinstance(value, Sequence) and not isinstance(value, (str, bytes)))
+
+
+class _Encoder:
+    """Yields output lines, so large (lazy) values can be written without building the text."""
+
+    def __init__(self, indent: int, delim: str):
+        self.indent = indent
+        self.delim = delim
+
+    def _line(self, depth: int, text: str) -> str:
+        return " " * (self.indent * depth) + text
+
+    def _header(self, key: str, n: int, fields: Optional[List[str]] = None) -> str:
+        marker = "" if self.delim == "," else self.delim
+        head = f"{key}[{n}{marker}]"
+        if fields is not None:
+            head += "{" + self.delim.join(_encode_key(f) for f in fields) + "}"
+        return head + ":"
+
+    def _row(self, values: Iterable[Any]) -> str:
+        return self.delim.join(encode_primitive(v, self.delim) for v in values)
+
+    def object(self, obj: Dict[str, Any], depth: int) -> Iterator[str]:
+        for key, value in obj.items():
+            yield from self.field(_encode_key(key), value, depth)
+
+    def field(self, key: str, value: Any, depth: int, prefix: str = "") -> Iterator[str]:
+        """Lines for `key...` at depth; `prefix` is "- " when it sits on a list-item line."""
+        if isinstance(value, dict):
+            yield self._line(depth, f"{prefix}{key}:")
+            yield from self.object(value, depth + 1 + (1 if prefix else 0))
+        elif _is_array(value):
+            yield from self.array(key, value, depth, prefix)
+        else:
+            yield self._line(depth, f"{prefix}{key}: {encode_primitive(value, self.delim)}")
+
+    def array(self, key: str, items: Sequence[Any], depth: int, prefix: str = "") -> Iterator[str]:
+        body_depth = depth + 1 + (1 if prefix else 0)
+        if not items or all(_is_primitive(v) for v in items):
+            head = self._header(key, len(items))
+            yield self._line(depth, f"{prefix}{head} {self._row(items)}" if items else f"{prefix}{head}")
+            return
+        fields = _tabular_fields(items)
+        if fields is not None:
+            yield self._line(depth, prefix + self._header(key, len(items), fields))
+            for it in items:
+                yield self._line(body_depth, self._row(it[f] for f in fields))
+            return
+        yield self._line(depth, prefix + self._header(key, len(items)))
+        for it in items:
+            yield from self.list_item(it, body_depth)
+
+    def list_item(self, value: Any, depth: int) -> Iterator[str]:
+        if isinstance(value, dict):
+            if not value:
+                yield self._line(depth, "-")
+                return
+            keys = list(value.keys())
+            yield from self.field(_encode_key(keys[0]), value[keys[0]], depth, prefix="- ")
+            for key in keys[1:]:
+                yield from self.field(_encode_key(key), value[key], depth + 1)
+        elif _is_array(value):
+            yield from self.array("", value, depth, prefix="- ")
+        else:
+            yield self._line(depth, f"- {encode_primitive(value, self.delim)}")
+
+
+def iter_encode(value: Any, indent: int = INDENT, delimiter: str = ",") -> Iterator[str]:
+    """TOON output line by line (no newlines); arrays may be any Sequence, e.g. lazily generated rows."""
+    enc = _Encoder(indent, delimiter)
+    if isinstance(value, dict):
+        yield from enc.object(value, 0)
+    elif _is_array(value):
+        yield from enc.array("", value, 0)
+    else:
+        yield encode_primitive(value, delimiter)
+
+
+def encode(value: Any, indent: int = INDENT, delimiter: str = ",") -> str:
+    """Encode JSON-compatible Python values as TOON (no trailing newline)."""
+    return "\n".join(iter_encode(value, indent, delimiter))
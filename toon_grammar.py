@@ -0,0 +1,551 @@
+# toon_grammar.py
+"""Compile a Pydantic model into a TOON grammar for constrained decoding.
+
+JSO gets a safety net from `response_format`; this gives the TOON track the
+same through a GBNF grammar (the dialect of llama.cpp and vLLM's xgrammar
+backend) derived from the case's model. The grammar pins down what the
+schema fixes:
+
+- the ```toon fence, and fields in schema order at their exact indentation;
+- objects as `key:` plus an indented block;
+- arrays of primitive-only models as tabular arrays with the header
+  `key[N]{f1,f2,...}:` in schema order and one row per item;
+- other arrays of models as `- ` list items with the first field on the
+  hyphen line; arrays of primitives inline (`key[N]: a,b,c`);
+- `Literal` values as alternatives, int / float / bool / null tokens, and
+  strings quoted or unquoted (without the characters that force quotes).
+
+Two things stay with the decoder and validator. A grammar cannot tie `[N]`
+to the number of rows, and an unquoted string may still look like a number
+or `true`. Recursive models, dicts and nested arrays raise TypeError.
+
+`skeleton` renders the same walk as a TOON layout with <placeholders> and
+notes which features (tabular arrays, list items, numbers, ...) the model
+uses; eval.py builds the schema-tailored TOON prompts from it.
+
+`to_regex` translates the GBNF into an equivalent Python regular expression,
+for servers that take `guided_regex` and for the offline check:
+
+    python toon_grammar.py                 # gold TOON accepted, mutants rejected
+    python toon_grammar.py --rows 100      # also synthetic payloads of 100 rows
+    python toon_grammar.py --print order   # the GBNF (--regex for the regex)
+"""
+import argparse
+import copy
+import json
+import re
+import sys
+import types
+from functools import lru_cache
+from typing import Any, Callable, Dict, List, Literal, NamedTuple, Optional, Tuple, Type, Union, get_args, get_origin
+
+from pydantic import BaseModel
+
+import toon
+
+NONE = type(None)
+FENCE_OPEN, FENCE_CLOSE = "```toon", "\n```"
+
+# Token rules shared by every grammar (added to it when used)
+TERMINALS = {
+    "int": r'"-"? ("0" | [1-9] [0-9]*)',
+    "num": r'"-"? ("0" | [1-9] [0-9]*) ("." [0-9]+)? ([eE] [-+]? [0-9]+)?',
+    "bool": r'"true" | "false"',
+    "count": r'[1-9] [0-9]*',
+    "qstr": r'"\"" ([^"\\\n] | "\\" ["\\nrt])* "\""',
+    # Unquoted strings: no leading "-" or space, no trailing space, none of :"\[]{} (the
+    # delimiter too in rows and inline arrays)
+    "str": r'qstr | [^-"\\:\[\]{} \t\n] ([^"\\:\[\]{}\t\n]* [^"\\:\[\]{} \t\n])?',
+    "cell": r'qstr | [^-"\\:\[\]{}, \t\n] ([^"\\:\[\]{},\t\n]* [^"\\:\[\]{}, \t\n])?',
+}
+_USES = {"str": ("qstr",), "cell": ("qstr",)}
+
+
+def _lit(text: str) -> str:
+    """GBNF string literal."""
+    return '"' + text.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") + '"'
+
+
+def _rule_name(path: str) -> str:
+    return re.sub(r"[^a-z0-9]+", "-", path.lower()).strip("-") or "value"
+
+
+def _optional(ann: Any) -> Tuple[Any, bool]:
+    """(inner annotation, whether None is allowed)."""
+    if get_origin(ann) in (Union, types.UnionType):
+        args = [a for a in get_args(ann) if a is not NONE]
+        if len(args) == 1:
+            return args[0], len(args) < len(get_args(ann))
+        raise TypeError(f"Unsupported union {ann!r}")
+    return ann, False
+
+
+def _is_model(ann: Any) -> bool:
+    return isinstance(ann, type) and issubclass(ann, BaseModel)
+
+
+def _is_primitive(ann: Any) -> bool:
+    inner, _ = _optional(ann)
+    return inner in (int, float, bool, str, NONE) or get_origin(inner) is Literal
+
+
+def _list_item(ann: Any) -> Optional[Any]:
+    """Item annotation when `ann` is a list type, else None."""
+    return get_args(ann)[0] if get_origin(ann) in (list, List) else None
+
+
+class _Compiler:
+    def __init__(self):
+        self.rules: Dict[str, str] = {}
+        self.stack: List[type] = []
+
+    def add(self, name: str, expr: str) -> str:
+        base, n = name, 1
+        while name in self.rules or name in TERMINALS:
+            n += 1
+            name = f"{base}-{n}"
+        self.rules[name] = expr
+        return name
+
+    def primitive(self, ann: Any, cell: bool) -> str:
+        inner, nullable = _optional(ann)
+        if get_origin(inner) is Literal:
+            alts = [_lit(toon.encode_primitive(v, ",")) for v in get_args(inner)]
+        elif inner is bool:
+            alts = ["bool"]
+        elif inner is int:
+            alts = ["int"]
+        elif inner is float:
+            alts = ["num"]
+        elif inner is str:
+            alts = ["cell" if cell else "str"]
+        elif inner is NONE:
+            alts = []
+        else:
+            raise TypeError(f"Unsupported field type {ann!r}")
+        if nullable or inner is NONE:
+            alts.append('"null"')
+        return alts[0] if len(alts) == 1 else "(" + " | ".join(alts) + ")"
+
+    def body(self, model: Type[BaseModel], depth: int, path: str) -> str:
+        """Rule for the fields of `model` at `depth`, each line led by a newline."""
+        if model in self.stack:
+            raise TypeError(f"Recursive model {model.__name__} is not supported")
+        self.stack.append(model)
+        rule = self.add(_rule_name(path), "")  # named before its children, so rules read top-down
+        parts = []
+        for name, info in model.model_fields.items():
+            line = self.field(name, info.annotation, "\n" + " " * (toon.INDENT * depth), depth + 1, f"{path}-{name}")
+            parts.append(line if info.is_required() else f"({line})?")
+        self.stack.pop()
+        self.rules[rule] = " ".join(parts) or '""'
+        return rule
+
+    def field(self, name: str, ann: Any, lead: str, child_depth: int, path: str) -> str:
+        """`name` and its value, starting with `lead` (newline, indentation and "- " on a
+        list item's first line); nested lines sit at `child_depth`."""
+        key = toon._encode_key(name)
+        inner, nullable = _optional(ann)
+        if _is_primitive(ann):
+            return f"{_lit(f'{lead}{key}: ')} {self.primitive(ann, cell=False)}"
+        if _is_model(inner):
+            expr = f"{_lit(f'{lead}{key}:')} {self.body(inner, child_depth, path)}"
+        else:
+            item = _list_item(inner)
+            if item is None:
+                raise TypeError(f"Unsupported field type {ann!r} ({path})")
+            expr = self.array(key, item, lead, child_depth, path)
+        return f"({_lit(f'{lead}{key}: null')} | {expr})" if nullable else expr
+
+    def array(self, key: str, item: Any, lead: str, depth: int, path: str) -> str:
+        empty = _lit(f"{lead}{key}[0]:")
+        if _is_primitive(item):
+            value = self.primitive(item, cell=True)
+            return f'({empty} | {_lit(f"{lead}{key}[")} count "]: " {value} ("," {value})*)'
+        if not _is_model(item):
+            raise TypeError(f"Unsupported array item type {item!r} ({path})")
+        fields = item.model_fields
+        row_lead = _lit("\n" + " " * (toon.INDENT * depth))
+        if fields and all(_is_primitive(f.annotation) for f in fields.values()):
+            cells = ' "," '.join(self.primitive(f.annotation, cell=True) for f in fields.values())
+            row = self.add(_rule_name(f"{path}-row"), f"{row_lead} {cells}")
+            header = "]{" + ",".join(toon._encode_key(n) for n in fields) + "}:"
+            return f'({empty} | {_lit(f"{lead}{key}[")} count {_lit(header)} {row}+)'
+        return f'({empty} | {_lit(f"{lead}{key}[")} count "]:" {self.list_item(item, depth, path)}+)'
+
+    def list_item(self, model: Type[BaseModel], depth: int, path: str) -> str:
+        """Rule for one `- ` item: the first field on the hyphen line, the rest one level deeper."""
+        if model in self.stack:
+            raise TypeError(f"Recursive model {model.__name__} is not supported")
+        fields = list(model.model_fields.items())
+        pad = " " * (toon.INDENT * depth)
+        if not fields:
+            return self.add(_rule_name(f"{path}-item"), _lit(f"\n{pad}-"))
+        if not fields[0][1].is_required():
+            raise TypeError(f"{model.__name__}: list items need a required first field")
+        self.stack.append(model)
+        rule = self.add(_rule_name(f"{path}-item"), "")
+        first, info = fields[0]
+        parts = [self.field(first, info.annotation, f"\n{pad}- ", depth + 2, f"{path}-{first}")]
+        for name, info in fields[1:]:
+            line = self.field(name, info.annotation, f"\n{pad}{' ' * toon.INDENT}", depth + 2, f"{path}-{name}")
+            parts.append(line if info.is_required() else f"({line})?")
+        self.stack.pop()
+        self.rules[rule] = " ".join(parts)
+        return rule
+
+
+def _used_terminals(rules: Dict[str, str]) -> List[str]:
+    used, todo = set(), [n for n in TERMINALS if any(re.search(rf"(?<![\w-]){n}(?![\w-])", e) for e in rules.values())]
+    while todo:
+        name = todo.pop()
+        if name not in used:
+            used.add(name)
+            todo += _USES.get(name, ())
+    return [n for n in TERMINALS if n in used]
+
+
+@lru_cache(maxsize=None)
+def compile_model(model: Type[BaseModel]) -> str:
+    """GBNF grammar (root rule `root`) of a fenced TOON document for `model`."""
+    c = _Compiler()
+    body = c.body(model, 0, model.__name__)
+    rules = {"root": f"{_lit(FENCE_OPEN)} {body} {_lit(FENCE_CLOSE)}", **c.rules}
+    rules.update({n: TERMINALS[n] for n in _used_terminals(rules)})
+    return "\n".join(f"{name} ::= {expr}" for name, expr in rules.items()) + "\n"
+
+
+# =========================================
+# Prompt skeleton
+# =========================================
+class Skeleton(NamedTuple):
+    """The TOON layout of a model with <placeholders>, and which TOON features it uses."""
+    text: str
+    nested: bool          # objects or arrays below the top level (indentation matters)
+    arrays: bool          # any [N] header
+    tabular: bool         # tabular arrays (header fields + comma rows)
+    list_items: bool      # "- " list items
+    numbers: bool         # float fields
+    texts: bool           # str fields
+    optional: Tuple[str, ...]  # fields that may be left out
+
+
+def _placeholder(ann: Any) -> str:
+    inner, nullable = _optional(ann)
+    if get_origin(inner) is Literal:
+        text = "|".join(toon.encode_primitive(v, ",") for v in get_args(inner))
+    else:
+        text = {bool: "true|false", int: "int", float: "number", str: "text", NONE: "null"}[inner]
+    return f"<{text}|null>" if nullable and inner is not NONE else f"<{text}>"
+
+
+class _SkeletonWriter:
+    def __init__(self):
+        self.lines: List[str] = []
+        self.seen: set = set()
+        self.optional: List[str] = []
+
+    def note(self, ann: Any) -> None:
+        self.seen.add(_optional(ann)[0])
+
+    def body(self, model: Type[BaseModel], depth: int) -> None:
+        for name, info in model.model_fields.items():
+            self.field(name, info, depth, "")
+
+    def field(self, name: str, info: Any, depth: int, prefix: str) -> None:
+        key, pad = toon._encode_key(name), " " * (toon.INDENT * depth) + prefix
+        inner, _ = _optional(info.annotation)
+        child = depth + 1 + (1 if prefix else 0)
+        if not info.is_required() and name not in self.optional:
+            self.optional.append(name)
+        if _is_primitive(info.annotation):
+            self.note(info.annotation)
+            self.lines.append(f"{pad}{key}: {_placeholder(info.annotation)}")
+            return
+        self.seen.add("nested")
+        if _is_model(inner):
+            self.lines.append(f"{pad}{key}:")
+            self.body(inner, child)
+            return
+        item = _list_item(inner)
+        self.seen.add("array")
+        if item is not None and _is_primitive(item):
+            self.note(item)
+            self.lines.append(f"{pad}{key}[N]: {_placeholder(item)},...")
+        elif item is not None and _is_model(item) and all(_is_primitive(f.annotation) for f in item.model_fields.values()):
+            self.seen.add("tabular")
+            for f in item.model_fields.values():
+                self.note(f.annotation)
+            self.lines.append(f"{pad}{key}[N]{{{','.join(toon._encode_key(n) for n in item.model_fields)}}}:")
+            self.lines.append(" " * (toon.INDENT * child) + ",".join(_placeholder(f.annotation)
+                                                                        for f in item.model_fields.values()))
+        elif item is not None and _is_model(item):
+            self.seen.add("list")
+            self.lines.append(f"{pad}{key}[N]:")
+            fields = list(item.model_fields.items())
+            for i, (n, f) in enumerate(fields):
+                self.field(n, f, child + (1 if i else 0), "" if i else "- ")
+        else:
+            raise TypeError(f"Unsupported field type {info.annotation!r} ({name})")
+
+
+@lru_cache(maxsize=None)
+def skeleton(model: Type[BaseModel]) -> Skeleton:
+    """What a TOON prompt for `model` needs: its layout and the features it exercises."""
+    w = _SkeletonWriter()
+    w.body(model, 0)
+    return Skeleton("\n".join(w.lines), "nested" in w.seen, "array" in w.seen, "tabular" in w.seen,
+                    "list" in w.seen, float in w.seen, str in w.seen, tuple(w.optional))
+
+
+# =========================================
+# GBNF -> regex
+# =========================================
+_TOKEN_RE = re.compile(r'\s+|"(?:[^"\\]|\\.)*"|\[(?:[^\]\\]|\\.)*\]|[A-Za-z0-9-]+|[()|?*+]')
+_CHAR_ESCAPES = {"n": "\n", "t": "\t", "r": "\r"}
+
+
+def _unescape(text: str) -> List[str]:
+    """Characters of a literal / class body, each escape resolved (a 2-char "\\-" kept escaped
+    so a class can tell an escaped dash from a range)."""
+    out, i = [], 0
+    while i < len(text):
+        ch = text[i]
+        if ch == "\\":
+            ch = text[i + 1]
+            out.append(_CHAR_ESCAPES.get(ch, ch if ch != "-" else "\\-"))
+            i += 2
+        else:
+            out.append(ch)
+            i += 1
+    return out
+
+
+def _class_regex(body: str) -> str:
+    negated = body.startswith("^")
+    chars = _unescape(body[1:] if negated else body)
+    out, i = [], 0
+    while i < len(chars):
+        if i + 2 < len(chars) and chars[i + 1] == "-":
+            out.append(f"{re.escape(chars[i])}-{re.escape(chars[i + 2])}")
+            i += 3
+        else:
+            out.append(re.escape(chars[i].lstrip("\\") if chars[i] == "\\-" else chars[i]))
+            i += 1
+    return "[" + ("^" if negated else "") + "".join(out) + "]"
+
+
+def parse_gbnf(grammar: str) -> Dict[str, List[str]]:
+    """Rule name -> expression tokens (one rule per line, `name ::= expr`)."""
+    rules: Dict[str, List[str]] = {}
+    for line in grammar.splitlines():
+        if not line.strip() or line.lstrip().startswith("#"):
+            continue
+        name, sep, expr = line.partition("::=")
+        if not sep:
+            raise ValueError(f"Not a GBNF rule: {line!r}")
+        tokens, pos = [], 0
+        while pos < len(expr):
+            m = _TOKEN_RE.match(expr, pos)
+            if m is None:
+                raise ValueError(f"Bad GBNF at {name.strip()}: {expr[pos:pos + 20]!r}")
+            if not m.group().isspace():
+                tokens.append(m.group())
+            pos = m.end()
+        rules[name.strip()] = tokens
+    return rules
+
+
+def to_regex(grammar: str, root: str = "root") -> str:
+    """A Python regex matching the same language as the (non-recursive) GBNF `grammar`."""
+    rules = parse_gbnf(grammar)
+    done: Dict[str, str] = {}
+
+    def rule(name: str, active: Tuple[str, ...]) -> str:
+        if name in active:
+            raise ValueError(f"Recursive rule {name!r} has no regex equivalent")
+        if name not in done:
+            if name not in rules:
+                raise ValueError(f"Undefined rule {name!r}")
+            text, end = alternation(rules[name], 0, active + (name,))
+            if end != len(rules[name]):
+                raise ValueError(f"Unbalanced ')' in rule {name!r}")
+            done[name] = text
+        return done[name]
+
+    def alternation(tokens: List[str], i: int, active: Tuple[str, ...]) -> Tuple[str, int]:
+        alts = [""]
+        while i < len(tokens) and tokens[i] != ")":
+            tok = tokens[i]
+            i += 1
+            if tok == "|":
+                alts.append("")
+                continue
+            if tok == "(":
+                inner, i = alternation(tokens, i, active)
+                if i >= len(tokens):
+                    raise ValueError("Unclosed '('")
+                i += 1
+                atom = f"(?:{inner})"
+            elif tok.startswith('"'):
+                atom = "".join(re.escape(ch) for ch in _unescape(tok[1:-1]))
+                atom = f"(?:{atom})" if len(tok) > 3 else atom
+            elif tok.startswith("["):
+                atom = _class_regex(tok[1:-1])
+            elif tok in "?*+":
+                raise ValueError(f"Dangling {tok!r}")
+            else:
+                atom = f"(?:{rule(tok, active)})"
+            while i < len(tokens) and tokens[i] in ("?", "*", "+"):
+                atom += tokens[i]
+                i += 1
+            alts[-1] += atom
+        return "|".join(alts), i
+
+    return rule(root, ())
+
+
+@lru_cache(maxsize=None)
+def model_regex(model: Type[BaseModel]) -> "re.Pattern[str]":
+    return re.compile(to_regex(compile_model(model)))
+
+
+def accepts(model: Type[BaseModel], text: str) -> bool:
+    """Whether `text` (a fenced TOON document) is in the grammar of `model`."""
+    return model_regex(model).fullmatch(text) is not None
+
+
+# =========================================
+# Offline check: gold accepted, mutants rejected
+# =========================================
+class Mutant(NamedTuple):
+    kind: str
+    text: str
+
+
+def fenced(body: str) -> str:
+    return f"{FENCE_OPEN}\n{body}{FENCE_CLOSE}"
+
+
+def _objects(value: Any, model: Type[BaseModel]):
+    """(object, model) for every object in `value`, outermost first."""
+    if isinstance(value, dict):
+        yield value, model
+        for name, info in model.model_fields.items():
+            inner, _ = _optional(info.annotation)
+            item = _list_item(inner)
+            if _is_model(inner) and isinstance(value.get(name), dict):
+                yield from _objects(value[name], inner)
+            elif item is not None and _is_model(item) and isinstance(value.get(name), list):
+                for v in value[name]:
+                    yield from _objects(v, item)
+
+
+def _value_mutants(gold: Any, model: Type[BaseModel]) -> List[Mutant]:
+    """Schema-level mutants of the gold object, re-encoded as TOON."""
+    out: List[Mutant] = []
+
+    def first(pred: Callable[[Any], bool], change: Callable[[dict, str, Any], None], kind: str) -> None:
+        doc = copy.deepcopy(gold)
+        for obj, m in _objects(doc, model):
+            for name, info in m.model_fields.items():
+                if name in obj and pred(info):
+                    change(obj, name, info)
+                    out.append(Mutant(kind, fenced(toon.encode(doc))))
+                    return
+
+    def set_to(value: Any) -> Callable[[dict, str, Any], None]:
+        return lambda obj, name, info: obj.__setitem__(name, value)
+
+    def reorder(obj: dict, name: str, info: Any) -> None:
+        keys = list(obj)
+        i = keys.index(name)
+        keys[i], keys[i + 1] = keys[i + 1], keys[i]
+        items = {k: obj.pop(k) for k in keys}
+        obj.update(items)
+
+    first(lambda i: get_origin(_optional(i.annotation)[0]) is Literal, set_to("intern"), "enum")
+    first(lambda i: _optional(i.annotation)[0] is int, set_to("x1"), "int-as-text")
+    first(lambda i: _optional(i.annotation)[0] is float, set_to("n/a"), "float-as-text")
+    first(lambda i: i.is_required(), lambda obj, name, info: obj.pop(name), "missing-field")
+    first(lambda i: True, lambda obj, name, info: obj.__setitem__("extra", 1), "extra-field")
+    doc = copy.deepcopy(gold)
+    for obj, m in _objects(doc, model):
+        if len(obj) > 1:
+            reorder(obj, list(obj)[-2], None)
+            out.append(Mutant("field-order", fenced(toon.encode(doc))))
+            break
+    return out
+
+
+def _text_mutants(body: str) -> List[Mutant]:
+    """Layout mutants of the gold TOON text."""
+    lines = body.split("\n")
+    nested = next((i for i, ln in enumerate(lines) if ln.startswith(" ")), None)
+    out = [Mutant("no-fence", body), Mutant("untagged-fence", f"```\n{body}\n```"),
+           Mutant("trailing-space", fenced("\n".join(lines[:1] + [lines[1] + " "] + lines[2:]) if len(lines) > 1
+                                           else lines[0] + " "))]
+    if nested is not None:
+        for kind, line in (("indent", " " + lines[nested]), ("tab-indent", "\t" + lines[nested].lstrip(" ")),
+                           ("dedent", lines[nested].lstrip(" "))):
+            out.append(Mutant(kind, fenced("\n".join(lines[:nested] + [line] + lines[nested + 1:]))))
+    header = next((i for i, ln in enumerate(lines) if re.search(r"\]\{[^}]*\}:$", ln)), None)
+    if header is not None:
+        out.append(Mutant("header-fields", fenced("\n".join(
+            lines[:header] + [re.sub(r"\{[^}]*\}", "", lines[header])] + lines[header + 1:]))))
+        if header + 1 < len(lines):
+            out.append(Mutant("short-row", fenced("\n".join(
+                lines[:header + 1] + [lines[header + 1].rsplit(",", 1)[0]] + lines[header + 2:]))))
+    return out
+
+
+def mutants(gold: Any, model: Type[BaseModel]) -> List[Mutant]:
+    body = toon.encode(gold)
+    return [m for m in _value_mutants(gold, model) + _text_mutants(body) if m.text != fenced(body)]
+
+
+class CheckResult(NamedTuple):
+    case: str
+    gold_ok: bool
+    rejected: List[str]  # mutant kinds the grammar rejected
+    accepted: List[str]  # mutant kinds it wrongly accepted
+
+
+def check(case: str, model: Type[BaseModel], gold_toon: str, gold: Any) -> CheckResult:
+    rejected, accepted = [], []
+    for m in mutants(gold, model):
+        (accepted if accepts(model, m.text) else rejected).append(m.kind)
+    return CheckResult(case, accepts(model, fenced(gold_toon.strip("\n"))), rejected, accepted)
+
+
+def main(argv=None) -> None:
+    ap = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    ap.add_argument("--print", metavar="CASE", help="print the grammar of one case and exit")
+    ap.add_argument("--regex", action="store_true", help="with --print: the regex translation instead")
+    ap.add_argument("--rows", type=int, nargs="*", default=[], help="also check synthetic payloads of these sizes")
+    args = ap.parse_args(argv)
+
+    import synthetic
+    from eval import CASES
+    if args.print:
+        grammar = compile_model(CASES[args.print].schema_model)
+        print(to_regex(grammar) if args.regex else grammar)
+        return
+
+    results = []
+    for name, case in CASES.items():
+        gold_toon = case.gold_path.with_suffix("").with_suffix(".gold.toon").read_text(encoding="utf-8")
+        results.append(check(name, case.schema_model, gold_toon, json.loads(case.gold_path.read_text(encoding="utf-8"))))
+        for rows in args.rows:
+            payload = json.loads("".join(synthetic.iter_json(synthetic.synthetic_payload(name, rows))))
+            results.append(check(f"{name}@{rows}", case.schema_model, toon.encode(payload), payload))
+    print(f"  {'case':<14} {'gold':>5} {'rejected':>9}  accepted mutants")
+    for r in results:
+        print(f"  {r.case:<14} {'ok' if r.gold_ok else 'FAIL':>5} "
+              f"{len(r.rejected):>4}/{len(r.rejected) + len(r.accepted):<4}  {', '.join(r.accepted) or '-'}")
+    if not all(r.gold_ok and not r.accepted for r in results):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()